@@ -0,0 +1 @@
+''' performance benchmarks (not part of the test suite) '''
@@ -0,0 +1,32 @@
+''' shared helpers of benchmarks '''
+
+import os
+import timeit
+
+import django
+import django.conf
+
+
+def setup_django(**options):
+    ''' configure a minimal django environment for benchmarking '''
+    if not django.conf.settings.configured:
+        os.environ.pop('DJANGO_SETTINGS_MODULE', None)
+        django.conf.settings.configure(
+            DEBUG=False,
+            SECRET_KEY='benchmark',
+            ROOT_URLCONF=options.pop('ROOT_URLCONF', __name__),
+            ALLOWED_HOSTS=['*'],
+            **options
+        )
+        django.setup()
+
+
+def measure(func, *, number=None, repeat=5):
+    ''' best per-call time (seconds) of func '''
+    timer = timeit.Timer(func)
+    if number is None:
+        number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+urlpatterns = []
@@ -0,0 +1,97 @@
+''' cost of binding auto parameters from a large json body
+
+    The per-request cost should stay flat as the number of auto-bound
+    parameters grows, since the body is parsed only once per request.
+
+    The serializer backends are timed on a large result too, the run fails
+    (exit status 1) if orjson is not at least ORJSON_SPEEDUP times faster
+    than stdlib json.
+
+    usage: python -m benchmarks.bench_json_body
+'''
+
+import sys
+import json
+import uuid
+import hashlib
+
+from ._common import setup_django, measure
+
+setup_django()
+
+# pylint: disable=wrong-import-position
+from django.test import RequestFactory  # noqa: E402
+
+from django_urlman import serializers  # noqa: E402
+from django_urlman.urlman import _APIWrapper  # noqa: E402
+
+BODY_SIZE = 200 * 1024
+MAX_PARAMS = 8
+
+RESULT_ROWS = 1000
+ORJSON_SPEEDUP = 3  # minimal speedup of orjson over stdlib json
+
+
+def _make_api(nparams):
+    names = [f'p{i}' for i in range(nparams)]
+    src = f"def api_{nparams}({', '.join(names)}):\n    return None\n"
+    scope = {'__name__': __name__}
+    exec(src, scope)  # pylint: disable=exec-used
+    return _APIWrapper(scope[f'api_{nparams}'], param_autos=names)
+
+
+def _make_body():
+    body = {f'p{i}': i for i in range(MAX_PARAMS)}
+    body['payload'] = ['x' * 100] * (BODY_SIZE // 104)
+    return json.dumps(body)
+
+
+def _make_result():
+    ''' envelope of rows with uuids and hex digests, which look like floats
+        to a naive scan of the output.
+    '''
+    return {'error': None, 'result': [
+        {'id': str(uuid.UUID(int=i * 7919)), 'sha': hashlib.sha1(str(i).encode()).hexdigest(),
+         'name': f'item {i}', 'price': i * 0.5, 'tags': ['a', 'b'], 'active': bool(i % 2)}
+        for i in range(RESULT_ROWS)]}
+
+
+def bench_serializers():
+    ''' usec per envelope of each backend, True if orjson keeps its speedup '''
+    result = _make_result()
+    timings = {name: measure(lambda dumps=dumps: dumps(result))
+               for name, dumps in serializers.get_backends().items()}
+
+    print(f'\nenvelope of {RESULT_ROWS} rows')
+    print(f"{'backend':>12} {'usec':>10}")
+    for name, seconds in timings.items():
+        print(f'{name:>12} {seconds * 1e6:>10.1f}')
+
+    if 'orjson' not in timings:
+        return True
+    speedup = timings['json'] / timings['orjson']
+    print(f'orjson speedup over json: {speedup:.1f}x (minimum {ORJSON_SPEEDUP}x)')
+    return speedup >= ORJSON_SPEEDUP
+
+
+def main():
+    ''' run benchmark '''
+    factory = RequestFactory()
+    body = _make_body()
+
+    print(f'json body: {len(body) // 1024} KB')
+    print(f"{'params':>8} {'usec/request':>14}")
+    for nparams in range(1, MAX_PARAMS + 1):
+        wrp = _make_api(nparams)
+
+        def run(wrp=wrp):
+            req = factory.post('/', data=body, content_type='application/json')
+            wrp(req)
+
+        print(f'{nparams:>8} {measure(run) * 1e6:>14.1f}')
+
+    return 0 if bench_serializers() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
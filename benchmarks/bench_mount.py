@@ -0,0 +1,57 @@
+''' start-up cost of mount() with many apis and module paths
+
+    Every module is mapped by its parent package with module_path(), so
+    each api resolves its url through a longest-prefix module lookup.
+
+    usage: python -m benchmarks.bench_mount
+'''
+
+import sys
+import types
+
+from ._common import setup_django, measure
+
+setup_django(ROOT_URLCONF='benchmarks._common')
+
+# pylint: disable=wrong-import-position
+from django_urlman import api, mount, module_path  # noqa: E402
+from django_urlman import urlman  # noqa: E402
+
+APIS = 10_000
+MAPPINGS = 1_000
+
+
+def _make_modules():
+    per_module = APIS // MAPPINGS
+    for i in range(MAPPINGS):
+        pkg = f'bench_app.m{i}'
+        name = f'{pkg}.views'
+        mod = types.ModuleType(name)
+        mod.__package__ = pkg
+        sys.modules[pkg] = types.ModuleType(pkg)
+        sys.modules[name] = mod
+
+        src = ''.join(f'def api_{j}(a: int, b=1):\n    return a\n' for j in range(per_module))
+        scope = {'__name__': name}
+        exec(src, scope)  # pylint: disable=exec-used
+        for j in range(per_module):
+            setattr(mod, f'api_{j}', api(scope[f'api_{j}']))
+
+        module_path(pkg, f'm{i}')
+
+
+def main():
+    ''' run benchmark '''
+    _make_modules()
+
+    def run():
+        for wrp in urlman._urls:  # pylint: disable=protected-access
+            wrp.site_url = None  # derive the urls again
+        mount(only_me=True)
+
+    print(f'{APIS} apis, {MAPPINGS} module paths')
+    print(f'mount: {measure(run, number=1, repeat=3) * 1e3:.1f} msec')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+''' url resolving latency: one urlpattern per url vs. trie/regex dispatching
+
+    usage: python -m benchmarks.bench_resolve
+'''
+
+from ._common import setup_django, measure
+
+setup_django()
+
+# pylint: disable=wrong-import-position
+from django.urls import path, re_path  # noqa: E402
+from django.urls.resolvers import URLResolver, RegexPattern, Resolver404  # noqa: E402
+
+from django_urlman.dispatch import TrieResolver, RegexResolver  # noqa: E402
+
+APPS = 10
+PER_MODULE = 20
+
+
+def view(req, **kwargs):  # pylint: disable=unused-argument
+    ''' dummy view '''
+
+
+def make_routes(count):
+    ''' synthetic routes: (anchor, route, is_regex) '''
+    routes = []
+    for i in range(count):
+        anchor = f'app{i % APPS}/'
+        module = f'mod{i // (APPS * PER_MODULE)}'
+        if i % 4 == 0:
+            # optional parameter, re_path()
+            routes.append((anchor, f'{module}/func{i}(?:/a/(?P<a>[0-9]+))?/', True))
+        else:
+            routes.append((anchor, f'{module}/func{i}/a/<int:a>/', False))
+    return routes
+
+
+def make_pattern(route, is_regex, name):
+    ''' url pattern of route '''
+    return re_path(route, view, name=name) if is_regex else path(route, view, name=name)
+
+
+def list_resolver(routes):
+    ''' root resolver of one urlpattern per url '''
+    patterns = [make_pattern(anchor + route, is_regex, f'r{i}')
+                for i, (anchor, route, is_regex) in enumerate(routes)]
+    return URLResolver(RegexPattern(r'^/'), patterns)
+
+
+def group_resolver(routes, group):
+    ''' root resolver of one group resolver per app anchor '''
+    groups = {}
+    for i, (anchor, route, is_regex) in enumerate(routes):
+        groups.setdefault(anchor, []).append(make_pattern(route, is_regex, f'r{i}'))
+    return URLResolver(RegexPattern(r'^/'),
+                       [group(anchor, patterns) for anchor, patterns in groups.items()])
+
+
+def url_of(routes, index):
+    ''' request path of route '''
+    anchor, route, is_regex = routes[index]
+    route = route.replace('(?:/a/(?P<a>[0-9]+))?', '/a/1') if is_regex \
+        else route.replace('<int:a>', '1')
+    return '/' + anchor + route
+
+
+def resolve_or_miss(resolver, url):
+    ''' resolve url, ignoring misses '''
+    try:
+        resolver.resolve(url)
+    except Resolver404:
+        pass
+
+
+def main():
+    ''' run benchmark '''
+    print(f"{'routes':>8} {'case':>6} {'list (usec)':>12} {'trie (usec)':>12}"
+          f" {'regex (usec)':>13}")
+    for count in (100, 1000, 10000):
+        routes = make_routes(count)
+        resolvers = (list_resolver(routes), group_resolver(routes, TrieResolver),
+                     group_resolver(routes, RegexResolver))
+        cases = {
+            'first': url_of(routes, 0),
+            'last': url_of(routes, count - 1),
+            'miss': f'/app{APPS - 1}/no/such/url/',
+        }
+        for case, url in cases.items():
+            timings = [measure(lambda r=r: resolve_or_miss(r, url), repeat=3) * 1e6
+                       for r in resolvers]
+            print(f'{count:>8} {case:>6} {timings[0]:>12.1f} {timings[1]:>12.1f}'
+                  f' {timings[2]:>13.1f}')
+
+
+if __name__ == '__main__':
+    main()
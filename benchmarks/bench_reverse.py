@@ -0,0 +1,55 @@
+''' url reversing: django.urls.reverse() vs reverse_api()
+
+    usage: python -m benchmarks.bench_reverse
+'''
+
+import datetime
+
+from ._common import setup_django, measure
+
+setup_django(ROOT_URLCONF='benchmarks._common')
+
+# pylint: disable=wrong-import-position
+import django.urls  # noqa: E402
+from django.core.signals import request_started, request_finished  # noqa: E402
+
+from django_urlman import api, mount, module_path, reverse_api  # noqa: E402
+
+ROUTES = 1_000
+
+
+def _make_apis():
+    scope = {'__name__': __name__, 'api': api, 'datetime': datetime}
+    exec(''.join(  # pylint: disable=exec-used
+        f'@api\ndef api_{i}(day: datetime.date, n: int, page=1):\n    return n\n'
+        for i in range(ROUTES)), scope)
+    module_path(__name__, '')
+    mount(only_me=True)
+    return scope
+
+
+def main():
+    ''' run benchmark '''
+    scope = _make_apis()
+    day = datetime.date(2024, 1, 2)
+
+    # links are built while serving a request
+    request_started.send(sender=None)
+
+    print(f'{ROUTES} routes')
+    print(f"{'api':>10} {'params':>10} {'reverse usec':>14} {'reverse_api usec':>18}")
+    for i in (0, ROUTES - 1):
+        wrp = scope[f'api_{i}']
+        for params in ({'day': day, 'n': 3}, {'day': day, 'n': 3, 'page': 2}):
+            assert reverse_api(wrp, **params) == django.urls.reverse(wrp.url_name, kwargs=params)
+
+            slow = measure(lambda: django.urls.reverse(  # pylint: disable=cell-var-from-loop
+                wrp.url_name, kwargs=params))  # pylint: disable=cell-var-from-loop
+            fast = measure(lambda: reverse_api(wrp, **params))  # pylint: disable=cell-var-from-loop
+            print(f'{wrp.func_name:>10} {len(params):>10} {slow * 1e6:>14.2f} {fast * 1e6:>18.2f}')
+
+    request_finished.send(sender=None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+''' benchmark suite: mount, resolve, bind, invoke and serialize
+
+    Runs offline on synthetic apps and stores the results (seconds per
+    operation) as json, so that runs of different commits can be compared:
+
+        python -m benchmarks.suite                 # writes bench-<commit>.json
+        python -m benchmarks.suite -o base.json
+        python -m benchmarks.suite --compare base.json
+        python -m benchmarks.suite --quick         # smaller apps, fewer repeats
+
+    --compare exits with status 1 if a case is slower than the baseline by
+    more than --threshold (10% by default).
+'''
+
+import sys
+import json
+import time
+import types
+import argparse
+import platform
+import subprocess
+from urllib.parse import urlencode
+
+from ._common import setup_django, measure
+
+setup_django(ROOT_URLCONF='benchmarks._common')
+
+# pylint: disable=wrong-import-position
+import django  # noqa: E402
+import django.urls  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+from django_urlman import api, mount, module_path, reverse_api, serializers  # noqa: E402
+from django_urlman import urlman  # noqa: E402
+
+FORMAT = 1  # results format
+
+factory = RequestFactory()
+
+
+# -- mount & resolve -------------------------------------------------------
+
+def make_app(name, endpoints, per_module=10):
+    ''' synthetic app of endpoints, every 2nd api has an optional param (re_path) '''
+    wrps = []
+    for m in range(max(endpoints // per_module, 1)):
+        modname = f'{name}.m{m}'
+        mod = types.ModuleType(modname)
+        mod.__package__ = name
+        sys.modules[modname] = mod
+
+        src = ''.join(f'def api_{j}(a: int, b=1):\n    return a\n' if j % 2
+                      else f'def api_{j}(a: int):\n    return a\n'
+                      for j in range(per_module))
+        scope = {'__name__': modname}
+        exec(src, scope)  # pylint: disable=exec-used
+        for j in range(per_module):
+            handler = api(scope[f'api_{j}'])
+            setattr(mod, f'api_{j}', handler)
+            wrps.append(handler)
+
+    sys.modules[name] = types.ModuleType(name)
+    module_path(name, name)
+    return wrps
+
+
+def drop_app(wrps):
+    ''' unregisters the apis of app '''
+    for wrp in wrps:
+        urlman._urls.remove(wrp)  # pylint: disable=protected-access
+
+
+def remount():
+    for wrp in urlman._urls:  # pylint: disable=protected-access
+        wrp.site_url = None  # derive the urls again
+    mount(only_me=True)
+    django.urls.clear_url_caches()
+
+
+def bench_mount(sizes, repeat):
+    ''' mount() time and resolving latency of path() / re_path() endpoints '''
+    results = {}
+    for size in sizes:
+        wrps = make_app(f'suite_app{size}', size)
+        results[f'mount/{size}'] = measure(remount, number=1, repeat=repeat)
+
+        resolver = django.urls.get_resolver()
+        for kind, wrp, params in (('path', wrps[-2], {'a': 1}),
+                                  ('re_path', wrps[-1], {'a': 1, 'b': 2})):
+            url = reverse_api(wrp, **params)
+            assert resolver.resolve(url).func is not None
+            results[f'resolve/{kind}/{size}'] = measure(
+                lambda url=url: resolver.resolve(url), repeat=repeat)
+        drop_app(wrps)
+    return results
+
+
+# -- bind ------------------------------------------------------------------
+
+def _bind_api(a, b, c):
+    return a
+
+
+def _fresh(req, *attrs):
+    ''' drops the parsed inputs cached on request '''
+    for attr in attrs:
+        req.__dict__.pop(attr, None)
+    return req
+
+
+def bind_requests():
+    ''' source -> (request, cached attributes to drop per call) '''
+    data = {'a': 1, 'b': 'two', 'c': 3.0}
+    query = urlencode(data)
+
+    session = factory.get('/')
+    session.session = dict(data)
+    cookie = factory.get('/')
+    cookie.META['HTTP_COOKIE'] = '; '.join(f'{k}={v}' for k, v in data.items())
+
+    return {
+        'json': (factory.post('/', data=json.dumps(data), content_type='application/json'),
+                 (urlman._JSON_BODY,)),  # pylint: disable=protected-access
+        'form': (factory.post('/', data=query,
+                              content_type='application/x-www-form-urlencoded'),
+                 ('_post', '_files')),
+        'query': (factory.get('/?' + query), ('GET',)),
+        'cookie': (cookie, ('COOKIES',)),
+        'session': (session, ()),
+    }
+
+
+def bench_bind(repeat):
+    ''' param_autos binding of 3 params from each request source '''
+    wrp = urlman._APIWrapper(_bind_api, param_autos=('a', 'b', 'c'))
+    results = {}
+    for source, (req, attrs) in bind_requests().items():
+        _, args, kwargs = wrp._prepare(_fresh(req, *attrs), {})  # pylint: disable=protected-access
+        assert (args or list(kwargs.values()))[0] in (1, '1'), source
+        results[f'bind/{source}'] = measure(
+            lambda req=req, attrs=attrs: wrp._prepare(  # pylint: disable=protected-access
+                _fresh(req, *attrs), {}), repeat=repeat)
+    return results
+
+
+# -- invoke ----------------------------------------------------------------
+
+@api
+def plain_counter(n: int):
+    ''' plain function api '''
+    return n
+
+
+class Counter:
+    ''' class-based apis '''
+
+    def __init__(self):
+        self.base = 1
+
+    @api
+    def per_request(self, n: int):
+        ''' new instance per request '''
+        return self.base + n
+
+    @api(lifecycle='singleton')
+    def singleton(self, n: int):
+        ''' shared instance '''
+        return self.base + n
+
+
+def bench_invoke(repeat):
+    ''' request handling of trivial plain and METHOD apis '''
+    req = factory.get('/')
+    results = {}
+    for name, func in (('plain', plain_counter), ('method', Counter.per_request),
+                       ('method_singleton', Counter.singleton)):
+        wrp = urlman.get_wrapper(func)
+        assert wrp(req, n=1).status_code == 200
+        results[f'invoke/{name}'] = measure(lambda wrp=wrp: wrp(req, n=1), repeat=repeat)
+    return results
+
+
+# -- serialize -------------------------------------------------------------
+
+def _rows(count):
+    return [{'id': i, 'name': f'item {i}', 'price': i * 0.5, 'tags': ['a', 'b'],
+             'active': bool(i % 2)} for i in range(count)]
+
+
+def bench_serialize(rows, repeat):
+    ''' envelope of a large result with each json backend, whole and streamed '''
+    req = factory.get('/')
+    result = _rows(rows)
+    results = {}
+    for backend in serializers.get_backends():
+        wrp = urlman._APIWrapper(_bind_api, serializer=backend)
+        results[f'serialize/{backend}/{rows}'] = measure(
+            lambda wrp=wrp: wrp._make_response(req, result),  # pylint: disable=protected-access
+            repeat=repeat)
+        results[f'serialize/{backend}/stream/{rows}'] = measure(
+            lambda wrp=wrp: b''.join(wrp._make_response(  # pylint: disable=protected-access
+                req, iter(result)).streaming_content), repeat=repeat)
+    return results
+
+
+# -- runner ----------------------------------------------------------------
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run(quick=False):
+    ''' results of all benchmarks '''
+    repeat = 3 if quick else 5
+    results = {}
+    results.update(bench_mount((100, 1000) if quick else (100, 1000, 5000), repeat))
+    results.update(bench_bind(repeat))
+    results.update(bench_invoke(repeat))
+    results.update(bench_serialize(1000 if quick else 10000, repeat))
+
+    return {
+        'format': FORMAT,
+        'commit': _commit(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'platform': platform.platform(),
+        'quick': quick,
+        'results': results,
+    }
+
+
+def compare(baseline, data, threshold):
+    ''' prints the changes against baseline, returns the regressed cases '''
+    regressed = []
+    print(f"{'case':<36} {'base usec':>12} {'usec':>12} {'change':>8}")
+    for case, seconds in data['results'].items():
+        base = baseline['results'].get(case)
+        if base is None:
+            print(f'{case:<36} {"-":>12} {seconds * 1e6:>12.1f}')
+            continue
+        change = seconds / base - 1
+        mark = ''
+        if change > threshold:
+            regressed.append(case)
+            mark = ' !'
+        print(f'{case:<36} {base * 1e6:>12.1f} {seconds * 1e6:>12.1f} {change:>+8.1%}{mark}')
+    return regressed
+
+
+def main(argv=None):
+    ''' run benchmark suite '''
+    parser = argparse.ArgumentParser(description='django-urlman benchmark suite')
+    parser.add_argument('-o', '--output', help='results file (bench-<commit>.json)')
+    parser.add_argument('--compare', metavar='BASELINE', help='results file to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='slowdown reported as regression (0.1: 10%%)')
+    parser.add_argument('--quick', action='store_true', help='smaller apps, fewer repeats')
+    args = parser.parse_args(argv)
+
+    data = run(args.quick)
+
+    output = args.output or f"bench-{data['commit']}.json"
+    with open(output, 'w', encoding='utf-8') as fp:
+        json.dump(data, fp, indent=1)
+
+    if args.compare is None:
+        for case, seconds in data['results'].items():
+            print(f'{case:<36} {seconds * 1e6:>12.1f} usec')
+        print(f'results written to {output}')
+        return 0
+
+    with open(args.compare, encoding='utf-8') as fp:
+        baseline = json.load(fp)
+    regressed = compare(baseline, data, args.threshold)
+    print(f'results written to {output}')
+    if regressed:
+        print(f'{len(regressed)} regression(s) above {args.threshold:.0%}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
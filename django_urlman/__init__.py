@@ -7,9 +7,23 @@ __license__ = "MIT"
 __author__ = "Randy Du <randydu@gmail.com>"
 
 from .urlman import (mount, app_path, module_path, APIResult,
-                     get_wrapper, _dump_urls)
+                     get_wrapper, get_json_body, dump_routes, load_all, _dump_urls)
 
 from .decorators import (url, api, HEAD, GET, POST, PUT, PATCH, DELETE,
                          CONNECT, OPTIONS, TRACE, READ, WRITE)
 
+from .converters import register_converter
+
+from .reverse import reverse_api
+
+from .lifecycles import lifecycle, shutdown
+
+from .errors import register_error
+
+from .sources import Query, Body, Header, Cookie, Session, Path
+
+from .cache import LRUCache, DjangoCache
+from .cache import invalidate as invalidate_cache, invalidate_prefix as invalidate_cache_prefix
+from .cache import stats as cache_stats
+
 from .marker import mark
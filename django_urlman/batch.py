@@ -0,0 +1,254 @@
+''' batch endpoint of mounted apis
+
+    mount(batch=...) adds the "_batch/" endpoint, which runs many apis in one
+    round-trip. The request is a POST of a json list of entries:
+
+        [
+            {"site_url": "app1/users/<int:uid>/", "params": {"uid": 3}},
+            {"url_name": "app1.orders", "method": "POST", "params": {"item": 7}},
+            ...
+        ]
+
+    the response is the list of the envelopes of the entries, in order. The
+    entries are dispatched to the mounted views directly, without resolving
+    the urls or running the middlewares again; the sub-requests share the
+    META, cookies, session and user of the batch request.
+
+    Path parameters of the api are passed as view arguments, the others in
+    the query string of GET, HEAD, DELETE and OPTIONS entries or as json
+    body otherwise.
+
+        mount(batch=True): the entries run one after another,
+        mount(batch=8): the entries run concurrently, async apis in the event
+            loop and sync apis on a pool of 8 threads. The entries must be
+            independent of each other then. The database connections of the
+            pool threads are closed around each entry, as django does around
+            requests.
+'''
+
+import re
+import json
+import asyncio
+import concurrent.futures
+
+from asgiref.sync import (async_to_sync, sync_to_async, iscoroutinefunction,
+                          markcoroutinefunction)
+from django.db import close_old_connections
+from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest, QueryDict
+from django.http.response import HttpResponseNotAllowed
+from django.urls.resolvers import RoutePattern
+
+from . import serializers
+from .urlman import _JSON_BODY
+
+URL = '_batch/'
+URL_NAME = 'urlman.batch'
+MAX_ENTRIES = 100  # per batch request
+
+QUERY_METHODS = ('GET', 'HEAD', 'DELETE', 'OPTIONS')
+
+
+class BatchError(Exception):
+    ''' invalid batch entry '''
+
+
+def _envelope(error):
+    return serializers.json_dumps({'error': error, 'result': None})
+
+
+def _query_value(value):
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+class _Route:
+    ''' mounted view and its path parameters '''
+
+    def __init__(self, view, site_url, is_regex):
+        self.view = view
+        self.is_async = iscoroutinefunction(view)
+        if is_regex:
+            # re_path() passes the matched strings, the api converts them
+            self.converters = dict.fromkeys(re.compile(site_url).groupindex)
+        else:
+            self.converters = RoutePattern(site_url, is_endpoint=True).converters
+
+    def path_kwargs(self, params):
+        ''' view arguments of path parameters, as path() would pass them '''
+        kwargs = {}
+        for name, converter in self.converters.items():
+            if name not in params:
+                continue
+            value = params[name]
+            if converter is None:
+                kwargs[name] = str(value)
+            else:
+                try:
+                    kwargs[name] = converter.to_python(converter.to_url(value))
+                except ValueError as ex:
+                    raise BatchError(f"invalid path parameter '{name}': {value!r}") from ex
+        return kwargs
+
+
+class BatchView:
+    ''' view of the batch endpoint.
+
+        workers: entries run concurrently on so many threads, one after
+        another if None.
+    '''
+
+    def __init__(self, workers=None):
+        if workers is not None and not (isinstance(workers, int) and workers > 0):
+            raise ValueError(f'invalid batch workers: {workers!r}')
+
+        self.workers = workers
+        self._executor = None  # thread pool, created on first use
+        self._by_site_url = {}
+        self._by_name = {}
+
+        if workers is not None:
+            markcoroutinefunction(self)
+
+    def add(self, site_url, url_name, is_regex, view):
+        ''' exposes mounted route '''
+        route = _Route(view, site_url, is_regex)
+        self._by_site_url[site_url] = route
+        if url_name is not None:
+            self._by_name[url_name] = route
+
+    def _parse(self, req):
+        ''' entries of batch request, or the error response '''
+        if req.method != 'POST':
+            return None, HttpResponseNotAllowed(['POST'])
+
+        try:
+            entries = json.loads(req.body)
+        except ValueError:
+            return None, HttpResponseBadRequest('batch must be a json list')
+
+        if not isinstance(entries, list):
+            return None, HttpResponseBadRequest('batch must be a json list')
+        if len(entries) > MAX_ENTRIES:
+            return None, HttpResponseBadRequest(f'batch exceeds {MAX_ENTRIES} entries')
+        return entries, None
+
+    def _resolve(self, req, entry):
+        ''' (route, sub-request, view kwargs) of batch entry '''
+        if not isinstance(entry, dict):
+            raise BatchError('entry must be an object')
+
+        if 'site_url' in entry:
+            route = self._by_site_url.get(entry['site_url'])
+        else:
+            route = self._by_name.get(entry.get('url_name'))
+        if route is None:
+            raise BatchError('api not found')
+
+        method = str(entry.get('method', 'GET')).upper()
+        params = entry.get('params') or {}
+        if not isinstance(params, dict):
+            raise BatchError('params must be an object')
+
+        kwargs = route.path_kwargs(params)
+        others = {k: v for k, v in params.items() if k not in kwargs}
+        return route, _sub_request(req, method, others), kwargs
+
+    @staticmethod
+    def _body(response):
+        ''' envelope of sub-response '''
+        if not response.get('Content-Type', '').startswith('application/json'):
+            return _envelope(response.content.decode(errors='replace')
+                             or response.reason_phrase)
+        if response.streaming:
+            return b''.join(response.streaming_content)
+        return response.content or _envelope(None)  # HEAD
+
+    @staticmethod
+    async def _abody(response):
+        ''' _body() of response from async api '''
+        if response.streaming and response.is_async:
+            return b''.join([chunk async for chunk in response.streaming_content])
+        return BatchView._body(response)
+
+    def _call(self, route, sub, kwargs):
+        ''' envelope of sync view '''
+        return self._body(route.view(sub, **kwargs))
+
+    def _pooled_call(self, route, sub, kwargs):
+        ''' _call() on a pool thread, whose connections outlive the entry '''
+        close_old_connections()
+        try:
+            return self._call(route, sub, kwargs)
+        finally:
+            close_old_connections()
+
+    def _run(self, req, entry):
+        try:
+            route, sub, kwargs = self._resolve(req, entry)
+        except BatchError as ex:
+            return _envelope(str(ex))
+
+        if route.is_async:
+            return self._body(async_to_sync(route.view)(sub, **kwargs))
+        return self._call(route, sub, kwargs)
+
+    async def _arun(self, req, entry):
+        try:
+            route, sub, kwargs = self._resolve(req, entry)
+        except BatchError as ex:
+            return _envelope(str(ex))
+
+        if route.is_async:
+            return await self._abody(await route.view(sub, **kwargs))
+
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                self.workers, thread_name_prefix='urlman-batch')
+        return await sync_to_async(self._pooled_call, thread_sensitive=False,
+                                   executor=self._executor)(route, sub, kwargs)
+
+    @staticmethod
+    def _response(bodies):
+        return HttpResponse(b'[' + b','.join(bodies) + b']', content_type='application/json')
+
+    def __call__(self, req):
+        entries, response = self._parse(req)
+        if self.workers is not None:
+            return self._acall(req, entries, response)
+        if response is not None:
+            return response
+        return self._response([self._run(req, entry) for entry in entries])
+
+    async def _acall(self, req, entries, response):
+        if response is not None:
+            return response
+        return self._response(await asyncio.gather(
+            *(self._arun(req, entry) for entry in entries)))
+
+
+def _sub_request(req, method, params):
+    ''' request of batch entry '''
+    sub = HttpRequest()
+    sub.method = method
+    sub.path = req.path
+    sub.path_info = req.path_info
+    sub.META = {**req.META, 'REQUEST_METHOD': method}
+    sub.COOKIES = req.COOKIES
+    for name in ('session', 'user'):
+        if hasattr(req, name):
+            setattr(sub, name, getattr(req, name))
+
+    if method in QUERY_METHODS:
+        query = QueryDict(mutable=True)
+        for name, value in params.items():
+            values = value if isinstance(value, list) else [value]
+            query.setlist(name, [_query_value(x) for x in values])
+        sub.GET = query
+        sub.META['QUERY_STRING'] = query.urlencode()
+        sub.META.pop('CONTENT_TYPE', None)
+        sub.content_type = ''
+        sub._body = b''  # pylint: disable=protected-access
+    else:
+        sub.content_type = sub.META['CONTENT_TYPE'] = 'application/json'
+        sub._body = serializers.json_dumps(params)  # pylint: disable=protected-access
+        setattr(sub, _JSON_BODY, params)  # parsed already
+    return sub
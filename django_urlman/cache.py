@@ -0,0 +1,218 @@
+''' response caching of apis
+
+    @api(cache=...) memoizes the serialized response of GET requests (HEAD
+    requests are answered from the cache too), keyed by the site-url, the
+    http method and the bound parameter values of the api:
+
+        @api(cache=True)  # in-process LRU cache
+        @api(cache=60)  # in-process LRU cache, entries expire in 60 seconds
+        @api(cache=LRUCache(maxsize=100, ttl=5, max_bytes=1 << 20))
+        @api(cache=DjangoCache('default', timeout=60))  # shared by workers
+
+    Only successful (non-streaming) results are cached, errors and responses
+    returned by the api itself are not.
+'''
+
+import time
+import uuid
+import hashlib
+import threading
+import collections
+
+import django.core.cache
+
+_cached = []  # wrappers of cached apis
+
+
+class LRUCache:
+    ''' in-process cache evicting the least recently used entries.
+
+        maxsize: max number of entries,
+        ttl: entries expire in ttl seconds (never if None),
+        max_bytes: max total size of the cached responses (no limit if None).
+    '''
+
+    def __init__(self, maxsize=1024, ttl=None, max_bytes=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = collections.OrderedDict()  # key -> (expires, body)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, namespace, key):  # pylint: disable=unused-argument
+        ''' cached body of key, None if not cached '''
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, body = entry
+                if expires is None or expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return body
+                self._pop(key)
+            self.misses += 1
+            return None
+
+    def set(self, namespace, key, body):  # pylint: disable=unused-argument
+        ''' caches body of key '''
+        if self.max_bytes is not None and len(body) > self.max_bytes:
+            return
+
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (expires, body)
+            self._bytes += len(body)
+
+            while len(self._entries) > self.maxsize or (
+                    self.max_bytes is not None and self._bytes > self.max_bytes):
+                self._pop(next(iter(self._entries)))
+
+    def _pop(self, key):
+        _, body = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    async def aget(self, namespace, key):
+        ''' get() in the event loop '''
+        return self.get(namespace, key)
+
+    async def aset(self, namespace, key, body):
+        ''' set() in the event loop '''
+        self.set(namespace, key, body)
+
+    def invalidate(self, namespace, prefix):  # pylint: disable=unused-argument
+        ''' drops entries of keys starting with prefix '''
+        with self._lock:
+            for key in [x for x in self._entries if x.startswith(prefix)]:
+                self._pop(key)
+
+
+class DjangoCache:
+    ''' cache backed by django cache "alias", shared by worker processes.
+
+        timeout: entries expire in timeout seconds (the backend's default if
+        not specified).
+
+        Keys are hashed to suit any backend. As a backend cannot enumerate
+        keys, invalidation drops all entries of the api, by changing the
+        generation stored along the entries.
+    '''
+
+    _DEFAULT = object()
+
+    def __init__(self, alias='default', timeout=_DEFAULT):
+        self.alias = alias
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def _cache(self):
+        return django.core.cache.caches[self.alias]
+
+    @staticmethod
+    def _keys(namespace, key):
+        ''' (entry key, generation key) '''
+        return ('urlman:' + hashlib.sha1(key.encode()).hexdigest(),
+                'urlman:gen:' + hashlib.sha1(namespace.encode()).hexdigest())
+
+    def _timeout(self):
+        return {} if self.timeout is self._DEFAULT else {'timeout': self.timeout}
+
+    def _check(self, values, entry_key, gen_key):
+        entry = values.get(entry_key)
+        if entry is not None and entry[0] == values.get(gen_key):
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def get(self, namespace, key):
+        ''' cached body of key, None if not cached '''
+        keys = self._keys(namespace, key)
+        return self._check(self._cache.get_many(keys), *keys)
+
+    async def aget(self, namespace, key):
+        ''' get() in the event loop '''
+        keys = self._keys(namespace, key)
+        return self._check(await self._cache.aget_many(keys), *keys)
+
+    def set(self, namespace, key, body):
+        ''' caches body of key '''
+        entry_key, gen_key = self._keys(namespace, key)
+        self._cache.set(entry_key, (self._cache.get(gen_key), body), **self._timeout())
+
+    async def aset(self, namespace, key, body):
+        ''' set() in the event loop '''
+        entry_key, gen_key = self._keys(namespace, key)
+        await self._cache.aset(entry_key, (await self._cache.aget(gen_key), body),
+                               **self._timeout())
+
+    def invalidate(self, namespace, prefix):  # pylint: disable=unused-argument
+        ''' drops all entries of namespace '''
+        _, gen_key = self._keys(namespace, '')
+        self._cache.set(gen_key, uuid.uuid4().hex, timeout=None)
+
+
+def get_backend(cache):
+    ''' cache backend of @api(cache=...), None if not cached '''
+    if cache is None or cache is False:
+        return None
+    if cache is True:
+        return LRUCache()
+    if isinstance(cache, (int, float)):
+        return LRUCache(ttl=cache)
+    if all(hasattr(cache, x) for x in ('get', 'set', 'aget', 'aset', 'invalidate')):
+        return cache
+    raise ValueError(f'invalid api cache: {cache!r}')
+
+
+def register(wrp):
+    ''' keeps track of cached api for invalidation '''
+    _cached.append(wrp)
+
+
+def make_key(namespace, method, args, kwargs):
+    ''' cache key of api call '''
+    if method == 'HEAD':
+        method = 'GET'
+    return f'{namespace}|{method}|{args!r}|{sorted(kwargs.items())!r}'
+
+
+def _get_wrapper(func):
+    from .urlman import get_wrapper  # pylint: disable=import-outside-toplevel,cyclic-import
+    return get_wrapper(func)
+
+
+def invalidate(func):
+    ''' drops the cached responses of api '''
+    wrp = _get_wrapper(func)
+    if wrp.cache is not None:
+        namespace = wrp.cache_namespace
+        wrp.cache.invalidate(namespace, namespace + '|')
+
+
+def invalidate_prefix(prefix):
+    ''' drops the cached responses of keys starting with prefix
+        ("<site_url>|<method>|<args>|<kwargs>"), site_url without leading slash.
+
+        A django cache drops all responses of the apis the prefix falls in.
+    '''
+    for wrp in _cached:
+        namespace = wrp.cache_namespace + '|'
+        if namespace.startswith(prefix) or prefix.startswith(namespace):
+            wrp.cache.invalidate(wrp.cache_namespace, prefix)
+
+
+def stats(func):
+    ''' (hits, misses) of cached api '''
+    wrp = _get_wrapper(func)
+    return wrp.cache.hits, wrp.cache.misses
@@ -0,0 +1,98 @@
+''' single-flight coalescing of identical concurrent api calls
+
+    @api(coalesce=True) runs one invocation of the api for identical
+    concurrent GET (and HEAD) requests, keyed by the api and its bound
+    parameters: the first request (the leader) calls the api, the others
+    wait and are answered with the serialized result of the leader, or its
+    error.
+
+    Waiting works across threads and event loops alike. Results which are
+    not serialized by the api wrapper (streaming results and responses
+    returned by the api) are not shared, the waiting requests call the api
+    on their own then.
+'''
+
+import asyncio
+import threading
+import concurrent.futures
+
+
+def make_key(wrp, method, args, kwargs):
+    ''' flight key of api call '''
+    return wrp, method, repr(args), repr(sorted(kwargs.items()))
+
+
+class Flights:
+    ''' calls in flight, key -> future of the shared body '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def __len__(self):
+        return len(self._calls)
+
+    def _join(self, key):
+        ''' (future, is leader) '''
+        with self._lock:
+            future = self._calls.get(key)
+            if future is None:
+                future = self._calls[key] = concurrent.futures.Future()
+                return future, True
+            return future, False
+
+    def _land(self, key, future, body=None, error=None):
+        with self._lock:
+            del self._calls[key]
+        if error is None:
+            future.set_result(body)
+        else:
+            future.set_exception(error)
+
+    def run(self, key, func):
+        ''' func() returns (response, body), body is None if not shared.
+
+            the leader returns func(), the others (None, body) of the leader
+            unless it is not shared.
+        '''
+        future, leader = self._join(key)
+        if not leader:
+            body = future.result()
+            if body is not None:
+                return None, body
+            return func()
+
+        try:
+            response, body = func()
+        except Exception as ex:
+            self._land(key, future, error=ex)
+            raise
+        except BaseException:
+            self._land(key, future)  # the others call on their own
+            raise
+        self._land(key, future, body)
+        return response, body
+
+    async def arun(self, key, afunc):
+        ''' run() of coroutine function afunc '''
+        future, leader = self._join(key)
+        if not leader:
+            # cancelling a waiter must not cancel the flight
+            body = await asyncio.shield(asyncio.wrap_future(future))
+            if body is not None:
+                return None, body
+            return await afunc()
+
+        try:
+            response, body = await afunc()
+        except Exception as ex:
+            self._land(key, future, error=ex)
+            raise
+        except BaseException:
+            self._land(key, future)
+            raise
+        self._land(key, future, body)
+        return response, body
+
+
+flights = Flights()  # process-wide
@@ -1,6 +1,27 @@
 """ Extra converters """
 
+import datetime
+import decimal
+import uuid
+
 import django.urls
+from django.urls.converters import get_converters
+
+
+class IntConverter:
+    """ int type converter """
+    regex = '[0-9]+'
+
+    to_python = staticmethod(int)
+    to_url = staticmethod(str)
+
+
+class UUIDConverter:
+    """ uuid type converter """
+    regex = '[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
+
+    to_python = staticmethod(uuid.UUID)
+    to_url = staticmethod(str)
 
 
 class FloatConverter:
@@ -20,7 +41,7 @@ class FloatConverter:
 
 class BoolConverter:
     """ bool type converter """
-    regex = '(?i)(true|false)'
+    regex = '(?i:true|false)'
 
     @staticmethod
     def to_python(value):
@@ -39,5 +60,134 @@ class BoolConverter:
         return 'true' if value else 'false'
 
 
+class DecimalConverter(FloatConverter):
+    """ decimal type converter """
+
+    @staticmethod
+    def to_python(value):
+        """ string to decimal """
+        try:
+            return decimal.Decimal(value)
+        except decimal.InvalidOperation as ex:
+            raise ValueError(f'value ({value}) cannot be converted to decimal') from ex
+
+
+class DateConverter:
+    """ date type converter (ISO 8601: YYYY-MM-DD) """
+    regex = '[0-9]{4}-[0-9]{2}-[0-9]{2}'
+
+    to_python = staticmethod(datetime.date.fromisoformat)
+
+    @staticmethod
+    def to_url(value):
+        """ date to url string """
+        return value.isoformat()
+
+
+class DateTimeConverter(DateConverter):
+    """ datetime type converter (ISO 8601) """
+    regex = (DateConverter.regex +
+             '[T ][0-9]{2}:[0-9]{2}(?::[0-9]{2}(?:[.][0-9]{1,6})?)?'
+             '(?:Z|[+-][0-9]{2}:[0-9]{2})?')
+
+    @staticmethod
+    def to_python(value):
+        """ string to datetime """
+        if value.endswith('Z'):
+            value = value[:-1] + '+00:00'
+        return datetime.datetime.fromisoformat(value)
+
+
+class ConverterRegistry:
+    """ converter table keyed by type object.
+
+        Unlike django's converter table, which is keyed by name, types are
+        matched by identity, so unrelated classes sharing the same name are
+        never mixed up.
+
+        Types not registered here fall back to the django converter named
+        after the type, unless that name is owned by another registered type.
+    """
+
+    def __init__(self):
+        self._types = {}  # type -> (name, converter)
+        self._names = set()  # converter names owned by registered types
+        self._cache = {}  # resolved lookups
+        self._django = None  # django's converter table the cache derives from
+
+    def register(self, typ, converter, name):
+        """ registers converter instance of type under the converter name """
+        self._types[typ] = (name, converter)
+        self._names = {name for name, _ in self._types.values()}
+        self._cache.clear()
+
+    def lookup(self, typ):
+        """ (name, converter) of type, None if no converter is available """
+        django_converters = get_converters()
+        if django_converters is not self._django:
+            # django.urls.register_converter() has added new entries
+            self._django = django_converters
+            self._cache.clear()
+
+        try:
+            return self._cache[typ]
+        except KeyError:
+            pass
+
+        try:
+            entry = self._types[typ]
+        except KeyError:
+            name = getattr(typ, '__name__', None)
+            entry = None
+            if name not in self._names and name in django_converters:
+                entry = (name, django_converters[name])
+
+        self._cache[typ] = entry
+        return entry
+
+
+registry = ConverterRegistry()
+
+
+def register_converter(converter, typ, name=None):
+    """ registers converter (class) for type.
+
+        name: the converter name used in path(), defaults to the lower-case
+        name of the type; the converter is registered to django as well if
+        the name is not taken yet.
+    """
+    name = name or typ.__name__.lower()
+    django_converters = get_converters()
+    if name not in django_converters:
+        django.urls.register_converter(converter, name)
+    elif type(django_converters[name]) is not converter:
+        raise ValueError(f"converter name '{name}' is already registered")
+
+    registry.register(typ, get_converters()[name], name)
+
+
+def _register_builtin(converter, typ, name):
+    """ registers built-in converter (class) of type, django's converter named
+        name is left alone if it is another one, the converter is registered
+        as "urlman_<name>" then.
+    """
+    django_converters = get_converters()
+    if name in django_converters and type(django_converters[name]) is not converter:
+        name = 'urlman_' + name
+    if name not in get_converters():
+        django.urls.register_converter(converter, name)
+    registry.register(typ, get_converters()[name], name)
+
+
 django.urls.register_converter(FloatConverter, 'float')
 django.urls.register_converter(BoolConverter, 'bool')
+
+# fast built-in converters, names are the ones registered in django
+registry.register(int, IntConverter(), 'int')
+registry.register(str, get_converters()['str'], 'str')
+registry.register(uuid.UUID, UUIDConverter(), 'uuid')
+registry.register(float, FloatConverter(), 'float')
+registry.register(bool, BoolConverter(), 'bool')
+_register_builtin(DecimalConverter, decimal.Decimal, 'decimal')
+_register_builtin(DateConverter, datetime.date, 'date')
+_register_builtin(DateTimeConverter, datetime.datetime, 'datetime')
@@ -0,0 +1,288 @@
+""" Resolvers dispatching requests to a group of url patterns
+
+    The resolvers keep the original url patterns as their url_patterns, so
+    django's reverse() works as usual; only the resolving is replaced.
+"""
+
+import re
+
+from django.urls.resolvers import (URLResolver, RoutePattern, ResolverMatch,
+                                   Resolver404)
+
+_REGEX_META = re.compile(r'[.^$*+?{}\[\]\\|()]')
+_QUANTIFIERS = ('?', '*', '+', '{')
+# escaped char, character class or group/alternation char
+_REGEX_TOKEN = re.compile(r'\\.|\[\^?\]?(?:\\.|[^\]])*\]|[()|]', re.S)
+
+
+def _has_alternation(regex):
+    ''' regex has a top-level '|' (outside groups and character classes)? '''
+    depth = 0
+    for token in _REGEX_TOKEN.findall(regex):
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif token == '|' and not depth:
+            return True
+    return False
+
+
+def _static_segments(pattern):
+    ''' leading static segments of url pattern (URLPattern) '''
+    if isinstance(pattern.pattern, RoutePattern):
+        route = str(pattern.pattern)
+        idx = route.find('<')
+        prefix, rest = (route, '') if idx < 0 else (route[:idx], route[idx:])
+    else:
+        regex = str(pattern.pattern).lstrip('^')
+        if _has_alternation(regex):
+            # the other alternatives may match anything
+            return []
+        meta = _REGEX_META.search(regex)
+        prefix, rest = (regex, '') if meta is None else (regex[:meta.start()],
+                                                         regex[meta.start():])
+        if rest.startswith(_QUANTIFIERS):
+            # the quantified char is optional or repeated, not static
+            prefix = prefix[:-1]
+
+    segments = prefix.split('/')
+    # the piece after last '/' is a whole segment only if nothing but a new
+    # segment (or the end) follows.
+    last = segments.pop()
+    if last and (rest == '' or rest.startswith(('/', '(?:/', '$'))):
+        segments.append(last)
+    return segments
+
+
+class _TrieNode:
+    ''' node of url segment trie '''
+    __slots__ = ('children', 'patterns', 'candidates')
+
+    def __init__(self):
+        self.children = {}
+        self.patterns = []  # (index, pattern) whose static segments end here
+        self.candidates = ()  # patterns of this node and its ancestors, in order
+
+
+class _GroupResolver(URLResolver):
+    ''' resolver of a group of url patterns (URLPattern) under common prefix '''
+
+    def __init__(self, prefix, patterns):
+        super().__init__(RoutePattern(prefix), patterns)
+
+    def match_patterns(self, path):
+        ''' returns (ResolverMatch of the first matching pattern or None, tried) '''
+        raise NotImplementedError
+
+    def resolve(self, path):
+        path = str(path)  # path may be a reverse_lazy object
+        match = self.pattern.match(path)
+        if match:
+            new_path, args, kwargs = match
+            sub_match, tried = self.match_patterns(new_path)
+            if sub_match:
+                sub_match_dict = {**kwargs, **self.default_kwargs, **sub_match.kwargs}
+                sub_match_args = sub_match.args
+                if not sub_match_dict:
+                    sub_match_args = args + sub_match.args
+                return ResolverMatch(
+                    sub_match.func,
+                    sub_match_args,
+                    sub_match_dict,
+                    sub_match.url_name,
+                    [self.app_name] + sub_match.app_names,
+                    [self.namespace] + sub_match.namespaces,
+                    sub_match.route,
+                    tried,
+                    captured_kwargs=sub_match.captured_kwargs,
+                    extra_kwargs={**self.default_kwargs, **sub_match.extra_kwargs},
+                )
+            raise Resolver404({'tried': tried, 'path': new_path})
+        raise Resolver404({'path': path})
+
+
+class TrieResolver(_GroupResolver):
+    ''' resolver matching the static leading segments of its url patterns
+        through a prefix trie, only the candidate patterns on the path of
+        trie are then tried (in original order).
+
+        Patterns are matched from the start of the path.
+    '''
+
+    def __init__(self, prefix, patterns):
+        super().__init__(prefix, patterns)
+
+        self._root = _TrieNode()
+        for index, pattern in enumerate(patterns):
+            node = self._root
+            for seg in _static_segments(pattern):
+                node = node.children.setdefault(seg, _TrieNode())
+            node.patterns.append((index, pattern))
+
+        def link(node, inherited):
+            merged = sorted(inherited + node.patterns, key=lambda x: x[0])
+            node.candidates = tuple(pattern for _, pattern in merged)
+            for child in node.children.values():
+                link(child, merged)
+        link(self._root, [])
+
+    def candidates(self, path):
+        ''' url patterns possibly matching path, in original order '''
+        node = self._root
+        for seg in path.split('/'):
+            child = node.children.get(seg)
+            if child is None:
+                break
+            node = child
+        return node.candidates
+
+    def match_patterns(self, path):
+        tried = []
+        for pattern in self.candidates(path):
+            sub_match = pattern.resolve(path)
+            tried.append([pattern])
+            if sub_match:
+                return sub_match, tried
+        return None, tried
+
+
+# named group / backreference not escaped by backslash
+_NAMED_GROUP = re.compile(r'(?<!\\)((?:\\\\)*)\(\?P<(\w+)>')
+_BACKREF = re.compile(r'(?<!\\)((?:\\\\)*)\(\?P=(\w+)\)')
+_GLOBAL_FLAGS = re.compile(r'^\^?\(\?[aiLmsux]+\)')
+
+
+class _Alternative:
+    ''' url pattern as an alternative of combined regex '''
+    __slots__ = ('index', 'pattern', 'groups', 'converters', 'simple')
+
+    def __init__(self, index, pattern, groups, converters, simple):
+        self.index = index  # index of pattern in resolver
+        self.pattern = pattern
+        self.groups = groups  # [(tagged group name, group name), ...]
+        self.converters = converters  # path() converters
+        self.simple = simple  # captures named groups only?
+
+    def resolve(self, match):
+        ''' ResolverMatch from the match of combined regex, None if the
+            value cannot be converted (as path() does).
+        '''
+        if not self.simple:
+            # fall back to the pattern's own matching for positional groups
+            return self.pattern.resolve(match.string)
+
+        captured_kwargs = {}
+        for tag, name in self.groups:
+            value = match.group(tag)
+            if value is not None:
+                converter = self.converters.get(name, None)
+                if converter is not None:
+                    try:
+                        value = converter.to_python(value)
+                    except ValueError:
+                        return None
+                captured_kwargs[name] = value
+
+        pattern = self.pattern
+        return ResolverMatch(
+            pattern.callback,
+            (),
+            {**captured_kwargs, **pattern.default_args},
+            pattern.pattern.name,
+            route=str(pattern.pattern),
+            captured_kwargs=captured_kwargs,
+            extra_kwargs=pattern.default_args,
+        )
+
+
+def _combine(patterns, offset):
+    ''' combine url patterns into one regex of tagged alternatives
+
+        returns (regex, {tag group index: _Alternative})
+    '''
+    parts = []
+    alternatives = []
+    for i, pattern in enumerate(patterns, offset):
+        groups = []
+
+        def rename(match, i=i, groups=groups):
+            groups.append((f'_{i}_{match.group(2)}', match.group(2)))
+            return f'{match.group(1)}(?P<_{i}_{match.group(2)}>'
+
+        regex = pattern.pattern.regex.pattern
+        regex = regex[1:] if regex.startswith('^') else regex
+        regex = _NAMED_GROUP.sub(rename, regex)
+        regex = _BACKREF.sub(lambda m, i=i: f'{m.group(1)}(?P=_{i}_{m.group(2)})', regex)
+
+        parts.append(f'(?P<_{i}>{regex})')
+        simple = re.compile(regex).groups == len(groups)
+        alternatives.append(_Alternative(i, pattern, groups,
+                                         getattr(pattern.pattern, 'converters', {}), simple))
+
+    regex = re.compile('|'.join(parts))
+    return regex, {regex.groupindex[f'_{i}']: alt
+                   for i, alt in enumerate(alternatives, offset)}
+
+
+class RegexResolver(_GroupResolver):
+    ''' resolver matching its url patterns with one combined regex
+
+        Consecutive patterns are merged into an alternation of uniquely
+        tagged groups, a single regex scan picks the first matching pattern
+        and captures its parameters. Alternatives are tried in the order of
+        patterns, so the first match is the same as trying the patterns one
+        by one, patterns are matched from the start of the path.
+
+        Patterns with global inline flags, which cannot be embedded, are
+        matched on their own.
+    '''
+
+    def __init__(self, prefix, patterns):
+        super().__init__(prefix, patterns)
+
+        self._patterns = patterns
+
+        # runs of patterns: (index of last pattern, regex, {tag: alternative}),
+        # or (index, None, pattern) for standalone pattern
+        self._runs = []
+        run = []
+        for i, pattern in enumerate(patterns):
+            if _GLOBAL_FLAGS.match(pattern.pattern.regex.pattern):
+                if run:
+                    self._runs.append((i - 1, *_combine(run, i - len(run))))
+                    run = []
+                self._runs.append((i, None, pattern))
+            else:
+                run.append(pattern)
+        if run:
+            self._runs.append((len(patterns) - 1, *_combine(run, len(patterns) - len(run))))
+
+    def match_patterns(self, path):
+        tried = []
+        for last, regex, alternatives in self._runs:
+            if regex is None:
+                # standalone pattern
+                sub_match = alternatives.resolve(path)
+                tried.append([alternatives])
+                if sub_match:
+                    return sub_match, tried
+                continue
+
+            match = regex.match(path)
+            if match is None:
+                continue
+
+            alt = alternatives[match.lastindex]
+            sub_match = alt.resolve(match)
+            tried.append([alt.pattern])
+            if sub_match:
+                return sub_match, tried
+
+            # conversion failed, try the rest of the run one by one
+            for pattern in self._patterns[alt.index + 1:last + 1]:
+                sub_match = pattern.resolve(path)
+                tried.append([pattern])
+                if sub_match:
+                    return sub_match, tried
+        return None, tried
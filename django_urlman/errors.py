@@ -0,0 +1,131 @@
+''' error responses of apis
+
+    Error detail levels of the response envelope:
+
+        'none': {"error": "internal error", "result": null}
+        'repr': {"error": "<repr of exception>", "result": null}
+        'stack': as 'repr' with the formatted traceback in "stack", as long as
+                 stack_limiter allows, 'repr' otherwise.
+
+    Exception types registered with register_error() are answered with a
+    prebuilt response of their status code, the traceback is never formatted.
+'''
+
+import time
+import random
+import threading
+import traceback
+
+from django.http.response import HttpResponse
+
+from . import serializers
+
+DETAILS = ('none', 'repr', 'stack')
+
+GENERIC_ERROR = 'internal error'  # error of detail level 'none'
+
+
+class StackLimiter:
+    ''' decides which error responses carry the traceback.
+
+        sample: fraction of errors sampled,
+        per_second: at most so many tracebacks per second (no limit if None).
+    '''
+
+    def __init__(self, sample=1.0, per_second=None):
+        self._lock = threading.Lock()
+        self.configure(sample, per_second)
+
+    def configure(self, sample=1.0, per_second=None):
+        ''' changes the sampling and rate limit '''
+        if not 0 <= sample <= 1:
+            raise ValueError('sample must be within [0, 1]')
+        with self._lock:
+            self.sample = sample
+            self.per_second = per_second
+            self._tokens = per_second or 0  # token bucket, bursting a second
+            self._stamp = time.monotonic()
+
+    def allow(self):
+        ''' formats the traceback of this error? '''
+        if self.sample < 1 and random.random() >= self.sample:
+            return False
+        if self.per_second is None:
+            return True
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.per_second,
+                               self._tokens + (now - self._stamp) * self.per_second)
+            self._stamp = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+stack_limiter = StackLimiter()  # process-wide
+
+
+class _Registered:
+    ''' prebuilt error response of registered exception type '''
+
+    def __init__(self, status, message):
+        self.status = status
+        self.message = message
+        self.body = serializers.json_dumps({'error': message, 'result': None})
+
+    def response(self):
+        ''' new response of the error '''
+        return HttpResponse(self.body, status=self.status, content_type='application/json')
+
+
+_registry = {}  # exception type -> _Registered
+_resolved = {}  # raised exception type -> _Registered or None
+
+
+def register_error(exc_type, status, message=None):
+    ''' answers exception of exc_type (and its subclasses) raised by apis with
+        http status and error message (the name of exc_type by default).
+    '''
+    if not (isinstance(exc_type, type) and issubclass(exc_type, BaseException)):
+        raise ValueError('exc_type must be an exception class')
+
+    _registry[exc_type] = _Registered(status, exc_type.__name__ if message is None else message)
+    _resolved.clear()
+
+
+def lookup(exc_type):
+    ''' registered error of exception type, None if not registered '''
+    try:
+        return _resolved[exc_type]
+    except KeyError:
+        pass
+
+    entry = next((_registry[x] for x in exc_type.__mro__ if x in _registry), None)
+    _resolved[exc_type] = entry
+    return entry
+
+
+def check_detail(detail):
+    ''' validates error detail level '''
+    if detail not in DETAILS:
+        raise ValueError(f"unknown error detail '{detail}', must be one of {DETAILS}")
+    return detail
+
+
+def error_info(ex, detail='stack'):
+    ''' error fields of the response envelope '''
+    entry = lookup(type(ex))
+    if entry is not None:
+        return {'error': entry.message}
+
+    if detail == 'none':
+        return {'error': GENERIC_ERROR}
+
+    if detail == 'stack' and stack_limiter.allow():
+        return {
+            'error': repr(ex),
+            'stack': traceback.format_exception(type(ex), ex, ex.__traceback__),
+        }
+    return {'error': repr(ex)}
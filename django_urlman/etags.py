@@ -0,0 +1,98 @@
+''' conditional GET of apis
+
+    @api(etag=...) tags the responses of GET requests and answers requests
+    with a matching "If-None-Match" header with "304 Not Modified":
+
+        @api(etag=True)  # etag of the serialized response body
+        @api(etag=version)  # etag of version(<params of the api>)
+
+    The version function is called with the bound parameters of the api
+    before the api itself, when the client has the version already neither
+    the api is called nor its result serialized. A version of None falls
+    back to the etag of the response body.
+
+    A HEAD request has no body to digest, with etag=True it is answered as
+    GET (served from the cache of GET, if enabled) with the body left out,
+    so HEAD carries the same etag and gets the same 304 as GET.
+'''
+
+import copy
+import hashlib
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def check(etag):
+    ''' validates etag option of api '''
+    if etag is None or etag is False:
+        return None
+    if etag is True or callable(etag):
+        return etag
+    raise ValueError(f'invalid api etag: {etag!r}, must be True or a version function')
+
+
+def _digest(data):
+    return quote_etag(hashlib.md5(data, usedforsecurity=False).hexdigest())
+
+
+def version_etag(version):
+    ''' etag of resource version, None if not versioned '''
+    return None if version is None else _digest(str(version).encode())
+
+
+def matches(req, etag):
+    ''' the client has the etag already? '''
+    header = req.META.get('HTTP_IF_NONE_MATCH')
+    if not header or etag is None:
+        return False
+
+    tags = parse_etags(header)
+    if tags == ['*']:
+        return True
+    etag = etag.removeprefix('W/')
+    return any(x.removeprefix('W/') == etag for x in tags)
+
+
+def not_modified(etag):
+    ''' 304 response of etag '''
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    return response
+
+
+def as_get(req):
+    ''' GET request of HEAD request '''
+    get = copy.copy(req)
+    get.method = 'GET'
+    return get
+
+
+def head_of(response):
+    ''' HEAD response of GET response, the body is left out '''
+    if response.streaming:
+        response.close()
+        return HttpResponse(status=response.status_code, content_type=response['Content-Type'])
+    response.content = b''
+    return response
+
+
+def tag(req, response, etag=None):
+    ''' tags successful response with etag (of the body if None), 304 if the
+        client has it already.
+    '''
+    if response.status_code != 200 or response.streaming or response.has_header('ETag'):
+        return response
+
+    if etag is None:
+        if not response.content:  # HEAD
+            return response
+        etag = _digest(response.content)
+
+    if matches(req, etag):
+        return not_modified(etag)
+
+    response['ETag'] = etag
+    return response
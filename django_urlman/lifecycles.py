@@ -0,0 +1,376 @@
+''' instance lifecycle of class-based apis
+
+    The instance a METHOD api is called on is provided by the lifecycle of its
+    class:
+
+        'request': a new instance per request (default)
+        'singleton': one instance per process
+        'thread': one instance per thread
+        'task': one instance per asyncio task, per thread outside of tasks
+        'pool': instances borrowed from a bounded pool
+
+    The lifecycle is specified per class with the @lifecycle decorator, or per
+    api with @api(lifecycle=...), e.g. @api(lifecycle=('pool', 4)).
+
+    An api returning a stream (generator) runs on the instance while the
+    stream is consumed, the instance is released when the stream is done.
+'''
+
+import atexit
+import asyncio
+import collections.abc
+import threading
+import weakref
+
+from asgiref.sync import sync_to_async
+
+_ATTR = '__urlman_lifecycle__'
+
+
+def _close(obj):
+    ''' default teardown, closes the instance if it can be closed '''
+    close = getattr(obj, 'close', None)
+    if callable(close):
+        close()
+
+
+class Lifecycle:
+    ''' provides instances of a class '''
+
+    def __init__(self, cls, teardown=None):
+        self.cls = cls
+        self.teardown = teardown or _close
+
+    def acquire(self):
+        ''' instance to call the api on '''
+        raise NotImplementedError
+
+    async def aacquire(self):
+        ''' acquire() in the event loop '''
+        return self.acquire()
+
+    def release(self, obj):
+        ''' the api called on obj returns '''
+
+    def shutdown(self):
+        ''' tears down the instances kept alive '''
+
+
+class PerRequest(Lifecycle):
+    ''' new instance per request '''
+
+    def acquire(self):
+        return self.cls()
+
+
+class Singleton(Lifecycle):
+    ''' one instance per process '''
+
+    def __init__(self, cls, teardown=None):
+        super().__init__(cls, teardown)
+        self._obj = None
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        obj = self._obj
+        if obj is None:
+            with self._lock:
+                if self._obj is None:
+                    self._obj = self.cls()
+                obj = self._obj
+        return obj
+
+    def shutdown(self):
+        with self._lock:
+            obj, self._obj = self._obj, None
+        if obj is not None:
+            self.teardown(obj)
+
+
+class PerThread(Lifecycle):
+    ''' one instance per thread '''
+
+    def __init__(self, cls, teardown=None):
+        super().__init__(cls, teardown)
+        self._local = threading.local()
+        self._objs = []  # all instances, for shutdown
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self._local.obj
+        except AttributeError:
+            obj = self._local.obj = self.cls()
+            with self._lock:
+                self._objs.append(obj)
+            return obj
+
+    def shutdown(self):
+        with self._lock:
+            objs, self._objs = self._objs, []
+        self._local = threading.local()
+        for obj in objs:
+            self.teardown(obj)
+
+
+class PerTask(Lifecycle):
+    ''' one instance per asyncio task, torn down when the task is done.
+
+        Sync code outside of tasks (sync apis run in threads) gets one
+        instance per thread.
+    '''
+
+    def __init__(self, cls, teardown=None):
+        super().__init__(cls, teardown)
+        self._objs = weakref.WeakKeyDictionary()  # task -> instance
+        self._lock = threading.Lock()
+        self._threads = PerThread(cls, teardown)
+
+    def acquire(self):
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:  # no running event loop
+            task = None
+        if task is None:
+            return self._threads.acquire()
+
+        try:
+            return self._objs[task]
+        except KeyError:
+            obj = self.cls()
+            with self._lock:
+                self._objs[task] = obj
+            task.add_done_callback(self._task_done)
+            return obj
+
+    def _task_done(self, task):
+        with self._lock:
+            obj = self._objs.pop(task, None)
+        if obj is not None:
+            self.teardown(obj)
+
+    def shutdown(self):
+        with self._lock:
+            objs = [*self._objs.values()]
+            self._objs.clear()
+        for obj in objs:
+            self.teardown(obj)
+        self._threads.shutdown()
+
+
+class Pool(Lifecycle):
+    ''' instances borrowed from a pool of at most "size" instances, waiting
+        at most "timeout" seconds (forever if None) for an instance returned.
+    '''
+
+    def __init__(self, cls, teardown=None, size=8, timeout=None):
+        super().__init__(cls, teardown)
+        if size < 1:
+            raise ValueError('pool size must be positive')
+
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._created = 0
+        self._cond = threading.Condition()
+
+    def _take(self, wait):
+        ''' idle instance, or None if a new instance should be created '''
+        with self._cond:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._created < self.size:
+                    self._created += 1
+                    return None
+                if not wait:
+                    raise BlockingIOError
+                if not self._cond.wait(self.timeout):
+                    raise TimeoutError(f'instance pool of {self.cls.__name__} exhausted')
+
+    def _create(self):
+        try:
+            return self.cls()
+        except BaseException:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+    def acquire(self):
+        obj = self._take(wait=True)
+        return self._create() if obj is None else obj
+
+    async def aacquire(self):
+        try:
+            obj = self._take(wait=False)
+        except BlockingIOError:
+            # waits in thread, not blocking the event loop. The thread keeps
+            # waiting when the caller is cancelled, its instance is returned.
+            waiting = asyncio.ensure_future(
+                sync_to_async(self.acquire, thread_sensitive=False)())
+            try:
+                return await asyncio.shield(waiting)
+            except asyncio.CancelledError:
+                waiting.add_done_callback(self._abandoned)
+                raise
+        return self._create() if obj is None else obj
+
+    def _abandoned(self, waiting):
+        ''' releases the instance acquired for a cancelled aacquire() '''
+        if not waiting.cancelled() and waiting.exception() is None:
+            self.release(waiting.result())
+
+    def release(self, obj):
+        with self._cond:
+            self._idle.append(obj)
+            self._cond.notify()
+
+    def shutdown(self):
+        with self._cond:
+            objs, self._idle = self._idle, []
+            self._created -= len(objs)
+        for obj in objs:
+            self.teardown(obj)
+
+
+def _sync_stream(stream, manager, obj):
+    ''' stream result of api, the instance is released when the stream is
+        exhausted, fails or is closed. Primed by release_after(), so closing
+        it before the first item releases the instance too.
+    '''
+    try:
+        yield
+        yield from stream
+    finally:
+        try:
+            close = getattr(stream, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            manager.release(obj)
+
+
+class _AsyncStream:
+    ''' async stream result of api, the instance is released when the stream
+        is exhausted, fails or is closed.
+    '''
+
+    def __init__(self, stream, manager, obj):
+        self._stream = stream
+        self._manager = manager
+        self._obj = obj
+
+    def _release(self):
+        manager, self._manager = self._manager, None
+        if manager is not None:
+            obj, self._obj = self._obj, None
+            manager.release(obj)
+
+    def __del__(self):
+        # dropped without being consumed
+        self._release()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self._stream.__anext__()
+        except BaseException:
+            self._release()
+            raise
+
+    async def aclose(self):
+        ''' closes the stream, releasing the instance '''
+        try:
+            aclose = getattr(self._stream, 'aclose', None)
+            if aclose is not None:
+                await aclose()
+        finally:
+            self._release()
+
+
+def release_after(manager, obj, result):
+    ''' releases obj to its lifecycle manager once the api result is done
+        with it: right away, or when the result is a stream, after the stream.
+    '''
+    if isinstance(result, collections.abc.Iterator):
+        stream = _sync_stream(result, manager, obj)
+        next(stream)
+        return stream
+    if isinstance(result, collections.abc.AsyncIterator):
+        return _AsyncStream(result, manager, obj)
+    manager.release(obj)
+    return result
+
+
+POLICIES = {
+    'request': PerRequest,
+    'singleton': Singleton,
+    'thread': PerThread,
+    'task': PerTask,
+    'pool': Pool,
+}
+
+_managers = {}  # (class, policy...) -> Lifecycle
+_lock = threading.Lock()
+
+
+def lifecycle(policy, *args, teardown=None, **kwargs):
+    ''' class decorator specifying the lifecycle of the class instances,
+        e.g. @lifecycle('pool', size=4, teardown=lambda obj: obj.disconnect())
+
+        teardown: called on instances at shutdown, closes the instance by
+        default if it has a close() method.
+    '''
+    if policy not in POLICIES:
+        raise ValueError(f"unknown lifecycle '{policy}'")
+
+    def wrap(cls):
+        setattr(cls, _ATTR, (policy, args, tuple(kwargs.items()), teardown))
+        return cls
+    return wrap
+
+
+def get_lifecycle(cls, policy=None):
+    ''' lifecycle of class instances, shared by the apis with the same policy.
+
+        policy: policy name or (name, *args) of api, the class lifecycle if None.
+    '''
+    if policy is None:
+        spec = getattr(cls, _ATTR, ('request', (), (), None))
+    elif isinstance(policy, str):
+        spec = (policy, (), (), None)
+    else:
+        spec = (policy[0], tuple(policy[1:]), (), None)
+
+    key = (cls, *spec)
+    try:
+        return _managers[key]
+    except KeyError:
+        pass
+
+    name, args, kwargs, teardown = spec
+    try:
+        factory = POLICIES[name]
+    except KeyError:
+        raise ValueError(f"unknown lifecycle '{name}'") from None
+
+    with _lock:
+        if key not in _managers:
+            _managers[key] = factory(cls, teardown, *args, **dict(kwargs))
+        return _managers[key]
+
+
+def shutdown():
+    ''' tears down the instances kept alive by all lifecycles, called at
+        process exit.
+    '''
+    with _lock:
+        managers = [*_managers.values()]
+    for manager in managers:
+        manager.shutdown()
+
+
+atexit.register(shutdown)
@@ -0,0 +1,32 @@
+''' writes the route manifest(s) of the site '''
+
+import importlib
+
+import django.conf
+from django.core.management.base import BaseCommand, CommandError
+
+from django_urlman import urlman
+
+
+class Command(BaseCommand):
+    ''' manage.py urlman_manifest [filename] '''
+
+    help = 'Writes the route manifest of mount(manifest=...) in the root url-conf.'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('filename', nargs='?',
+                            help='manifest to write, all manifests if omitted')
+
+    def handle(self, *args, **options):
+        # mounting the site records the manifests
+        importlib.import_module(django.conf.settings.ROOT_URLCONF)
+
+        written = urlman.write_manifest(options['filename'])
+        if not written:
+            raise CommandError('no route manifest is mounted'
+                               if options['filename'] is None else
+                               f'route manifest "{options["filename"]}" is not mounted')
+
+        for filename in written:
+            self.stdout.write(f'route manifest written: {filename}')
@@ -0,0 +1,115 @@
+''' persisted route manifest
+
+    The manifest records the mounted routes (see urlman.dump_routes()) with the
+    fingerprints of the source files they are derived from, so a process can
+    mount the routes without importing the apps as long as the sources are not
+    modified.
+'''
+
+import os
+import sys
+import json
+import hashlib
+import pkgutil
+import importlib.util
+
+VERSION = 1  # manifest format
+
+
+def _digest(filename):
+    with open(filename, 'rb') as fp:
+        return hashlib.sha256(fp.read()).hexdigest()
+
+
+def _source(module):
+    ''' fingerprint of the source file of a loaded module '''
+    filename = getattr(sys.modules.get(module), '__file__', None)
+    if filename is None:
+        return None
+
+    stat = os.stat(filename)
+    return {
+        'file': filename,
+        'mtime': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': _digest(filename),
+    }
+
+
+def _package_modules(package):
+    ''' names of the modules of package, None if the package cannot be found '''
+    try:
+        spec = importlib.util.find_spec(package)
+    except (ImportError, ValueError):
+        return None
+
+    if spec is None:
+        return None
+    if spec.submodule_search_locations is None:
+        return []  # plain module
+    return sorted(name for _, name, _ in pkgutil.iter_modules(spec.submodule_search_locations))
+
+
+def _is_modified(source):
+    ''' source file changed since fingerprinted? '''
+    if source is None:
+        return False
+
+    try:
+        stat = os.stat(source['file'])
+    except OSError:
+        return True
+
+    if stat.st_size != source['size']:
+        return True
+    if stat.st_mtime_ns == source['mtime']:
+        return False
+    # touched only (checkout, copying...)?
+    return _digest(source['file']) != source['sha256']
+
+
+def create(routes, options, modules=(), packages=()):
+    ''' manifest of routes mounted with options.
+
+        modules: extra modules the routes depend on (the urlconf for example),
+        packages: app packages, adding or removing their modules makes the
+        manifest stale.
+    '''
+    modules = {*modules, *(x['module'] for route in routes for x in route['handlers'])}
+    return {
+        'version': VERSION,
+        'options': options,
+        'sources': {name: _source(name) for name in sorted(modules)},
+        'packages': {name: _package_modules(name) for name in sorted(packages)},
+        'routes': routes,
+    }
+
+
+def is_stale(data, options):
+    ''' manifest out of date? '''
+    return (data.get('version') != VERSION
+            or data.get('options') != options
+            or any(_is_modified(x) for x in data['sources'].values())
+            or any(_package_modules(name) != modules
+                   for name, modules in data['packages'].items()))
+
+
+def write(filename, data):
+    ''' saves manifest '''
+    tmp = f'{filename}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as fp:
+        json.dump(data, fp, indent=1)
+    os.replace(tmp, filename)  # readers never see a partial manifest
+
+
+def load(filename, options):
+    ''' routes of the manifest, None if the manifest is missing or stale '''
+    try:
+        with open(filename, encoding='utf-8') as fp:
+            data = json.load(fp)
+    except (OSError, ValueError):
+        return None
+
+    if is_stale(data, options):
+        return None
+    return data['routes']
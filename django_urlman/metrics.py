@@ -0,0 +1,154 @@
+''' phase timings of api calls
+
+    When enabled, each api call records the time spent in its phases into
+    the fixed-bucket histograms of its url name:
+
+        'bind': checking the request and binding the parameters,
+        'call': the api function (with the etag, cache and coalescing
+                handling of GET requests, if any of them is enabled),
+        'serialize': building the json response (the envelope of a
+                streaming result is serialized when it is sent, later),
+        'total': the whole call, error handling included,
+        'dispatch': method dispatching of apis sharing a site-url, the
+                handler call included (with the thread hop of sync
+                handlers behind an async dispatcher).
+
+        metrics.enable()
+        ...
+        metrics.percentiles('app1.test.hello')  # {50: 0.0002, 90: ..., 99: ...}
+
+    A disabled recorder costs a flag check per call.
+'''
+
+import time
+import bisect
+import threading
+
+# upper bounds of the histogram buckets in seconds, 50us .. ~13s
+BUCKETS = tuple(0.00005 * 2 ** i for i in range(19))
+
+PERCENTILES = (50, 90, 99)
+
+enabled = False
+_callback = None
+
+_lock = threading.Lock()
+_histograms = {}  # (url_name, phase) -> Histogram
+
+
+class Histogram:
+    ''' latency histogram of fixed buckets '''
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # the last one is unbounded
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        ''' records a timing (the caller holds the lock) '''
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        ''' estimated q-th percentile, interpolated within its bucket '''
+        if not self.count:
+            return None
+
+        rank = self.count * q / 100
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else self.max
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+
+class Timer:
+    ''' phase timer of an api call '''
+
+    __slots__ = ('url_name', 'start', 'last', 'phases')
+
+    def __init__(self, url_name):
+        self.url_name = url_name
+        self.start = self.last = time.perf_counter()
+        self.phases = {}
+
+    def lap(self, phase):
+        ''' ends phase '''
+        now = time.perf_counter()
+        self.phases[phase] = now - self.last
+        self.last = now
+
+    def done(self, response):
+        ''' ends the call, records its timings '''
+        self.phases['total'] = time.perf_counter() - self.start
+        record(self.url_name, self.phases, response.status_code)
+
+
+def enable(callback=None):
+    ''' starts recording, callback(url_name, timings, status) is called after
+        each api call with the phase timings in seconds.
+    '''
+    global enabled, _callback  # pylint: disable=global-statement
+    _callback = callback
+    enabled = True
+
+
+def disable():
+    ''' stops recording, the histograms are kept '''
+    global enabled, _callback  # pylint: disable=global-statement
+    enabled = False
+    _callback = None
+
+
+def reset():
+    ''' drops all histograms '''
+    with _lock:
+        _histograms.clear()
+
+
+def record(url_name, timings, status=200):
+    ''' adds phase timings of an api call '''
+    with _lock:
+        for phase, seconds in timings.items():
+            key = url_name, phase
+            hist = _histograms.get(key)
+            if hist is None:
+                hist = _histograms[key] = Histogram()
+            hist.add(seconds)
+
+    callback = _callback
+    if callback is not None:
+        callback(url_name, timings, status)
+
+
+def histogram(url_name, phase='total'):
+    ''' histogram of api phase, None if not recorded '''
+    return _histograms.get((url_name, phase))
+
+
+def percentiles(url_name, phase='total', qs=PERCENTILES):
+    ''' {q: seconds} of api phase, empty if not recorded '''
+    with _lock:
+        hist = _histograms.get((url_name, phase))
+        return {} if hist is None else {q: hist.percentile(q) for q in qs}
+
+
+def snapshot():
+    ''' {url_name: {phase: {'count', 'sum', 'max', 'p50', 'p90', 'p99'}}} '''
+    data = {}
+    with _lock:
+        for (url_name, phase), hist in _histograms.items():
+            data.setdefault(url_name, {})[phase] = {
+                'count': hist.count,
+                'sum': hist.sum,
+                'max': hist.max,
+                **{f'p{q}': hist.percentile(q) for q in PERCENTILES},
+            }
+    return data
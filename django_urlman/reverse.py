@@ -0,0 +1,186 @@
+''' fast url reversing of mounted apis
+
+    reverse_api() builds the url of an api from a template precompiled from
+    its site-url, it gives the same url as django.urls.reverse() without
+    walking the url resolvers.
+
+    The apis mounted in an urlconf included by the root one, with
+    path('api/', include('x.urls')) for example, get the include() prefix,
+    which is looked up once. The prefix must not have parameters.
+'''
+
+import re
+import contextvars
+from urllib.parse import quote
+
+from django.core.signals import request_started, request_finished
+from django.urls import NoReverseMatch, get_resolver, get_script_prefix
+from django.urls.resolvers import RoutePattern, RegexPattern, URLResolver
+from django.utils.http import RFC3986_SUBDELIMS, escape_leading_slashes
+from django.utils.regex_helper import normalize
+
+from .urlman import get_wrapper
+
+_SAFE = RFC3986_SUBDELIMS + '/~:@'
+# any character quote() would escape
+_UNSAFE = re.compile('[^A-Za-z0-9_.~' + re.escape('-' + _SAFE) + ']')
+
+# script prefix of the current request, it is set before the request starts
+# and reading it from django on every call costs more than the reversing.
+_request_prefix = contextvars.ContextVar('urlman_script_prefix', default=None)
+
+
+def _request_started(sender, **kwargs):  # pylint: disable=unused-argument
+    _request_prefix.set(get_script_prefix())
+
+
+def _request_finished(sender, **kwargs):  # pylint: disable=unused-argument
+    _request_prefix.set(None)
+
+
+request_started.connect(_request_started, dispatch_uid='urlman_reverse_started')
+request_finished.connect(_request_finished, dispatch_uid='urlman_reverse_finished')
+
+
+def _quote(url):
+    return url if _UNSAFE.search(url) is None else quote(url, safe=_SAFE)
+
+
+class _URLTemplate:
+    ''' reverse url template of a site-url '''
+
+    def __init__(self, site_url, is_regex):
+        pattern = RegexPattern(site_url) if is_regex \
+            else RoutePattern(site_url, is_endpoint=True)
+
+        # same as the resolver does
+        regex = pattern.regex.pattern
+        if regex.startswith('^'):
+            regex = regex[1:]
+
+        self.regex = re.compile('^' + regex)
+        self.converters = pattern.converters
+
+        # param names -> format string, the optional segments of an api are
+        # left out when their params are not given.
+        self.formats = {}
+        for fmt, params in normalize(regex):
+            self.formats.setdefault(frozenset(params), fmt)
+
+    def format(self, prefix, params):
+        ''' url of params, None if params does not match the template '''
+        try:
+            fmt = self.formats[frozenset(params)]
+        except KeyError:
+            return None
+
+        converters = self.converters
+        if not converters:  # re_path()
+            subs = {name: str(value) for name, value in params.items()}
+        else:
+            subs = {}
+            for name, value in params.items():
+                converter = converters.get(name)
+                if converter is None:
+                    subs[name] = str(value)
+                else:
+                    try:
+                        subs[name] = converter.to_url(value)
+                    except ValueError:
+                        return None
+
+        path = fmt % subs
+        if not self.regex.search(path):
+            return None
+
+        url = prefix + _quote(path)
+        # same as escape_leading_slashes()
+        return escape_leading_slashes(url) if url.startswith('//') else url
+
+
+_quoted_prefixes = {}  # script prefix -> quoted
+
+
+_templates = {}  # (site_url, is_regex) -> _URLTemplate
+
+_include_prefixes = {}  # (root resolver, urlconf) -> include() prefix
+
+
+def _static_prefix(pattern):
+    ''' url prefix of include() pattern, None if it has parameters '''
+    if isinstance(pattern, RoutePattern):
+        return None if pattern.converters else str(pattern)
+    if isinstance(pattern, RegexPattern):
+        formats = normalize(pattern.regex.pattern)
+        if len(formats) == 1 and not formats[0][1]:
+            return formats[0][0] % {}
+    return None
+
+
+def _find_include(patterns, urlconf, prefix):
+    ''' include() prefix of urlconf in patterns, prefix is None below a
+        prefix with parameters.
+    '''
+    for pattern in patterns:
+        if not isinstance(pattern, URLResolver):
+            continue
+        static = _static_prefix(pattern.pattern)
+        inner = None if prefix is None or static is None else prefix + static
+        if getattr(pattern.urlconf_name, '__name__', pattern.urlconf_name) == urlconf:
+            return True, inner
+        found, inner = _find_include(pattern.url_patterns, urlconf, inner)
+        if found:
+            return True, inner
+    return False, None
+
+
+def _include_prefix(urlconf):
+    ''' url prefix urlconf is included under in the root urlconf '''
+    resolver = get_resolver()
+    key = resolver, urlconf
+    try:
+        return _include_prefixes[key]
+    except KeyError:
+        pass
+
+    found, prefix = _find_include(resolver.url_patterns, urlconf, '')
+    if not found:
+        raise NoReverseMatch(f"urlconf '{urlconf}' is not included by the root urlconf")
+    if prefix is None:
+        raise NoReverseMatch(f"urlconf '{urlconf}' is included under a prefix with parameters")
+    _include_prefixes[key] = prefix
+    return prefix
+
+
+def reverse_api(func, **params):
+    ''' url of mounted api with params, same as django.urls.reverse() of the
+        api's url name.
+
+        func: api or the wrapped function.
+    '''
+    wrp = get_wrapper(func)
+    if wrp.site_url is None:
+        raise NoReverseMatch(f"api '{wrp.url_name}' is not mounted")
+
+    key = wrp.site_url, wrp.has_optional_param
+    try:
+        template = _templates[key]
+    except KeyError:
+        template = _templates[key] = _URLTemplate(*key)
+
+    prefix = _request_prefix.get()
+    if prefix is None:
+        prefix = get_script_prefix()
+    if wrp.urlconf is not None:
+        prefix += _include_prefix(wrp.urlconf)
+
+    try:
+        quoted = _quoted_prefixes[prefix]
+    except KeyError:
+        quoted = _quoted_prefixes[prefix] = _quote(prefix)
+
+    url = template.format(quoted, params)
+    if url is None:
+        raise NoReverseMatch(
+            f"Reverse for '{wrp.url_name}' with keyword arguments '{params}' not found.")
+    return url
@@ -0,0 +1,283 @@
+""" JSON serializer backends of the response envelope
+
+    A backend is a function mapping the envelope object to json bytes.
+    All built-in backends produce identical, compact utf-8 output with the
+    semantics of _MyJSONEncoder: private fields of arbitrary objects are
+    dropped, the optional '_cls_' tag is added and datetime, Decimal, UUID
+    values are formatted the way DjangoJSONEncoder does.
+
+    Except for the text of floats: orjson writes the same values in its
+    own shortest form, 1e16, 1e-7 and 0.00001 where repr() gives 1e+16,
+    1e-07 and 1e-05. Rewriting them would cost more than orjson saves, the
+    apis whose clients compare the bytes use serializer='json' instead.
+    Non-finite floats and float dict keys are not covered, since stdlib json
+    emits the non-standard NaN/Infinity tokens and orjson formats the keys
+    its own way.
+"""
+
+import collections.abc
+import dataclasses
+import enum
+import json
+import weakref
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+
+_MISSING = object()
+
+_django_default = DjangoJSONEncoder().default
+
+
+def _slot_names(cls):
+    ''' names of all slots defined in class hierarchy '''
+    names = []
+    for base in reversed(cls.__mro__):
+        slots = base.__dict__.get('__slots__', ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ('__dict__', '__weakref__') and name not in names:
+                names.append(name)
+    return names
+
+
+class _MyJSONEncoder(DjangoJSONEncoder):
+    enable_all_fields = False  # include private fields?
+
+    # include '_cls_' field indicating which class generates the data
+    include_cls_id = False
+
+    # serialization plans of types: type -> {(enable_all_fields, include_cls_id): plan},
+    # types created on the fly are not kept alive by their plans.
+    _plans = weakref.WeakKeyDictionary()
+
+    def default(self, o):
+        key = (self.enable_all_fields, self.include_cls_id)
+        try:
+            plan = self._plans[type(o)][key]
+        except KeyError:
+            plan = self._plans.setdefault(type(o), {})[key] = self._make_plan(o)
+        return plan(o)
+
+    def _make_plan(self, o):
+        ''' build the plan serializing objects of the same type as o '''
+        cls = type(o)
+
+        if isinstance(o, enum.Enum):
+            return lambda o: o.value
+        if isinstance(o, tuple):
+            # namedtuple, serialized as a list as stdlib json does.
+            return list
+
+        try:
+            _django_default(o)
+            return _django_default
+        except TypeError:
+            pass
+
+        # To minimize serialized data size, only instantiated fields are saved and
+        # the fields defined in class are ignored.
+        has_dict = hasattr(o, '__dict__')
+        if has_dict:
+            names = _slot_names(cls)
+        elif dataclasses.is_dataclass(cls):
+            names = [field.name for field in dataclasses.fields(cls)]
+        else:
+            names = _slot_names(cls)
+            if not names:
+                def unsupported(o):
+                    raise TypeError(f'Object of type {type(o).__name__} '
+                                    'is not JSON serializable')
+                return unsupported
+
+        all_fields = self.enable_all_fields
+        if not all_fields:
+            names = [name for name in names if not name.startswith('_')]
+        cls_id = cls.__name__ if self.include_cls_id else None
+
+        if has_dict and not names and cls_id is None:
+            # plain object, the most common case
+            if all_fields:
+                return lambda o: dict(o.__dict__)
+            return lambda o: {k: v for k, v in o.__dict__.items() if not k.startswith('_')}
+
+        def plan(o):
+            if not has_dict:
+                result = {}
+            elif all_fields:
+                result = dict(o.__dict__)
+            else:
+                result = {k: v for k, v in o.__dict__.items() if not k.startswith('_')}
+
+            for name in names:
+                value = getattr(o, name, _MISSING)
+                if value is not _MISSING:
+                    result[name] = value
+
+            if cls_id is not None:
+                result['_cls_'] = cls_id
+            return result
+
+        return plan
+
+
+def json_dumps(obj):
+    ''' stdlib json backend '''
+    try:
+        return json.dumps(obj, cls=_MyJSONEncoder, separators=(',', ':'),
+                          ensure_ascii=False).encode('utf-8')
+    except UnicodeEncodeError:
+        # lone surrogate, not encodable as utf-8 but as \udxxx escape
+        return json.dumps(obj, cls=_MyJSONEncoder, separators=(',', ':')).encode('ascii')
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME |
+                       orjson.OPT_PASSTHROUGH_DATACLASS)
+
+    def orjson_dumps(obj):
+        ''' orjson backend '''
+        try:
+            return orjson.dumps(obj, default=_MyJSONEncoder().default,
+                                option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # beyond orjson's capability (integer exceeding 64-bit, lone surrogate, ...)
+            return json_dumps(obj)
+
+
+if ujson is not None:
+    def ujson_dumps(obj):
+        ''' ujson backend '''
+        try:
+            return ujson.dumps(obj, default=_MyJSONEncoder().default, ensure_ascii=False,
+                               escape_forward_slashes=False).encode('utf-8')
+        except (TypeError, OverflowError, UnicodeEncodeError):
+            return json_dumps(obj)
+
+
+def get_backends():
+    ''' available backends, name -> dumps '''
+    backends = {'json': json_dumps}
+    if orjson is not None:
+        backends['orjson'] = orjson_dumps
+    if ujson is not None:
+        backends['ujson'] = ujson_dumps
+    return backends
+
+
+def get_dumps(serializer='auto'):
+    ''' resolve serializer backend.
+
+        serializer: backend name ('auto', 'orjson', 'ujson', 'json') or a
+        function mapping object to json bytes. 'auto' picks the fastest
+        installed backend.
+    '''
+    if callable(serializer):
+        return serializer
+
+    backends = get_backends()
+    if serializer == 'auto':
+        for name in ('orjson', 'ujson', 'json'):
+            if name in backends:
+                return backends[name]
+
+    try:
+        return backends[serializer]
+    except KeyError:
+        raise ValueError(f"json serializer '{serializer}' is not available") from None
+
+
+def is_stream(result):
+    ''' is the api result a stream (generator, iterator) to be serialized lazily? '''
+    return isinstance(result, collections.abc.Iterator)
+
+
+def is_async_stream(result):
+    ''' is the api result an async stream (async generator, iterator)? '''
+    return isinstance(result, collections.abc.AsyncIterator)
+
+
+def _encode_items(dumps, batch, first):
+    ''' encode batch of items as part of the result array '''
+    data = dumps(batch)[1:-1]
+    return data if first or not data else b',' + data
+
+
+def _encode_error_tail(dumps, batch, first, info):
+    ''' encode pending items and error info closing the streamed envelope '''
+    try:
+        tail = _encode_items(dumps, batch, first) if batch else b''
+    except Exception:  # pylint: disable=broad-except
+        tail = b''
+    return tail + b'],' + dumps(info)[1:-1] + b'}'
+
+
+def stream_envelope(items, dumps, error_info, chunk_size=100):
+    ''' incrementally encodes items of iterator as the json envelope.
+
+        The result array goes first so that error raised in the middle of
+        the stream can still be reported, the envelope being:
+
+            {"result":[...],"error":null}
+
+        on error the result array is closed with the items yielded so far,
+        followed by the error info (dict of extra envelope fields, from
+        error_info(ex)):
+
+            {"result":[...],"error":"...","stack":[...]}
+    '''
+    yield b'{"result":['
+    first = True
+    batch = []
+    try:
+        for item in items:
+            batch.append(item)
+            if len(batch) >= chunk_size:
+                data, batch = _encode_items(dumps, batch, first), []
+                first = False
+                yield data
+        if batch:
+            yield _encode_items(dumps, batch, first)
+    except Exception as ex:  # pylint: disable=broad-except
+        yield _encode_error_tail(dumps, batch, first, error_info(ex))
+        return
+    finally:
+        close = getattr(items, 'close', None)
+        if close is not None:
+            close()
+
+    yield b'],"error":null}'
+
+
+async def astream_envelope(items, dumps, error_info, chunk_size=100):
+    ''' async version of stream_envelope() for async iterator '''
+    yield b'{"result":['
+    first = True
+    batch = []
+    try:
+        async for item in items:
+            batch.append(item)
+            if len(batch) >= chunk_size:
+                data, batch = _encode_items(dumps, batch, first), []
+                first = False
+                yield data
+        if batch:
+            yield _encode_items(dumps, batch, first)
+    except Exception as ex:  # pylint: disable=broad-except
+        yield _encode_error_tail(dumps, batch, first, error_info(ex))
+        return
+    finally:
+        aclose = getattr(items, 'aclose', None)
+        if aclose is not None:
+            await aclose()
+
+    yield b'],"error":null}'
@@ -0,0 +1,190 @@
+''' declared parameter sources
+
+    A parameter annotated with a source marker is bound from that part of
+    the request only:
+
+        from typing import Annotated
+
+        @api
+        def search(q: Annotated[str, Query], page: Annotated[int, Query] = 1,
+                   token: Annotated[str, Header('X-Token')] = None):
+            ...
+
+    Query: query string, Body: json body or form data, Header: http header
+    (the param name with "_" as "-" by default), Cookie: cookie, Session:
+    session, Path: the url (the default of parameters without source).
+
+    Unlike the auto parameters (param_autos) which are looked up in the parts
+    of the request by the precedence order (param_order), a query-only api
+    never parses the body nor loads the session. A marker called with a name,
+    Query('q') for example, reads that name instead of the parameter name.
+
+    Undeclared auto parameters are looked up source by source in the order of
+    param_order (settings, mount() or @api), the first hit wins.
+
+    Async apis bind in the event loop, where the session backend must not be
+    accessed synchronously: the session is loaded by its async api (aget) when
+    the binding reaches it, then the binding runs again on the loaded session.
+'''
+
+import typing
+import inspect
+
+
+class Source:
+    ''' parameter source marker '''
+
+    kind = None
+
+    def __init__(self, alias=None):
+        self.alias = alias
+
+    def __call__(self, alias):
+        ''' marker reading alias instead of the parameter name '''
+        return type(self)(alias)
+
+    def __repr__(self):
+        return self.kind if self.alias is None else f'{self.kind}({self.alias!r})'
+
+    def key(self, name):
+        ''' name of the value in the request '''
+        return name if self.alias is None else self.alias
+
+    def resolve(self, req, name):
+        ''' (found, value) of parameter from request '''
+        raise NotImplementedError
+
+
+class _Query(Source):
+    kind = 'Query'
+
+    def resolve(self, req, name):
+        try:
+            return True, req.GET[self.key(name)]
+        except KeyError:
+            return False, None
+
+
+class _Body(Source):
+    kind = 'Body'
+
+    def resolve(self, req, name):
+        if req.content_type == 'application/json':
+            from .urlman import get_json_body  # pylint: disable=import-outside-toplevel,cyclic-import
+            content = get_json_body(req)
+        else:
+            content = req.POST
+
+        try:
+            return True, content[self.key(name)]
+        except (KeyError, TypeError):
+            return False, None
+
+
+class _Header(Source):
+    kind = 'Header'
+
+    def key(self, name):
+        return name.replace('_', '-') if self.alias is None else self.alias
+
+    def resolve(self, req, name):
+        try:
+            return True, req.headers[self.key(name)]
+        except KeyError:
+            return False, None
+
+
+class _Cookie(Source):
+    kind = 'Cookie'
+
+    def resolve(self, req, name):
+        try:
+            return True, req.COOKIES[self.key(name)]
+        except KeyError:
+            return False, None
+
+
+# request attribute set while an async api binds, True once the session is loaded
+ASYNC_SESSION = '_urlman_async_session'
+
+
+class SessionPending(Exception):
+    ''' session is to be loaded asynchronously before binding from it '''
+
+    def __init__(self, key):
+        super().__init__(key)
+        self.key = key
+
+
+class _Session(Source):
+    kind = 'Session'
+
+    def resolve(self, req, name):
+        session = getattr(req, 'session', None)
+        if session is None:
+            return False, None
+        if getattr(req, ASYNC_SESSION, True) is False and hasattr(session, 'aget'):
+            raise SessionPending(self.key(name))
+        try:
+            return True, session[self.key(name)]
+        except KeyError:
+            return False, None
+
+
+class _Path(Source):
+    kind = 'Path'
+
+    def resolve(self, req, name):
+        # path parameters are passed by the url resolver
+        return False, None
+
+
+Query = _Query()
+Body = _Body()
+Header = _Header()
+Cookie = _Cookie()
+Session = _Session()
+Path = _Path()
+
+
+def split_annotation(annotation):
+    ''' (type, source) of parameter annotation, source is None if not declared.
+
+        A bare marker (q: Query) declares the source only, the type is
+        inspect.Parameter.empty then.
+    '''
+    if isinstance(annotation, Source):
+        return inspect.Parameter.empty, annotation
+
+    if typing.get_origin(annotation) is typing.Annotated:
+        source = next((x for x in annotation.__metadata__ if isinstance(x, Source)), None)
+        return annotation.__origin__, source
+    return annotation, None
+
+
+# sources of auto parameters without declared source, by name
+ORDER_SOURCES = {
+    'query': Query,
+    'cookie': Cookie,
+    'header': Header,
+    'body': Body,
+    'session': Session,
+}
+
+# cheap sources first, the body (multipart parsing) and the session (backend
+# access) are only touched when the others miss.
+DEFAULT_ORDER = ('query', 'cookie', 'body', 'session')
+
+
+def check_order(order):
+    ''' validates precedence of the sources of auto parameters '''
+    if isinstance(order, str) or not order \
+            or any(x not in ORDER_SOURCES for x in order) or len(set(order)) < len(order):
+        raise ValueError(f'invalid param_order {order!r}, must be distinct names '
+                         f'of {tuple(ORDER_SOURCES)}')
+    return list(order)
+
+
+def get_order(order):
+    ''' source markers of precedence order '''
+    return tuple(ORDER_SOURCES[x] for x in order)
@@ -4,37 +4,138 @@ import sys
 import importlib
 import pkgutil
 import inspect
-import traceback
 import functools
 import json
 import warnings
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 
 import django.conf
 import django.urls
-from django.http.response import (HttpResponseBase, JsonResponse,
-                                  HttpResponseNotAllowed, HttpResponseBadRequest)
-from django.core.serializers.json import DjangoJSONEncoder
-from django.urls.converters import get_converters
+from django.http.response import (HttpResponseBase, HttpResponse, StreamingHttpResponse,
+                                  HttpResponseBadRequest)
 
 # make sure built-in converters are registered.
-from . import converters  # pylint: disable=unused-import
+from . import converters
 
 from . import marker
-from .utils import FuncType, get_typeinfo
+from . import serializers
+from . import errors
+from . import cache as _cache
+from . import etags
+from . import coalesce
+from . import metrics
+from . import sources
+from . import lifecycles
+from . import manifest as _manifest
+from .serializers import _MyJSONEncoder  # pylint: disable=unused-import
+from .dispatch import TrieResolver, RegexResolver
+from .utils import FuncType, get_typeinfo, is_async
 
-_urls = []
 _module_maps = {}  # module oaths
 _app_maps = {}  # app paths
 
+# request attribute caching the parsed json body
+_JSON_BODY = '_urlman_json_body_'
+
 
 # global settings
 settings = {
     'trailing_slash': True,  # URI should has a trailing slash
     'force_lowercase': True,  # URI should be in low-case
     'underscore_to_hyphen': True,  # URI should use hyphen instead of underscore
+    'serializer': 'auto',  # json serializer backend of response
+    'error_detail': 'stack',  # error details of response: 'none', 'repr' or 'stack'
+    # url dispatching: 'list' (one urlpattern per url), 'trie' or 'regex' (one resolver
+    # per app anchor)
+    'dispatch': 'list',
+    # precedence of the request parts auto parameters are looked up in, the
+    # first hit wins: 'query', 'cookie', 'header', 'body', 'session'
+    'param_order': sources.DEFAULT_ORDER,
 }
 
 
+class _Registry:
+    ''' registered api wrappers in registration order, indexed by
+        (module, qualname), url_name and site_url.
+    '''
+
+    def __init__(self):
+        self._wrappers = {}  # registration order, used as ordered set
+        self._by_qualname = {}  # (module, qualname) -> wrapper
+        self._by_name = {}  # url_name -> {wrapper: None}
+        self._by_site_url = {}  # site_url -> {wrapper: None}
+
+    @staticmethod
+    def _key(wrp):
+        return wrp.real_func.__module__, _qualname(wrp)
+
+    @staticmethod
+    def _discard(index, key, wrp):
+        wrps = index.get(key)
+        if wrps is not None:
+            wrps.pop(wrp, None)
+            if not wrps:
+                del index[key]
+
+    def append(self, wrp):
+        ''' registers wrapper, the latest one wins the (module, qualname) '''
+        self._wrappers[wrp] = None
+        self._by_qualname[self._key(wrp)] = wrp
+        self._by_name.setdefault(wrp.url_name, {})[wrp] = None
+        if wrp.site_url is not None:
+            self._by_site_url.setdefault(wrp.site_url, {})[wrp] = None
+        wrp._registry = self  # pylint: disable=protected-access
+
+    def remove(self, wrp):
+        ''' unregisters wrapper '''
+        del self._wrappers[wrp]
+        wrp._registry = None  # pylint: disable=protected-access
+
+        key = self._key(wrp)
+        if self._by_qualname.get(key) is wrp:
+            del self._by_qualname[key]
+            # falls back to the previous registration, if any
+            for other in reversed(self._wrappers):
+                if self._key(other) == key:
+                    self._by_qualname[key] = other
+                    break
+
+        self._discard(self._by_name, wrp.url_name, wrp)
+        self._discard(self._by_site_url, wrp.site_url, wrp)
+
+    def _site_url_changed(self, wrp, old):
+        self._discard(self._by_site_url, old, wrp)
+        if wrp.site_url is not None:
+            self._by_site_url.setdefault(wrp.site_url, {})[wrp] = None
+
+    def get(self, module, qualname):
+        ''' wrapper of api "qualname" in module, None if not registered '''
+        return self._by_qualname.get((module, qualname))
+
+    def by_name(self, url_name):
+        ''' wrappers of url name '''
+        return [*self._by_name.get(url_name, ())]
+
+    def by_site_url(self, site_url):
+        ''' wrappers mounted at site-url '''
+        return [*self._by_site_url.get(site_url, ())]
+
+    def __iter__(self):
+        return iter([*self._wrappers])
+
+    def __reversed__(self):
+        return reversed([*self._wrappers])
+
+    def __len__(self):
+        return len(self._wrappers)
+
+
+_urls = _Registry()
+
+
 def module_path(module, path):
     """ maps module to a url """
     if inspect.ismodule(module):
@@ -63,35 +164,61 @@ def app_path(pkg, path):
 
     _app_maps[name] = path
 
-# pylint: disable=(too-many-arguments, too-many-locals, too-many-branches)
+
+def _get_anchor(prj, app_paths, pkg, module):
+    """ mounting point of the app the module belongs to """
+    app = pkg if pkg != '' else module.split('.')[0]
+    # project module always mounts at '/'
+    return app_paths.get(app, _app_maps.get(app, app)) if app != prj else ''
+
+
+class _ModuleIndex:
+    ''' module paths indexed by dotted module name, resolving the longest
+        mapped prefix of a module in O(depth)
+    '''
+
+    def __init__(self, module_maps):
+        self._root = {}
+        for name, path in module_maps.items():
+            node = self._root
+            for seg in name.split('.'):
+                node = node.setdefault(seg, {})
+            node[None] = path  # mapped module
+
+    def lookup(self, segs):
+        ''' (path, number of segments matched) of the longest mapped prefix
+            of module segments, None if not mapped.
+        '''
+        found = None
+        node = self._root
+        for i, seg in enumerate(segs):
+            node = node.get(seg)
+            if node is None:
+                break
+            if None in node:
+                found = node[None], i + 1
+        return found
 
 
+# pylint: disable=(too-many-arguments, too-many-locals, too-many-branches)
 def _geturl(prj, app_paths, pkg, module, clsname, fname, param_url, *,
             module_maps=None, app_url=None, trailing_slash=True, url_processor=None):
-    """ deduce url from meta info """
-    module_maps = module_maps or _module_maps
+    """ deduce url from meta info
+
+        module_maps: module paths, either a dict or a _ModuleIndex built once
+        for all apis being mounted.
+    """
+    if not isinstance(module_maps, _ModuleIndex):
+        module_maps = _ModuleIndex(module_maps or _module_maps)
     segs = module.split('.')
-    app = pkg if pkg != '' else segs[0]
-    # project module always mounts at '/'
-    anchor = app_paths.get(app, _app_maps.get(app, app)) if app != prj else ''
+    anchor = _get_anchor(prj, app_paths, pkg, module)
 
     if app_url is None:
         parts = segs[1:]
-        try:
-            # exact match first
-            parts = module_maps[module].split('/')
-        except KeyError:
-            # searching partial matching
-            for i in sorted(module_maps, key=len, reverse=True):
-                if module.startswith(i):
-                    leftover = module[len(i):]
-                    if len(leftover) == 0:
-                        parts = module_maps[i].split('/')
-                        break
-                    if leftover[0] == '.':
-                        parts = module_maps[i].split(
-                            '/') + leftover[1:].split('.')
-                        break
+        found = module_maps.lookup(segs)
+        if found is not None:
+            path, depth = found
+            parts = path.split('/') + segs[depth:]
 
         while parts and parts[0] == '':
             parts = parts[1:]
@@ -130,6 +257,21 @@ def _geturl(prj, app_paths, pkg, module, clsname, fname, param_url, *,
     return fpath
 
 
+def get_json_body(req):
+    ''' parsed json body of the request.
+
+        The body is parsed at most once per request, the result is cached on
+        the request object and shared by all parameter lookups (and any user
+        code resolving values from the same request).
+    '''
+    try:
+        return getattr(req, _JSON_BODY)
+    except AttributeError:
+        content = json.loads(req.body)
+        setattr(req, _JSON_BODY, content)
+        return content
+
+
 def _resolve_final_handler_old(wrp):
     # the original handler might have been wrapped by extra decorators,
     # so we must figure out the final handler as the view
@@ -162,10 +304,48 @@ def _resolve_final_handler(wrp):
 # pylint: disable=too-few-public-methods
 
 
+class _MethodTable:
+    ''' http method dispatch table
+
+        handlers: [(methods, handler), ...], handler with empty methods
+        catches all methods.
+
+        HEAD is dispatched to the GET handler and OPTIONS is answered from
+        the table, unless they are handled explicitly.
+    '''
+
+    def __init__(self, handlers):
+        self.handlers = {}
+        self.catch_all = None
+
+        for methods, handler in handlers:
+            if not methods:
+                self.catch_all = handler
+            for method in methods:
+                self.handlers[method] = handler
+
+        if 'GET' in self.handlers:
+            self.handlers.setdefault('HEAD', self.handlers['GET'])
+
+        self.allow = ', '.join(sorted({*self.handlers, 'OPTIONS'}))
+
+    def lookup(self, method):
+        ''' handler of method, None if the request should be answered by
+            auto_response()
+        '''
+        return self.handlers.get(method, self.catch_all)
+
+    def auto_response(self, method):
+        ''' response of method without handler '''
+        response = HttpResponse() if method == 'OPTIONS' else HttpResponse(status=405)
+        response['Allow'] = self.allow
+        return response
+
+
 class _MultiHandlers:
     ''' multiple handlers sharing the same site-url '''
 
-    def __init__(self, handlers):
+    def __init__(self, handlers, url_name=None):
         '''
         handlers is a list of the following pattern:
 
@@ -174,21 +354,60 @@ class _MultiHandlers:
             (['GET',], handler2),
             ...
         ]
+
+        url_name: shared url name of the handlers, the dispatching time
+        (thread hop to sync handlers included) is recorded as its 'dispatch'
+        phase when metrics are enabled.
         '''
         super().__init__()
+        self.url_name = url_name
 
-        self._handlers = handlers
+        # any async handler makes the dispatcher async, the sync handlers
+        # are then run in thread.
+        self.is_async = any(iscoroutinefunction(handler) for _, handler in handlers)
+        if self.is_async:
+            handlers = [(methods, handler if iscoroutinefunction(handler)
+                         else sync_to_async(handler)) for methods, handler in handlers]
+            markcoroutinefunction(self)
+
+        self._table = _MethodTable(handlers)
         self.methods = {method for methods,
                         _ in handlers for method in methods}
 
     def __call__(self, req, **kwargs):
+        if metrics.enabled and self.url_name is not None:
+            if self.is_async:
+                return self._atimed_dispatch(req, kwargs)
+            return self._timed_dispatch(req, kwargs)
+        return self._dispatch(req, kwargs)
+
+    def _dispatch(self, req, kwargs):
         method = req.method.upper()
 
-        for methods, handler in self._handlers:
-            if method in methods:
-                return handler(req, **kwargs)
+        handler = self._table.lookup(method)
+        if handler is not None:
+            return handler(req, **kwargs)
+
+        if self.is_async:
+            return self._auto_response(method)
+        return self._table.auto_response(method)
+
+    def _timed_dispatch(self, req, kwargs):
+        start = time.perf_counter()
+        response = self._dispatch(req, kwargs)
+        metrics.record(self.url_name, {'dispatch': time.perf_counter() - start},
+                       response.status_code)
+        return response
 
-        return HttpResponseNotAllowed(self.methods)
+    async def _atimed_dispatch(self, req, kwargs):
+        start = time.perf_counter()
+        response = await self._dispatch(req, kwargs)
+        metrics.record(self.url_name, {'dispatch': time.perf_counter() - start},
+                       response.status_code)
+        return response
+
+    async def _auto_response(self, method):
+        return self._table.auto_response(method)
 
 
 def _check_multi_handlers(wrps):
@@ -227,91 +446,378 @@ def _process_url(orig_url, force_lowercase: bool, underscore_to_hyphen: bool):
     return orig_url
 
 
+def _qualname(wrp):
+    ''' qualified name of the api in its module '''
+    try:
+        return wrp.real_func.__qualname__
+    except AttributeError:
+        # callable object
+        return type(wrp.real_func).__qualname__
+
+
+def _prepare_wrapper(wrp, prj: str, apps: dict,
+                     trailing_slash, force_lowercase, underscore_to_hyphen, serializer,
+                     error_detail='stack', param_order=sources.DEFAULT_ORDER, module_maps=None,
+                     urlconf=None):
+    ''' makes the api ready to serve requests, resolving its site-url and the
+        mounting point (anchor) of its app.
+
+        urlconf: the urlconf module mounting the api, None if the root one.
+    '''
+    # make sure the api can be called properly
+    if wrp.cls_resolver:
+        wrp.cls = wrp.cls_resolver()
+    if wrp.func_type in (FuncType.METHOD, FuncType.CLASS_METHOD) \
+            and wrp.cls is None:
+        raise ValueError(
+            f'class of member function "{wrp.func_name}" cannot be resolved.\n'
+            'as a result the api cannot be called later!\n'
+            'please do not put the class definiation inside a function.'
+        )
+    if wrp.func_type == FuncType.METHOD:
+        wrp._instances = lifecycles.get_lifecycle(  # pylint: disable=protected-access
+            wrp.cls, wrp.lifecycle)
+    wrp.resolve_converters()
+    wrp._param_order = (  # pylint: disable=protected-access
+        param_order if wrp.param_order is None else wrp.param_order)
+    wrp.compile()
+    wrp._dumps = serializers.get_dumps(  # pylint: disable=protected-access
+        serializer if wrp.serializer is None else wrp.serializer)
+    wrp._error_detail = (  # pylint: disable=protected-access
+        error_detail if wrp.error_detail is None else wrp.error_detail)
+
+    mod_name = wrp.real_func.__module__
+    mod = sys.modules[mod_name]
+
+    if wrp.site_url is None:
+        # site_url not specified, resolve it...
+        wrp_force_lowercase = force_lowercase \
+            if wrp.force_lowercase is None else wrp.force_lowercase
+
+        wrp_underscore_to_hyphen = underscore_to_hyphen \
+            if wrp.underscore_to_hyphen is None \
+            else wrp.underscore_to_hyphen
+
+        if wrp_force_lowercase or wrp_underscore_to_hyphen:
+            wrp_url_processor = \
+                functools.partial(_process_url,
+                                  force_lowercase=wrp_force_lowercase,
+                                  underscore_to_hyphen=wrp_underscore_to_hyphen)
+        else:
+            wrp_url_processor = None
+
+        wrp.site_url = _geturl(
+            prj, apps,
+            mod.__package__,
+            mod_name,
+            '' if wrp.cls is None else wrp.cls.__name__,
+            wrp.func_name,
+            wrp.param_url(url_processor=wrp_url_processor),
+            module_maps=module_maps,
+            app_url=wrp.url,
+
+            trailing_slash=trailing_slash if wrp.trailing_slash is None
+            else wrp.trailing_slash,
+
+            url_processor=wrp_url_processor
+        )
+
+    anchor = _get_anchor(prj, apps, mod.__package__, mod_name)
+    anchor = anchor.strip('/') + '/' if anchor.strip('/') else ''
+    wrp.anchor = anchor if wrp.site_url.startswith(anchor) else ''
+    wrp.urlconf = urlconf
+
+
+def _get_handler(wrps):
+    ''' view of the wrappers sharing the same site-url '''
+    if len(wrps) == 1:  # unique handler
+        return _resolve_final_handler(wrps[0])
+
+    _check_multi_handlers(wrps)
+    return _MultiHandlers([
+        (wrp.methods, _resolve_final_handler(wrp)) for wrp in wrps
+    ], wrps[0].url_name)
+
+
+def _group_wrappers(wrps):
+    ''' wrappers grouped by site-url '''
+    grouped_wrps = {}
+    for wrp in wrps:
+        grouped_wrps.setdefault(wrp.site_url, []).append(wrp)
+    return grouped_wrps
+
+
+def _build_paths(routes, dispatch, batch=None):
+    ''' urlpatterns of routes [(site_url, anchor, url_name, is_regex, view), ...]
+
+        batch: batch view exposing the routes.
+    '''
+    groups = {}  # anchor -> paths relative to anchor
+
+    for site_url, anchor, url_name, is_regex, view in routes:
+        if batch is not None:
+            batch.add(site_url, url_name, is_regex, view)
+        xpath = django.urls.re_path if is_regex else django.urls.path
+        anchor = anchor if dispatch != 'list' else ''
+        groups.setdefault(anchor, []).append(
+            xpath(site_url[len(anchor):], view, name=url_name)
+        )
+
+    if dispatch == 'list':
+        return groups.get('', [])
+    if dispatch == 'trie':
+        return [TrieResolver(anchor, paths) for anchor, paths in groups.items()]
+    if dispatch == 'regex':
+        return [RegexResolver(anchor, paths) for anchor, paths in groups.items()]
+    raise ValueError(f"unknown url dispatching '{dispatch}'")
+
+
 def _get_all_paths(prj: str, apps: dict,
-                   trailing_slash, force_lowercase, underscore_to_hyphen):
+                   trailing_slash, force_lowercase, underscore_to_hyphen, serializer,
+                   error_detail='stack', param_order=sources.DEFAULT_ORDER,
+                   dispatch='list', batch=None, urlconf=None):
     """ get all all registered urls """
-
-    grouped_wrps = {}  # wrappers grouped by site-url
+    module_maps = _ModuleIndex(_module_maps)
     for wrp in _urls:
-        # make sure the api can be called properly
-        if wrp.cls_resolver:
-            wrp.cls = wrp.cls_resolver()
-        if wrp.func_type in (FuncType.METHOD, FuncType.CLASS_METHOD) \
-                and wrp.cls is None:
-            raise ValueError(
-                f'class of member function "{wrp.func_name}" cannot be resolved.\n'
-                'as a result the api cannot be called later!\n'
-                'please do not put the class definiation inside a function.'
-            )
-
-        if wrp.site_url is None:
-            # site_url not specified, resolve it...
-            mod_name = wrp.real_func.__module__
-            mod = sys.modules[mod_name]
-
-            wrp_force_lowercase = force_lowercase \
-                if wrp.force_lowercase is None else wrp.force_lowercase
-
-            wrp_underscore_to_hyphen = underscore_to_hyphen \
-                if wrp.underscore_to_hyphen is None \
-                else wrp.underscore_to_hyphen
-
-            if wrp_force_lowercase or wrp_underscore_to_hyphen:
-                wrp_url_processor = \
-                    functools.partial(_process_url,
-                                      force_lowercase=wrp_force_lowercase,
-                                      underscore_to_hyphen=wrp_underscore_to_hyphen)
-            else:
-                wrp_url_processor = None
+        _prepare_wrapper(wrp, prj, apps, trailing_slash,
+                         force_lowercase, underscore_to_hyphen, serializer, error_detail,
+                         param_order, module_maps, urlconf)
+
+    return _build_paths((
+        (site_url, wrps[0].anchor, wrps[0].url_name, wrps[0].has_optional_param,
+         _get_handler(wrps))
+        for site_url, wrps in _group_wrappers(_urls).items()
+    ), dispatch, batch)
+
+
+def _param_plan(wrp):
+    ''' parameters of the api, as json-serializable data '''
+    return [{
+        'name': name,
+        'type': getattr(wrp.types.get(name), '__qualname__', None),
+        'positional': name in wrp.pos_call,
+        'default': name in wrp.defaults,
+        'auto': name in wrp.param_autos,
+    } for name in wrp.names]
+
+
+def dump_routes():
+    ''' metadata of the mounted routes, for mounting apps lazily.
+
+        The metadata is plain json-serializable data:
+
+        [{
+            'site_url': 'app1/test/hello/',
+            'anchor': 'app1/',
+            'url_name': 'app1.test.hello',
+            'regex': False,  # re_path() or path()
+            'is_async': False,
+            'handlers': [{
+                'module': 'app1.test', 'qualname': 'hello', 'methods': [],
+                'func_type': 'PLAIN',
+                'params': [{'name': 'who', 'type': 'str', 'positional': True,
+                            'default': True, 'auto': False}],
+            }],
+        }, ...]
+    '''
+    routes = []
+    for site_url, wrps in _group_wrappers(
+            wrp for wrp in _urls if wrp.site_url is not None).items():
+        wrp = wrps[0]
+        routes.append({
+            'site_url': site_url,
+            'anchor': wrp.anchor,
+            'url_name': wrp.url_name,
+            'regex': wrp.has_optional_param,
+            'is_async': iscoroutinefunction(_get_handler(wrps)),
+            'handlers': [{
+                'module': x.real_func.__module__,
+                'qualname': _qualname(x),
+                'methods': sorted(x.methods),
+                'func_type': x.func_type.name,
+                'params': _param_plan(x),
+            } for x in wrps],
+        })
+    return routes
+
+
+# serializes module importing of lazy views
+_lazy_lock = threading.RLock()
+_lazy_views = []  # all lazy views mounted
+
+
+class _LazyView:
+    ''' view of a lazily mounted route, the module of the api is imported and
+        the real handler swapped in on first request.
+    '''
 
-            wrp.site_url = _geturl(
-                prj, apps,
-                mod.__package__,
-                mod_name,
-                '' if wrp.cls is None else wrp.cls.__name__,
-                wrp.func_name,
-                wrp.param_url(url_processor=wrp_url_processor),
-                app_url=wrp.url,
+    def __init__(self, route, prepare):
+        self.route = route
+        self._prepare = prepare  # prepares wrapper after importing
+        self._handler = None
+
+        if route['is_async']:
+            markcoroutinefunction(self)
+
+    def load(self):
+        ''' imports the module(s) and resolves the real handler '''
+        handler = self._handler
+        if handler is None:
+            with _lazy_lock:
+                if self._handler is None:
+                    wrps = []
+                    for entry in self.route['handlers']:
+                        importlib.import_module(entry['module'])
+                        wrp = _find_wrapper(entry['module'], entry['qualname'])
+                        wrp.site_url = self.route['site_url']
+                        self._prepare(wrp)
+                        wrps.append(wrp)
+                    self._handler = _get_handler(wrps)
+                handler = self._handler
+        return handler
 
-                trailing_slash=trailing_slash if wrp.trailing_slash is None
-                else wrp.trailing_slash,
+    def __call__(self, req, **kwargs):
+        return self.load()(req, **kwargs)
 
-                url_processor=wrp_url_processor
-            )
 
-        try:
-            wrps = grouped_wrps[wrp.site_url]
-            wrps.append(wrp)
-        except KeyError:
-            grouped_wrps[wrp.site_url] = [wrp]
+def _find_wrapper(module, qualname):
+    ''' the api wrapper registered by module '''
+    wrp = _urls.get(module, qualname)
+    if wrp is None:
+        raise LookupError(f"api '{qualname}' not found in module '{module}'")
+    return wrp
 
-    # resolve paths
-    paths = []
 
-    for site_url, wrps in grouped_wrps.items():
-        wrp = wrps[0]
-        url_name = wrp.url_name
-        xpath = django.urls.re_path if wrp.has_optional_param else django.urls.path
+def _get_lazy_paths(routes, prepare, dispatch, batch=None):
+    ''' urlpatterns of lazily loaded routes '''
+    views = [_LazyView(route, prepare) for route in routes]
+    _lazy_views.extend(views)
+
+    return _build_paths((
+        (view.route['site_url'], view.route['anchor'], view.route['url_name'],
+         view.route['regex'], view) for view in views
+    ), dispatch, batch)
+
+
+def load_all():
+    ''' loads all lazily mounted routes (before forking worker processes) '''
+    for view in _lazy_views:
+        view.load()
+
+
+def _load_apps(prj, apps):
+    ''' imports all modules of the app packages, returns the module names
+        (the packages included).
+    '''
+    # apps: if apps are not imported previously, it can be imported here.
+    # Loading apps will trigger registration of all app urls/apis.
+    #
+    # If an app does not appear explicitly in "apps" dictionary, it must be imported somewhere
+    # in order to register its apis.
+    #
+    # When app is in "apps" dictionary, it can specify the mounting point in the site / project,
+    # otherwise its mounting point will be the app's package name. (<package_name>/)
+    loaded = []
+
+    def load_package(app, path):
+        # package, loading all modules except special files (setup.py)
+        for _, name, _ in pkgutil.iter_modules(path):
+            if name not in ('setup',
+                            'manage', 'migrations', 'settings', 'asgi', 'wsgi'):
+                loaded.append(importlib.import_module('.'+name, package=app).__name__)
+
+    for app in apps:
+        if isinstance(app, str) and app != prj:  # don't load project itself
+            mod = importlib.import_module(app)
+            loaded.append(mod.__name__)
+            if hasattr(mod, '__path__'):
+                load_package(app, mod.__path__)
+    return loaded
+
+
+def _app_names(apps):
+    ''' apps keyed by package name '''
+    return {} if apps is None else {
+        (k if isinstance(k, str) else k.__name__): v for k, v in apps.items()
+    }
 
-        if len(wrps) == 1:  # unique handler
-            paths.append(
-                xpath(site_url, _resolve_final_handler(wrp), name=url_name)
-            )
-        else:
-            _check_multi_handlers(wrps)
 
-            paths.append(
-                xpath(site_url, _MultiHandlers([
-                    (wrp.methods, _resolve_final_handler(wrp)) for wrp in wrps
-                ]), name=url_name)
-            )
+def _manifest_options(apps, options):
+    ''' mounting options recorded in route manifest '''
+    serializer = options['serializer']
+    if callable(serializer):
+        serializer = f'{serializer.__module__}.{serializer.__qualname__}'
+    return {**options, 'apps': apps, 'serializer': serializer}
 
-    return paths
+
+_manifests = {}  # route manifest -> (urlconf, apps, mounting options)
+
+
+def _mounted_in(urlconf):
+    ''' urlconf recorded on the mounted apis, reverse_api() looks up the
+        include() prefix of urlconfs other than the root one.
+    '''
+    return None if urlconf == django.conf.settings.ROOT_URLCONF else urlconf
+
+
+def write_manifest(filename=None):
+    ''' writes the route manifest of mount(manifest=...) calls,
+        returns the filenames written.
+    '''
+    # the apis of lazily mounted routes might not be imported yet
+    load_all()
+
+    written = []
+    for name, (urlconf, apps, options) in _manifests.items():
+        if filename is not None and name != filename:
+            continue
+
+        prj = sys.modules[urlconf].__package__
+        # every module of the apps, an api or module_path() added to a module
+        # without routes makes the manifest stale too.
+        loaded = _load_apps(prj, apps or {})
+        apps = _app_names(apps)
+        module_maps = _ModuleIndex(_module_maps)
+        for wrp in _urls:
+            _prepare_wrapper(wrp, prj, apps, module_maps=module_maps,
+                             urlconf=_mounted_in(urlconf), **options)
+
+        _manifest.write(name, _manifest.create(
+            dump_routes(), _manifest_options(apps, options), modules=[urlconf, *loaded],
+            packages=[app for app in apps if app != prj]))
+        written.append(name)
+    return written
 
 
 def mount(apps: dict = None, *, urlconf=None, only_me=False,
-          trailing_slash=None, force_lowercase=None, underscore_to_hyphen=None):
-    """ adds all registered api/url handlers """
+          trailing_slash=None, force_lowercase=None, underscore_to_hyphen=None,
+          serializer=None, error_detail=None, dispatch=None, lazy=False, routes=None,
+          manifest=None, batch=None, param_order=None):
+    """ adds all registered api/url handlers
+
+        dispatch: 'list' adds one urlpattern per url, 'trie' adds a single
+        resolver per app anchor which matches the urls through a prefix trie,
+        'regex' adds a single resolver per app anchor which matches the urls
+        with one combined regex.
+
+        lazy: routes are mounted from the metadata (see dump_routes()) without
+        importing the apps, the module of an api is imported on the first
+        request of its routes. load_all() loads them all at once.
+
+        manifest: route manifest file (see write_manifest()), the routes are
+        mounted lazily from the manifest unless it is missing or out of date,
+        in which case the apps are discovered as usual.
+
+        error_detail: details of error responses, 'none', 'repr' or 'stack'
+        (see errors module).
+
+        batch: adds the "_batch/" endpoint running many apis in one request,
+        True runs the entries one after another, a number runs them
+        concurrently on so many threads (see batch module).
+
+        param_order: precedence of the request parts the auto parameters are
+        looked up in, the first hit wins (see sources module).
+    """
 
     urlconf = urlconf or django.conf.settings.ROOT_URLCONF
 
@@ -321,64 +827,79 @@ def mount(apps: dict = None, *, urlconf=None, only_me=False,
         force_lowercase = settings['force_lowercase']
     if underscore_to_hyphen is None:
         underscore_to_hyphen = settings['underscore_to_hyphen']
+    if serializer is None:
+        serializer = settings['serializer']
+    if error_detail is None:
+        error_detail = settings['error_detail']
+    errors.check_detail(error_detail)
+    if param_order is None:
+        param_order = settings['param_order']
+    param_order = sources.check_order(param_order)
+    if dispatch is None:
+        dispatch = settings['dispatch']
+
+    batch_view = None
+    if batch:
+        # pylint: disable=import-outside-toplevel,cyclic-import
+        from .batch import BatchView, URL as BATCH_URL, URL_NAME as BATCH_URL_NAME
+        batch_view = BatchView(None if batch is True else batch)
+
+    options = {
+        'trailing_slash': trailing_slash,
+        'force_lowercase': force_lowercase,
+        'underscore_to_hyphen': underscore_to_hyphen,
+        'serializer': serializer,
+        'error_detail': error_detail,
+        'param_order': param_order,
+    }
 
     mroot = importlib.import_module(urlconf)
     prj = mroot.__package__
-    # apps: if apps are not imported previously, it can be imported here.
-    # Loading apps will trigger registration of all app urls/apis.
-    #
-    # If an app does not appear explicitly in "apps" dictionary, it must be imported somewhere
-    # in order to register its apis.
-    #
-    # When app is in "apps" dictionary, it can specify the mounting point in the site / project,
-    # otherwise its mounting point will be the app's package name. (<package_name>/)
-    if apps:
-        if not isinstance(apps, dict):
-            raise ValueError("apps must be a dictionary!")
-
-        # import apps
-        def load_package(app, path):
-            # package, loading all modules except special files (setup.py)
-            for _, name, _ in pkgutil.iter_modules(path):
-                if name not in ('setup',
-                                'manage', 'migrations', 'settings', 'asgi', 'wsgi'):
-                    importlib.import_module('.'+name, package=app)
-
-        for app in apps:
-            if isinstance(app, str) and app != prj:  # don't load project itself
-                mod = importlib.import_module(app)
-                if hasattr(mod, '__path__'):
-                    load_package(app, mod.__path__)
-
-    apps = {} if apps is None else {
-        (k if isinstance(k, str) else k.__name__): v for k, v in apps.items()
-    }
+    mounted_in = _mounted_in(urlconf)
+
+    if apps is not None and not isinstance(apps, dict):
+        raise ValueError("apps must be a dictionary!")
+
+    if manifest is not None:
+        _manifests[manifest] = (urlconf, apps, options)
+        routes = _manifest.load(manifest, _manifest_options(_app_names(apps), options))
+        lazy = routes is not None
+        if not lazy:
+            warnings.warn(f'route manifest "{manifest}" is missing or out of date, '
+                          'discovering the apps.')
+
+    if lazy:
+        if routes is None:
+            raise ValueError("lazy mounting requires the route metadata")
+
+        paths = _get_lazy_paths(routes, functools.partial(
+            _prepare_wrapper, prj=prj, apps=_app_names(apps), urlconf=mounted_in, **options),
+            dispatch, batch_view)
+    else:
+        if apps:
+            _load_apps(prj, apps)
+
+        paths = _get_all_paths(prj, _app_names(apps), dispatch=dispatch, batch=batch_view,
+                               urlconf=mounted_in, **options)
+
+    if batch_view is not None:
+        paths.append(django.urls.path(BATCH_URL, batch_view, name=BATCH_URL_NAME))
 
     if only_me:
-        mroot.urlpatterns = _get_all_paths(prj, apps, trailing_slash,
-                                           force_lowercase, underscore_to_hyphen)
+        mroot.urlpatterns = paths
     else:
-        mroot.urlpatterns += _get_all_paths(prj, apps, trailing_slash,
-                                            force_lowercase, underscore_to_hyphen)
+        mroot.urlpatterns += paths
 
 
-class _MyJSONEncoder(DjangoJSONEncoder):
-    enable_all_fields = False  # include private fields?
+class _Unresolved(Exception):
+    ''' parameter cannot be binded from request '''
 
-    # include '_cls_' field indicating which class generates the data
-    include_cls_id = False
 
-    def default(self, o):
-        try:
-            return super().default(o)
-        except TypeError:
-            # To minimize serialized data size, only instantiated fields are saved and
-            # the fields defined in class are ignored.
-            result = dict(o.__dict__) if self.enable_all_fields else {
-                k: v for k, v in o.__dict__.items() if not k.startswith('_')}
-            if self.include_cls_id:
-                result['_cls_'] = type(o).__name__
-            return result
+def _passthrough_step(name):
+    ''' binding step of a parameter already converted by path() '''
+    def step(req, kwargs):  # pylint: disable=unused-argument
+        return kwargs[name]
+    return step
 
 # pylint: disable=too-many-instance-attributes
 
@@ -410,7 +931,11 @@ class _APIWrapper:
             self.url_name = self.real_func.__module__ + '.' + self.func_name
 
         self.url = kwargs.get('url', None)  # app-wide url
+        self._registry = None  # registry of the wrapper, keeps site-url indexed
         self.site_url = kwargs.get('site_url', None)  # site-wide url
+        self.anchor = ''  # mounting point of the app, resolved on mounting
+        # urlconf the api is mounted in, None: the root urlconf
+        self.urlconf = None
         # self.methods = {*[x.upper() for x in kwargs.get('methods', [])]}
         self.methods = {x.upper() for x in kwargs.get('methods', [])}
 
@@ -421,12 +946,39 @@ class _APIWrapper:
 
         self._is_url = is_url
 
+        # json serializer backend, None: inherits upper-level settings.
+        self.serializer = kwargs.get('serializer', None)
+        self._dumps = serializers.get_dumps(self.serializer or settings['serializer'])
+
+        # error details of response, None: inherits upper-level settings.
+        self.error_detail = kwargs.get('error_detail', None)
+        if self.error_detail is not None:
+            errors.check_detail(self.error_detail)
+        self._error_detail = self.error_detail or settings['error_detail']
+
+        # response cache backend of GET requests, None: not cached
+        self.cache = _cache.get_backend(kwargs.get('cache', None))
+        if self.cache is not None:
+            _cache.register(self)
+
+        # etag of GET responses, True: of the body, callable: version function
+        self.etag = etags.check(kwargs.get('etag', None))
+        # identical concurrent GET requests share one call
+        self.coalesce = bool(kwargs.get('coalesce', False))
+
         self.defaults = {}  # param's default value
         self.types = {}    # param's type annotation
         self.pos_call = []  # pass param by position
         self.pos_only = []  # position only param
         # param should be retrieved from body, query
         self.param_autos = kwargs.get('param_autos', ())
+        self.sources = {}  # param's declared source (sources.Query, ...)
+        # lookup order of undeclared auto params, None: inherits upper-level settings.
+        self.param_order = kwargs.get('param_order', None)
+        if self.param_order is not None:
+            self.param_order = sources.check_order(self.param_order)
+        self._param_order = self.param_order or settings['param_order']
+        self._auto_sources = sources.get_order(self._param_order)
 
         # class-based api?
         self.func_type, self.cls_resolver = get_typeinfo(self.real_func)
@@ -436,8 +988,18 @@ class _APIWrapper:
             self.func_type = FuncType.STATIC_METHOD
 
         self.cls = None  # class-based api, will get resolved later by cls_resolver
+        # instance lifecycle of METHOD api, None: inherits the class lifecycle.
+        self.lifecycle = kwargs.get('lifecycle', None)
+        self._instances = None  # lifecycle providing the instances
+
+        # async def api, django awaits the coroutine returned by __call__
+        self.is_async = is_async(self.real_func)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self._plan = None  # binding plan, compiled on mounting
 
         self._parse_signature(kwargs.get('param_types', {}))
+        self.resolve_converters()
 
     def _parse_signature(self, param_types):
         ''' parse api signaure '''
@@ -453,8 +1015,18 @@ class _APIWrapper:
             # skip fixed positional parameter (request)
             self.names = self.names[1:]
 
+        # *args and **kwargs, not bound but the unmatched view arguments are
+        # passed to **kwargs
+        self.var_names = {name for name in self.names if params[name].kind in (
+            inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)}
+        self.var_keyword = next((name for name in self.var_names
+                                 if params[name].kind == inspect.Parameter.VAR_KEYWORD), None)
+
         for name in self.names:
             param = params[name]
+            annotation, source = sources.split_annotation(param.annotation)
+            if source is not None:
+                self.sources[name] = source
 
             if (param.kind == inspect.Parameter.POSITIONAL_ONLY or
                     param.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD):
@@ -468,7 +1040,7 @@ class _APIWrapper:
 
             if value == inspect.Signature.empty:
                 # no default value
-                cls = param.annotation
+                cls = annotation
                 if cls != inspect.Signature.empty:
                     self.types[name] = cls
                 else:
@@ -478,27 +1050,68 @@ class _APIWrapper:
             else:
                 # has default value
                 self.defaults[name] = value
-                self.types[name] = type(value)
-
-    def _invoke(self, req, **kwargs):
+                # the declared type of a sourced param, not of its default
+                self.types[name] = annotation \
+                    if source is not None and annotation != inspect.Signature.empty \
+                    else type(value)
+
+        # params of declared sources are not part of the url
+        autos = [x for x in self.param_autos if x not in self.sources]
+        autos.extend(name for name, source in self.sources.items()
+                     if source.kind != 'Path')
+        self.param_autos = tuple(autos)
+
+    def _invoke(self, req, *args, **kwargs):
         """ invoke wrapped function """
 
-        # extract call_by_pos params
-        myargs = []
+        if self._is_url:
+            args = (req, *args)
 
         if self.func_type == FuncType.CLASS_METHOD:
-            myargs.append(self.cls)
+            args = (self.cls, *args)
         elif self.func_type == FuncType.METHOD:
-            myargs.append(self.cls())  # self, pylint: disable=not-callable
+            return self._call_method(args, kwargs)
+
+        return self.real_func(*args, **kwargs)
+
+    @property
+    def instances(self):
+        ''' lifecycle providing the instances of METHOD api '''
+        if self._instances is None:
+            if self.cls is None:
+                self.cls = self.cls_resolver()
+            self._instances = lifecycles.get_lifecycle(self.cls, self.lifecycle)
+        return self._instances
+
+    def _call_method(self, args, kwargs):
+        ''' calls METHOD api on an instance of its lifecycle '''
+        instances = self.instances
+        obj = instances.acquire()
+        try:
+            result = self.real_func(obj, *args, **kwargs)
+        except BaseException:
+            instances.release(obj)
+            raise
+        # a stream runs on the instance until it is consumed
+        return lifecycles.release_after(instances, obj, result)
+
+    async def _ainvoke(self, req, *args, **kwargs):
+        ''' invoke wrapped async function '''
+        if self.func_type != FuncType.METHOD:
+            return await self._invoke(req, *args, **kwargs)
 
         if self._is_url:
-            myargs.append(req)
+            args = (req, *args)
 
-        for param in self.pos_call:
-            myargs.append(kwargs[param])
-            kwargs.pop(param)
-
-        return self.real_func(*myargs, **kwargs)
+        # the instance is in use until the coroutine is done
+        instances = self.instances
+        obj = await instances.aacquire()
+        try:
+            result = await self.real_func(obj, *args, **kwargs)
+        except BaseException:
+            instances.release(obj)
+            raise
+        return lifecycles.release_after(instances, obj, result)
 
     def _type_cast(self, name, value):
         ''' cast param value to registered type '''
@@ -506,9 +1119,10 @@ class _APIWrapper:
             typ = self.types[name]
 
             if not isinstance(value, typ):
-                try:
-                    value = get_converters()[typ.__name__].to_python(value)
-                except KeyError:
+                entry = self.converters.get(name, None)
+                if entry is not None:
+                    value = entry[1].to_python(value)
+                else:
                     # no matched converter, fall back to type constructor
                     try:
                         value = typ(value)
@@ -521,57 +1135,112 @@ class _APIWrapper:
         return value
 
     def _try_resolve_param(self, req, name):
-        ''' try resolving parameter values from various sources
+        ''' try resolving parameter value from the parts of request in the
+            order of param_order, stopping at the first hit.
             return: (found, value), value make sense only if found == True
         '''
-        found = False
-        value = None
+        for source in self._auto_sources:
+            found, value = source.resolve(req, name)
+            if found:
+                return True, value
+        return False, None
+
+    def resolve_converters(self):
+        ''' resolve converters of typed parameters by the type object '''
+        self.converters = {name: converters.registry.lookup(typ)
+                           for name, typ in self.types.items()}
+        return self.converters
+
+    def _compile_cast(self, name):
+        ''' specialised type cast of a parameter, None if no cast needed '''
+        try:
+            typ = self.types[name]
+        except KeyError:
+            return None
+
+        entry = self.converters.get(name, None)
+        if entry is None:
+            # no matched converter, fall back to type constructor
+            return functools.partial(self._type_cast, name)
+        to_python = entry[1].to_python
+
+        def cast(value):
+            return value if isinstance(value, typ) else to_python(value)
+        return cast
+
+    def _compile_step(self, name):
+        ''' specialised binding step of a parameter: step(req, kwargs) -> value '''
+        cast = self._compile_cast(name)
 
         if name in self.param_autos:
-            if req.content_type == 'application/json':
-                content = json.loads(req.body)
-                if name in content:
-                    value = content[name]
-                    found = True
-            else:
-                # search in POST which is parsed from body.
-                try:
-                    value = req.POST[name]
-                    found = True
-                except KeyError:
-                    pass
+            source = self.sources.get(name)
+            # declared source only, or all parts of the request
+            resolve = self._try_resolve_param if source is None else source.resolve
+            has_default = name in self.defaults
+            default = self.defaults.get(name, None)
+
+            def lookup(req):
+                found, value = resolve(req, name)
+                if found:
+                    return value if cast is None else cast(value)
+                if has_default:
+                    return default
+                raise _Unresolved(name)
+        elif name in self.defaults:
+            default = self.defaults[name]
+
+            def lookup(req):  # pylint: disable=unused-argument
+                return default
+        else:
+            def lookup(req):  # pylint: disable=unused-argument
+                raise _Unresolved(name)
 
-                # search in GET which is parsed from query-string.
+        if cast is None:
+            def step(req, kwargs):
                 try:
-                    value = req.GET[name]
-                    found = True
+                    return kwargs[name]
                 except KeyError:
-                    pass
-
-                # search in cookie
+                    return lookup(req)
+        else:
+            def step(req, kwargs):
                 try:
-                    # value = req.get_signed_cookie(x)
-                    value = req.COOKIES[name]
-                    found = True
+                    value = kwargs[name]
                 except KeyError:
-                    pass
+                    return lookup(req)
+                return cast(value)
+        return step
 
-                # search session
-                if hasattr(req, 'session'):
-                    try:
-                        value = req.session[name]
-                        found = True
-                    except KeyError:
-                        pass
-
-        if not found:
-            if name in self.defaults:
-                value = self.defaults[name]
-                found = True
-        else:
-            value = self._type_cast(name, value)
+    def compile(self):
+        ''' compile the parsed signature into a fixed binding plan.
 
-        return (found, value)
+            The plan is a pair of ordered step lists (positional, keyword),
+            each step has its converter, default value and source resolved,
+            so the request path only needs to run the steps.
+        '''
+        self._auto_sources = sources.get_order(self._param_order)
+        if self.has_optional_param or self.param_autos:
+            # re_path() does not cope with type conversion so we have to do it manually
+            # non-empty param_autos means some params needed to be retrieved
+            # from other parts of request
+            steps = [(name, self._compile_step(name)) for name in self.names
+                     if name not in self.var_names]
+        else:
+            # path() has done type conversion so just pass them directly to wrapped function,
+            # except for typed params without converter.
+            steps = [(name, _passthrough_step(name) if self.converters.get(name, True)
+                      else self._compile_step(name)) for name in self.names
+                     if name not in self.var_names]
+
+        # may the binding read the session? (async apis load it beforehand)
+        self._reads_session = any(
+            self.sources[name].kind == 'Session' if name in self.sources
+            else sources.Session in self._auto_sources for name in self.param_autos)
+        self._bound_names = frozenset(name for name, step in steps)
+        self._plan = (
+            tuple(step for name, step in steps if name in self.pos_call),
+            tuple((name, step) for name, step in steps if name not in self.pos_call),
+        )
+        return self._plan
 
     def call(self, *args, **kwargs):
         """ call wrapped function as usual """
@@ -581,59 +1250,319 @@ class _APIWrapper:
             return self.real_func(self.cls, *args, **kwargs)
 
         assert self.func_type == FuncType.METHOD
-        # pylint: disable=not-callable
-        return self.real_func(self.cls(), *args, **kwargs)
+        return self._call_method(args, kwargs)
+
+    def _prepare(self, req, kwargs):
+        ''' check request and bind call arguments.
+
+            returns (response, args, kwargs), response is not None if the
+            request is rejected.
+        '''
+        # check the method permission
+        method = req.method.upper()
+        if self._method_table.lookup(method) is None:
+            return self._method_table.auto_response(method), None, None
+
+        pos_steps, kw_steps = self._plan or self.compile()
+        try:
+            args = [step(req, kwargs) for step in pos_steps]
+            mykwargs = {name: step(req, kwargs) for name, step in kw_steps}
+        except _Unresolved as ex:
+            # param cannot be binded from inputs
+            return HttpResponseBadRequest(f'parameter ({ex}) cannot be resolved'), None, None
+
+        if self.var_keyword is not None:
+            bound = self._bound_names
+            mykwargs.update((name, value) for name, value in kwargs.items()
+                            if name not in bound)
+
+        return None, args, mykwargs
+
+    async def _aprepare(self, req, kwargs):
+        ''' _prepare() of async api, loading the session without blocking the
+            event loop if the binding reaches it.
+        '''
+        if self._plan is None:
+            self.compile()
+        if not self._reads_session:
+            return self._prepare(req, kwargs)
+
+        setattr(req, sources.ASYNC_SESSION, False)
+        try:
+            try:
+                return self._prepare(req, kwargs)
+            except sources.SessionPending as ex:
+                await req.session.aget(ex.key)  # loads and caches the session data
+                setattr(req, sources.ASYNC_SESSION, True)
+                return self._prepare(req, kwargs)
+        finally:
+            delattr(req, sources.ASYNC_SESSION)
+
+    def _make_response(self, req, result):
+        ''' response of api result '''
+        if isinstance(result, HttpResponseBase):
+            return result
+
+        if req.method == 'HEAD':
+            # body is never sent, skip the serialization
+            close = getattr(result, 'close', None)
+            if close is not None and serializers.is_stream(result):
+                close()
+            return HttpResponse(content_type='application/json')
+
+        if serializers.is_stream(result):
+            return StreamingHttpResponse(
+                serializers.stream_envelope(result, self._dumps, self._error_info),
+                content_type='application/json')
+
+        if serializers.is_async_stream(result):
+            return StreamingHttpResponse(
+                serializers.astream_envelope(result, self._dumps, self._error_info),
+                content_type='application/json')
+
+        return self._json_response({
+            'error': None,
+            'result': result,
+        })
+
+    def _error_response(self, ex):
+        ''' response of exception raised in request handling '''
+        registered = errors.lookup(type(ex))
+        if registered is not None:
+            return registered.response()
+
+        return self._json_response({
+            **self._error_info(ex),
+
+            'result': None,
+        })
 
     def __call__(self, req, **kwargs):
         """ entry point of request handling called by diango.
             * args is never used by diango when calling, all parameters are
             passed via keyword-values.
+
+            For async api a coroutine is returned.
         """
+        if self.is_async:
+            return self._acall(req, kwargs)
+        if metrics.enabled:
+            return self._timed_call(req, kwargs)
+
         try:
-            # check the method permission
-            if self.methods and req.method.upper() not in self.methods:
-                return HttpResponseNotAllowed(self.methods)
-
-            if self.has_optional_param or self.param_autos:
-                # re_path() does not cope with type conversion so we have to do it manually
-                # non-empty param_autos means some params needed to be retrieved
-                # from other parts of request
-                mykwargs = {**kwargs}
-
-                for name in self.names:
-                    if name in mykwargs:
-                        # param provided by caller
-                        mykwargs[name] = self._type_cast(name, mykwargs[name])
-                    else:
-                        # param not provided by caller
-                        found, value = self._try_resolve_param(req, name)
-                        if found:
-                            mykwargs[name] = value
-                        else:
-                            # param cannot be binded from inputs
-                            return HttpResponseBadRequest(f'parameter ({name}) cannot be resolved')
-
-                result = self._invoke(req, **mykwargs)
+            response, args, mykwargs = self._prepare(req, kwargs)
+            if response is None:
+                if self._is_special(req):
+                    response = self._special_call(req, args, mykwargs)
+                else:
+                    response = self._make_response(req, self._invoke(req, *args, **mykwargs))
+            return response
+        except Exception as ex:  # pylint: disable=broad-except
+            return self._error_response(ex)
 
-            else:
-                # path() has done type conversion so just pass them directly to wrapped function
-                result = self._invoke(req, **kwargs)
+    async def _acall(self, req, kwargs):
+        ''' request handling of async api, awaited in the event loop without thread hop '''
+        if metrics.enabled:
+            return await self._atimed_call(req, kwargs)
 
-            if isinstance(result, HttpResponseBase):
-                return result
+        try:
+            response, args, mykwargs = await self._aprepare(req, kwargs)
+            if response is None:
+                if self._is_special(req):
+                    response = await self._aspecial_call(req, args, mykwargs)
+                else:
+                    response = self._make_response(
+                        req, await self._ainvoke(req, *args, **mykwargs))
+            return response
+        except Exception as ex:  # pylint: disable=broad-except
+            return self._error_response(ex)
 
-            return JsonResponse({
-                'error': None,
-                'result': result,
-            }, safe=False, encoder=_MyJSONEncoder)
+    def _timed_call(self, req, kwargs):
+        ''' __call__() recording the phase timings '''
+        timer = metrics.Timer(self.url_name)
+        try:
+            response, args, mykwargs = self._prepare(req, kwargs)
+            timer.lap('bind')
+            if response is None:
+                if self._is_special(req):
+                    response = self._special_call(req, args, mykwargs)
+                    timer.lap('call')
+                else:
+                    result = self._invoke(req, *args, **mykwargs)
+                    timer.lap('call')
+                    response = self._make_response(req, result)
+                    timer.lap('serialize')
         except Exception as ex:  # pylint: disable=broad-except
-            ex_info = sys.exc_info()
-            return JsonResponse({
-                'error': repr(ex),
-                'stack': traceback.format_exception(*ex_info),
+            response = self._error_response(ex)
+        timer.done(response)
+        return response
+
+    async def _atimed_call(self, req, kwargs):
+        ''' _timed_call() of async api '''
+        timer = metrics.Timer(self.url_name)
+        try:
+            response, args, mykwargs = await self._aprepare(req, kwargs)
+            timer.lap('bind')
+            if response is None:
+                if self._is_special(req):
+                    response = await self._aspecial_call(req, args, mykwargs)
+                    timer.lap('call')
+                else:
+                    result = await self._ainvoke(req, *args, **mykwargs)
+                    timer.lap('call')
+                    response = self._make_response(req, result)
+                    timer.lap('serialize')
+        except Exception as ex:  # pylint: disable=broad-except
+            response = self._error_response(ex)
+        timer.done(response)
+        return response
+
+    def _is_special(self, req):
+        ''' GET/HEAD request going through the etag, cache or coalescing? '''
+        return req.method in etags.SAFE_METHODS and (
+            self.etag is not None or self.cache is not None or self.coalesce)
+
+    def _special_call(self, req, args, kwargs):
+        ''' response of GET/HEAD request with etag, cache or coalescing '''
+        if self.etag is not None:
+            return self._conditional_call(req, args, kwargs)
+        if self.cache is not None:
+            return self._cached_call(req, args, kwargs)
+        return self._respond(req, args, kwargs)[0]
+
+    async def _aspecial_call(self, req, args, kwargs):
+        ''' _special_call() of async api '''
+        if self.etag is not None:
+            return await self._aconditional_call(req, args, kwargs)
+        if self.cache is not None:
+            return await self._acached_call(req, args, kwargs)
+        return (await self._arespond(req, args, kwargs))[0]
+
+    @property
+    def cache_namespace(self):
+        ''' prefix of the cache keys of api '''
+        return self.site_url or self.url_name
+
+    @staticmethod
+    def _cached_response(req, body):
+        return HttpResponse(b'' if req.method == 'HEAD' else body,
+                            content_type='application/json')
+
+    def _respond_once(self, req, args, kwargs):
+        ''' (response, body) of api call, body is the serialized result, None
+            if the response is not serialized by the wrapper.
+        '''
+        result = self._invoke(req, *args, **kwargs)
+        response = self._make_response(req, result)
+        if isinstance(result, HttpResponseBase) or response.streaming:
+            return response, None
+        return response, response.content
+
+    async def _arespond_once(self, req, args, kwargs):
+        ''' _respond_once() of async api '''
+        result = await self._ainvoke(req, *args, **kwargs)
+        response = self._make_response(req, result)
+        if isinstance(result, HttpResponseBase) or response.streaming:
+            return response, None
+        return response, response.content
+
+    def _respond(self, req, args, kwargs):
+        ''' (response, body) of GET/HEAD request, coalesced if enabled '''
+        if not self.coalesce:
+            return self._respond_once(req, args, kwargs)
+
+        response, body = coalesce.flights.run(
+            coalesce.make_key(self, req.method, args, kwargs),
+            functools.partial(self._respond_once, req, args, kwargs))
+        if response is None:
+            response = self._cached_response(req, body)
+        return response, body
+
+    async def _arespond(self, req, args, kwargs):
+        ''' _respond() of async api '''
+        if not self.coalesce:
+            return await self._arespond_once(req, args, kwargs)
+
+        response, body = await coalesce.flights.arun(
+            coalesce.make_key(self, req.method, args, kwargs),
+            functools.partial(self._arespond_once, req, args, kwargs))
+        if response is None:
+            response = self._cached_response(req, body)
+        return response, body
+
+    def _cached_call(self, req, args, kwargs):
+        ''' response of GET/HEAD request served from cache, caching it on miss '''
+        namespace = self.cache_namespace
+        key = _cache.make_key(namespace, req.method, args, kwargs)
+        body = self.cache.get(namespace, key)
+        if body is not None:
+            return self._cached_response(req, body)
+
+        response, body = self._respond(req, args, kwargs)
+        if body is not None and req.method == 'GET':
+            self.cache.set(namespace, key, body)
+        return response
+
+    async def _acached_call(self, req, args, kwargs):
+        ''' _cached_call() of async api '''
+        namespace = self.cache_namespace
+        key = _cache.make_key(namespace, req.method, args, kwargs)
+        body = await self.cache.aget(namespace, key)
+        if body is not None:
+            return self._cached_response(req, body)
+
+        response, body = await self._arespond(req, args, kwargs)
+        if body is not None and req.method == 'GET':
+            await self.cache.aset(namespace, key, body)
+        return response
+
+    def _conditional_call(self, req, args, kwargs):
+        ''' response of GET/HEAD request tagged with etag, 304 if the client
+            has it already.
+        '''
+        etag = None
+        if self.etag is not True:
+            # version function, skips the api if not modified
+            etag = etags.version_etag(self.etag(*args, **kwargs))
+            if etags.matches(req, etag):
+                return etags.not_modified(etag)
+        elif req.method == 'HEAD':
+            # etag of the GET body
+            return etags.head_of(self._conditional_call(etags.as_get(req), args, kwargs))
+
+        if self.cache is not None:
+            response = self._cached_call(req, args, kwargs)
+        else:
+            response = self._respond(req, args, kwargs)[0]
+        return etags.tag(req, response, etag)
+
+    async def _aconditional_call(self, req, args, kwargs):
+        ''' _conditional_call() of async api, the version function can be async '''
+        etag = None
+        if self.etag is not True:
+            version = self.etag(*args, **kwargs)
+            if inspect.isawaitable(version):
+                version = await version
+            etag = etags.version_etag(version)
+            if etags.matches(req, etag):
+                return etags.not_modified(etag)
+        elif req.method == 'HEAD':
+            return etags.head_of(
+                await self._aconditional_call(etags.as_get(req), args, kwargs))
+
+        if self.cache is not None:
+            response = await self._acached_call(req, args, kwargs)
+        else:
+            response = (await self._arespond(req, args, kwargs))[0]
+        return etags.tag(req, response, etag)
+
+    def _error_info(self, ex):
+        ''' error fields of the response envelope '''
+        return errors.error_info(ex, self._error_detail)
 
-                'result': None,
-            }, safe=False, encoder=_MyJSONEncoder)
+    def _json_response(self, data):
+        ''' serialize data to json response '''
+        return HttpResponse(self._dumps(data), content_type='application/json')
 
     def param_url(self, *, url_processor=None):
         """ param-based url.
@@ -653,13 +1582,9 @@ class _APIWrapper:
             def get_one_url(param):
                 regex = '[^/]+'
 
-                if param in self.types:
-                    typ = self.types[param].__name__
-                    try:
-                        regex = get_converters()[typ].regex
-                    except KeyError:
-                        # unregistered converter
-                        pass
+                entry = self.converters.get(param, None)
+                if entry is not None:
+                    regex = entry[1].regex
 
                 param_mapped = process_param(param)
 
@@ -677,10 +1602,8 @@ class _APIWrapper:
         else:
             # no optional parameter, use path()
             def get_one_url(param):
-                try:
-                    typ = self.types[param].__name__ + ':'
-                except KeyError:
-                    typ = ''
+                entry = self.converters.get(param, None)
+                typ = '' if entry is None else entry[0] + ':'
 
                 param_mapped = process_param(param)
 
@@ -689,6 +1612,27 @@ class _APIWrapper:
 
         return ''.join([get_one_url(x) for x in self.names if x not in self.param_autos])
 
+    @property
+    def methods(self):
+        ''' allowed http methods, empty for all methods '''
+        return self._methods
+
+    @methods.setter
+    def methods(self, methods):
+        self._methods = methods
+        self._method_table = _MethodTable([(methods, self)])
+
+    @property
+    def site_url(self):
+        ''' site-wide url, resolved on mounting if not specified '''
+        return self._site_url
+
+    @site_url.setter
+    def site_url(self, site_url):
+        old, self._site_url = getattr(self, '_site_url', None), site_url
+        if self._registry is not None:
+            self._registry._site_url_changed(self, old)  # pylint: disable=protected-access
+
     @ property
     def has_optional_param(self):
         """ if the handler has any optional parameter?
@@ -701,19 +1645,34 @@ class _APIWrapper:
 
 def get_wrapper(func):
     ''' [INTERNAL] get the APIWrapper instance from wrapped function '''
-    if isinstance(func, _APIWrapper):
-        return func
-
-    name = func.__name__ if hasattr(
-        func, '__name__') else func.__class__.__name__
-    module = func.__module__
-
-    for wrp in _urls:
-        if wrp.__module__ == module and wrp.__name__ == name:
-            return wrp
+    # the wrapper itself, the function it wraps, or an outer decorator
+    # applied with marked decorators
+    cur = func
+    while cur is not None:
+        if isinstance(cur, _APIWrapper):
+            return cur
+        if not marker.is_marked(cur):
+            break
+        cur = marker.mark_wrapped(cur)
+
+    if marker.is_marked(func):
+        info = marker.mark_wrapper(func)
+        if info is not None and isinstance(info[0], _APIWrapper):
+            return info[0]
+
+    # bound methods
+    func = getattr(func, '__func__', func)
+    try:
+        qualname = func.__qualname__
+    except AttributeError:
+        # callable object
+        qualname = type(func).__qualname__
 
-    raise ValueError(
-        'wrapper cannot be resolved, is it wrapped with @api/@url?')
+    wrp = _urls.get(func.__module__, qualname)
+    if wrp is None:
+        raise ValueError(
+            'wrapper cannot be resolved, is it wrapped with @api/@url?')
+    return wrp
 
 
 class APIResult:
@@ -725,7 +1684,9 @@ class APIResult:
     def __init__(self, response):
         self.status_code = response.status_code
         if self.status_code != 404:
-            self._r = json.loads(response.content)
+            content = b''.join(response.streaming_content) if response.streaming \
+                else response.content
+            self._r = json.loads(content)
         else:
             self._r = None
 
@@ -86,6 +86,15 @@ class FuncType(enum.IntEnum):
     CLASS_CALLABLE = 4  # A class-based callable object
 
 
+def is_async(func):
+    ''' func is a coroutine function (async def), or a callable object with
+        coroutine __call__?
+    '''
+    if _is_class_object(func) and not isinstance(func, functools.partial):
+        func = type(func).__call__
+    return inspect.iscoroutinefunction(func)
+
+
 def get_typeinfo(func):
     ''' get function type info
        returns (FuncType, None or function to resolve class object)
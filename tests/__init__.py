@@ -0,0 +1,22 @@
+''' shared helpers of the tests '''
+
+import asyncio
+
+from django.test import RequestFactory
+
+
+def call(handler, method='get', path='/', *, data=None, content_type=None, headers=None,
+         run=True, **kwargs):
+    ''' response of handler (api or view) to a request, kwargs are the view
+        arguments.
+
+        data: query (GET) or body of the request, headers: http headers of the
+        request, run: the coroutine of an async handler is run to completion,
+        returned otherwise.
+    '''
+    extra = {} if content_type is None else {'content_type': content_type}
+    req = getattr(RequestFactory(), method)(path, data=data, headers=headers, **extra)
+    response = handler(req, **kwargs)
+    if run and asyncio.iscoroutine(response):
+        response = asyncio.run(response)
+    return response
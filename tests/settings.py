@@ -1,5 +1,6 @@
 import django.conf
 import os
+import tempfile
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', __name__)
 #django.conf.settings.configure(ROOT_URLCONF=__name__)
@@ -29,4 +30,12 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
   #  'polls.apps.PollsConfig'
 ]
-"""
\ No newline at end of file
+"""
+# database backed sessions of the async binding tests
+INSTALLED_APPS = ['django.contrib.sessions']
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(tempfile.mkdtemp(prefix='urlman-tests'), 'db.sqlite3'),
+    }
+}
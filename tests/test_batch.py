@@ -0,0 +1,141 @@
+import json
+import asyncio
+import threading
+
+import pytest
+
+from django_urlman import api, get_wrapper, GET, POST
+from django_urlman.batch import BatchView, MAX_ENTRIES
+from django_urlman.urlman import _MultiHandlers
+
+from . import settings, call
+
+threads = set()
+
+
+@api(param_autos=('detail',))
+def batch_user(uid: int, detail: bool = False):
+    threads.add(threading.get_ident())
+    return {'uid': uid, 'detail': detail}
+
+
+@api(param_autos=('limit',))
+async def batch_orders(uid: int, limit: int = 2):
+    await asyncio.sleep(0)
+    return list(range(limit))
+
+
+@api
+def batch_failing():
+    raise ValueError('boom')
+
+
+@GET
+@api(param_autos=('name',))
+def batch_doc(name):
+    return name
+
+
+@POST
+@api(param_autos=('name', 'tags'))
+def batch_save_doc(name, tags):
+    return [name, tags]
+
+
+def make_view(workers=None):
+    view = BatchView(workers)
+    view.add('batch/user/<int:uid>/', 'batch.user', False, get_wrapper(batch_user))
+    view.add('batch/orders/<int:uid>/', 'batch.orders', False, get_wrapper(batch_orders))
+    view.add('batch/failing/', 'batch.failing', False, get_wrapper(batch_failing))
+    view.add('batch/doc/', 'batch.doc', False, _MultiHandlers([
+        (['GET'], get_wrapper(batch_doc)), (['POST'], get_wrapper(batch_save_doc))]))
+    return view
+
+
+def post(view, entries):
+    return call(view, 'post', '/_batch/', data=json.dumps(entries),
+                content_type='application/json')
+
+
+ENTRIES = [
+    {'site_url': 'batch/user/<int:uid>/', 'params': {'uid': 3, 'detail': True}},
+    {'url_name': 'batch.orders', 'params': {'uid': 3, 'limit': 3}},
+    {'url_name': 'batch.failing'},
+    {'url_name': 'batch.doc', 'params': {'name': 'readme'}},
+    {'url_name': 'batch.doc', 'method': 'post', 'params': {'name': 'a', 'tags': [1, 2]}},
+    {'url_name': 'batch.doc', 'method': 'put'},
+    {'url_name': 'batch.missing'},
+    {'url_name': 'batch.user', 'params': {'uid': 'x'}},
+]
+
+
+@pytest.mark.parametrize('workers', [None, 4])
+def test_batch(workers):
+    response = post(make_view(workers), ENTRIES)
+    assert response.status_code == 200
+    envelopes = json.loads(response.content)
+    assert len(envelopes) == len(ENTRIES)
+
+    assert envelopes[0] == {'error': None, 'result': {'uid': 3, 'detail': True}}
+    assert envelopes[1] == {'error': None, 'result': [0, 1, 2]}
+    assert envelopes[2]['error'] == "ValueError('boom')"
+    assert envelopes[3] == {'error': None, 'result': 'readme'}
+    assert envelopes[4] == {'error': None, 'result': ['a', [1, 2]]}
+    assert envelopes[5] == {'error': 'Method Not Allowed', 'result': None}
+    assert envelopes[6] == {'error': 'api not found', 'result': None}
+    assert envelopes[7]['error'].startswith("invalid path parameter 'uid'")
+
+
+def test_thread_pool():
+    threads.clear()
+    view = make_view(2)
+    post(view, [ENTRIES[0]] * 8)
+    assert 1 <= len(threads) <= 2
+    assert threading.get_ident() not in threads
+
+
+def test_pooled_connections(monkeypatch):
+    from django_urlman import batch
+
+    calls = []
+    monkeypatch.setattr(batch, 'close_old_connections', lambda: calls.append(1))
+    post(make_view(2), [ENTRIES[0]] * 3 + [ENTRIES[1]])
+    # before and after each sync entry on the pool, async entries run in the loop
+    assert len(calls) == 6
+
+
+def test_invalid_batch():
+    view = make_view()
+    assert call(view, path='/_batch/').status_code == 405
+    assert post(view, {'url_name': 'batch.user'}).status_code == 400
+    assert post(view, [ENTRIES[0]] * (MAX_ENTRIES + 1)).status_code == 400
+
+    with pytest.raises(ValueError):
+        BatchView(0)
+
+
+def test_mount():
+    import django.urls
+    from django.test import Client
+    from django_urlman import mount, urlman
+
+    wrp = get_wrapper(batch_user)
+    saved = wrp.site_url, wrp.anchor
+    route = {
+        'site_url': 'batch/user/<int:uid>/', 'anchor': '', 'url_name': 'batch.user',
+        'regex': False, 'is_async': False,
+        'handlers': [{'module': __name__, 'qualname': 'batch_user', 'methods': [],
+                      'func_type': 'PLAIN', 'params': []}],
+    }
+    try:
+        mount(lazy=True, routes=[route], batch=True, only_me=True)
+        assert django.urls.reverse('urlman.batch') == '/_batch/'
+
+        response = Client().post('/_batch/', data=[ENTRIES[0]],
+                                 content_type='application/json')
+        assert response.json() == [{'error': None, 'result': {'uid': 3, 'detail': True}}]
+    finally:
+        wrp.site_url, wrp.anchor = saved
+        urlman._lazy_views.clear()
+        settings.urlpatterns = []
+        django.urls.clear_url_caches()
@@ -0,0 +1,136 @@
+import json
+import time
+
+import pytest
+
+from django_urlman import (api, get_wrapper, LRUCache, DjangoCache,
+                           invalidate_cache, invalidate_cache_prefix, cache_stats)
+
+from . import settings, call
+
+calls = []
+
+
+@api(cache=True)
+def cached_square(n: int):
+    calls.append(n)
+    return n * n
+
+
+@api(cache=LRUCache(ttl=0.05))
+def cached_expiring(n: int):
+    calls.append(n)
+    return n
+
+
+@api(cache=True)
+def cached_failing(n: int):
+    calls.append(n)
+    raise ValueError(n)
+
+
+@api(cache=True)
+async def cached_async(n: int):
+    calls.append(n)
+    return -n
+
+
+@api(cache=DjangoCache(timeout=60))
+def cached_shared(n: int):
+    calls.append(n)
+    return n + 1
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    calls.clear()
+    yield
+    for func in (cached_square, cached_expiring, cached_failing, cached_async, cached_shared):
+        invalidate_cache(func)
+
+
+def test_hits():
+    for _ in range(3):
+        response = call(cached_square, n=3)
+        assert json.loads(response.content) == {'error': None, 'result': 9}
+        assert response['Content-Type'] == 'application/json'
+    assert calls == [3]
+
+    call(cached_square, n=4)
+    assert calls == [3, 4]
+    assert cache_stats(cached_square)[0] >= 2
+
+    # HEAD is served from the cache of GET
+    response = call(cached_square, 'head', n=3)
+    assert response.status_code == 200 and response.content == b''
+    assert calls == [3, 4]
+
+    # unsafe methods are never cached
+    call(cached_square, 'post', n=3)
+    call(cached_square, 'post', n=3)
+    assert calls == [3, 4, 3, 3]
+
+
+def test_invalidate():
+    call(cached_square, n=3)
+    call(cached_square, n=4)
+    invalidate_cache(cached_square)
+    call(cached_square, n=3)
+    assert calls == [3, 4, 3]
+
+    call(cached_square, n=4)
+    invalidate_cache_prefix(get_wrapper(cached_square).cache_namespace + '|GET|[3]')
+    call(cached_square, n=3)
+    call(cached_square, n=4)
+    assert calls == [3, 4, 3, 4, 3]
+
+
+def test_expiry():
+    call(cached_expiring, n=1)
+    call(cached_expiring, n=1)
+    time.sleep(0.06)
+    call(cached_expiring, n=1)
+    assert calls == [1, 1]
+
+
+def test_errors_not_cached():
+    for _ in range(2):
+        assert json.loads(call(cached_failing, n=1).content)['error']
+    assert calls == [1, 1]
+
+
+def test_async():
+    for _ in range(2):
+        assert json.loads(call(cached_async, n=2).content) == {'error': None, 'result': -2}
+    assert calls == [2]
+
+
+def test_django_cache():
+    for _ in range(2):
+        assert json.loads(call(cached_shared, n=1).content) == {'error': None, 'result': 2}
+    assert calls == [1]
+
+    invalidate_cache(cached_shared)
+    call(cached_shared, n=1)
+    assert calls == [1, 1]
+
+
+def test_eviction():
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 'a|1', b'1')
+    cache.set('a', 'a|2', b'2')
+    assert cache.get('a', 'a|1') == b'1'
+    cache.set('a', 'a|3', b'3')  # evicts a|2, the least recently used
+    assert cache.get('a', 'a|2') is None
+    assert cache.get('a', 'a|1') == b'1' and len(cache) == 2
+
+    cache = LRUCache(max_bytes=4)
+    cache.set('a', 'a|1', b'12')
+    cache.set('a', 'a|2', b'34')
+    cache.set('a', 'a|3', b'5')
+    assert cache.get('a', 'a|1') is None and len(cache) == 2
+    cache.set('a', 'a|4', b'too large')
+    assert cache.get('a', 'a|4') is None
+
+    with pytest.raises(ValueError):
+        api(cache='yes')(lambda: None)
@@ -0,0 +1,98 @@
+import json
+import time
+import asyncio
+import threading
+
+import pytest
+
+from django_urlman import api
+from django_urlman.coalesce import flights
+
+from . import settings, call
+
+calls = []
+release = threading.Event()
+
+
+@api(coalesce=True)
+def slow_report(n: int):
+    calls.append(n)
+    release.wait(5)
+    return n * 10
+
+
+@api(coalesce=True)
+def slow_failing(n: int):
+    calls.append(n)
+    release.wait(5)
+    raise ValueError(n)
+
+
+@api(coalesce=True)
+async def aslow_report(n: int):
+    calls.append(n)
+    await asyncio.sleep(0.05)
+    return n * 100
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    calls.clear()
+    release.clear()
+    yield
+    release.set()
+
+
+def concurrently(func, count, **kwargs):
+    ''' responses of count concurrent calls, released when all are waiting '''
+    responses = [None] * count
+
+    def run(i):
+        responses[i] = call(func, **kwargs)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    while not calls:
+        time.sleep(0.001)
+    time.sleep(0.05)  # the others join the flight
+    release.set()
+    for thread in threads:
+        thread.join()
+    return responses
+
+
+def test_threads():
+    responses = concurrently(slow_report, 8, n=3)
+    assert calls == [3]
+    assert all(json.loads(x.content) == {'error': None, 'result': 30} for x in responses)
+    assert len(flights) == 0
+
+    # landed, the next call runs again
+    call(slow_report, n=3)
+    assert calls == [3, 3]
+
+
+def test_errors_shared():
+    responses = concurrently(slow_failing, 4, n=1)
+    assert calls == [1]
+    assert all(json.loads(x.content)['error'] == 'ValueError(1)' for x in responses)
+    assert len(flights) == 0
+
+
+def test_asyncio():
+    async def main():
+        return await asyncio.gather(*(call(aslow_report, n=2, run=False) for _ in range(8)),
+                                    call(aslow_report, n=3, run=False))
+
+    responses = asyncio.run(main())
+    assert sorted(calls) == [2, 3]
+    assert [json.loads(x.content)['result'] for x in responses] == [200] * 8 + [300]
+    assert len(flights) == 0
+
+
+def test_unsafe_methods():
+    release.set()
+    call(slow_report, 'post', n=1)
+    call(slow_report, 'post', n=1)
+    assert calls == [1, 1]
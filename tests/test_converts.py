@@ -1,6 +1,8 @@
 from django_urlman.converters import *
 import re
 
+import pytest
+
 def test_float():
     flt = FloatConverter()
 
@@ -18,3 +20,68 @@ def test_bool():
     assert flt.to_python('1')
     assert not flt.to_python('False')
     assert not flt.to_python('0')
+
+
+def test_builtins():
+    import datetime
+    import decimal
+    import uuid
+
+    assert registry.lookup(int)[0] == 'int'
+    assert registry.lookup(uuid.UUID)[0] == 'uuid'
+    assert registry.lookup(decimal.Decimal)[1].to_python('1.5') == decimal.Decimal('1.5')
+    assert registry.lookup(datetime.date)[1].to_python('2020-01-02') == datetime.date(2020, 1, 2)
+
+    dtc = registry.lookup(datetime.datetime)[1]
+    for s in ('2020-01-02T03:04', '2020-01-02T03:04:05.123Z', '2020-01-02T03:04:05+08:00'):
+        assert re.fullmatch(dtc.regex, s)
+    assert dtc.to_python('2020-01-02T03:04:05Z') == datetime.datetime(
+        2020, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+
+
+def test_lookup_by_identity():
+    import django.urls
+
+    class Decimal:  # pylint: disable=too-few-public-methods
+        ''' unrelated class sharing the name of decimal.Decimal '''
+
+    class Money:  # pylint: disable=too-few-public-methods
+        ''' type with a django converter registered by its name '''
+
+    assert registry.lookup(Decimal) is None
+    assert registry.lookup(Money) is None
+
+    # the registry invalidates itself on django's registration
+    django.urls.register_converter(FloatConverter, 'Money')
+    assert registry.lookup(Money)[0] == 'Money'
+
+    class Date:  # pylint: disable=too-few-public-methods
+        ''' another date type '''
+
+    class MyDateConverter(DateConverter):
+        ''' converter of Date '''
+
+    register_converter(MyDateConverter, Date, 'mydate')
+    assert registry.lookup(Date)[0] == 'mydate'
+    assert isinstance(registry.lookup(Date)[1], MyDateConverter)
+
+    with pytest.raises(ValueError):
+        register_converter(MyDateConverter, Date, 'date')
+
+
+def test_builtin_names():
+    import datetime
+    import django.urls
+    from django_urlman.converters import _register_builtin
+
+    assert isinstance(get_converters()['date'], DateConverter)
+
+    class Day:  # pylint: disable=too-few-public-methods
+        ''' date type of a converter name taken by the project '''
+
+    # the project's converter is kept, the built-in one gets its own name
+    django.urls.register_converter(FloatConverter, 'day')
+    _register_builtin(DateConverter, Day, 'day')
+    assert isinstance(get_converters()['day'], FloatConverter)
+    assert registry.lookup(Day)[0] == 'urlman_day'
+    assert registry.lookup(Day)[1].to_python('2020-01-02') == datetime.date(2020, 1, 2)
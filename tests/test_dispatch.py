@@ -0,0 +1,82 @@
+''' test dispatch.py '''
+
+import pytest
+
+from django.urls import path, re_path, register_converter
+from django.urls.resolvers import URLResolver, RegexPattern, RoutePattern, Resolver404
+
+from django_urlman.dispatch import TrieResolver, RegexResolver
+
+from . import settings  # pylint: disable=unused-import
+
+
+class EvenConverter:
+    ''' even number, odd numbers fail in to_python() '''
+    regex = '[0-9]+'
+
+    def to_python(self, value):
+        if int(value) % 2:
+            raise ValueError('odd number')
+        return int(value)
+
+    def to_url(self, value):
+        return str(value)
+
+
+register_converter(EvenConverter, 'even')
+
+
+def view(req, *args, **kwargs):  # pylint: disable=unused-argument
+    ''' dummy view '''
+
+
+PATTERNS = [
+    path('hey/', view, name='hey'),
+    re_path('hello(?:/a/(?P<a>[0-9]+))?/', view, name='hello'),
+    path('num/<even:n>/', view, name='even'),
+    path('num/<int:n>/', view, name='int'),
+    re_path('num/(?P<n>[0-9]+)(?:/(?P<m>[0-9]+))?/', view, name='optional'),
+    re_path(r'pos/([0-9]+)/', view, name='positional'),
+    path('mod/hey/', view, name='mod-hey'),
+    re_path('mod/(?P<x>[a-z]+)/', view, name='mod-x'),
+    re_path('alt/b|c/', view, name='alternation'),
+    re_path('x/?y/', view, name='optional-slash'),
+    re_path('k/{0,2}v/', view, name='repeated-slash'),
+    path('', view, name='index'),
+]
+
+PATHS = ['hey/', 'hello/', 'hello/a/2/', 'num/2/', 'num/3/', 'num/3/4/', 'pos/12/',
+         'mod/hey/', 'mod/abc/', '', 'nope/', 'hello-x/', 'num/x/', 'alt/b', 'c/',
+         'x/y/', 'xy/', 'kv/', 'k//v/']
+
+
+def _resolve(resolver, url):
+    try:
+        match = resolver.resolve('/app/' + url)
+    except Resolver404:
+        return None
+    return (match.url_name, match.args, match.kwargs, match.route)
+
+
+@pytest.mark.parametrize('group', [TrieResolver, RegexResolver])
+@pytest.mark.parametrize('url', PATHS)
+def test_same_as_list(group, url):
+    expected = URLResolver(RegexPattern(r'^/'), [
+        URLResolver(RoutePattern('app/'), PATTERNS)])
+    resolver = URLResolver(RegexPattern(r'^/'), [group('app/', PATTERNS)])
+
+    assert _resolve(resolver, url) == _resolve(expected, url)
+
+
+def test_reverse():
+    resolver = URLResolver(RegexPattern(r'^/'), [RegexResolver('app/', PATTERNS)])
+    assert resolver.reverse('hello', a=1) == 'app/hello/a/1/'
+    assert resolver.reverse('even', n=2) == 'app/num/2/'
+
+
+def test_global_flags():
+    patterns = [re_path('(?i)upper/', view, name='flags'), *PATTERNS]
+    resolver = URLResolver(RegexPattern(r'^/'), [RegexResolver('app/', patterns)])
+
+    assert _resolve(resolver, 'UPPER/')[0] == 'flags'
+    assert _resolve(resolver, 'num/3/4/')[0] == 'optional'
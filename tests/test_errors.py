@@ -0,0 +1,119 @@
+import json
+
+import pytest
+
+from django_urlman import api, mount, register_error, errors
+
+from . import settings, call
+
+
+class Outage(Exception):
+    ''' downstream is down '''
+
+
+class DatabaseOutage(Outage):
+    pass
+
+
+def fail(ex):
+    raise ex
+
+
+def envelope(wrp):
+    response = call(wrp)
+    if response.streaming:
+        return response, json.loads(b''.join(response.streaming_content))
+    return response, json.loads(response.content)
+
+
+@api
+def failing():
+    fail(ValueError('secret'))
+
+
+@api(error_detail='repr')
+def failing_repr():
+    fail(ValueError('secret'))
+
+
+@api(error_detail='none')
+def failing_silent():
+    fail(ValueError('secret'))
+
+
+@api
+def down():
+    fail(DatabaseOutage('db-01 at 10.0.0.1'))
+
+
+@api
+def broken_stream():
+    yield 1
+    fail(Outage())
+
+
+@pytest.fixture
+def registry():
+    try:
+        yield
+    finally:
+        errors._registry.clear()
+        errors._resolved.clear()
+        errors.stack_limiter.configure()
+
+
+def test_detail_levels(registry):
+    response, data = envelope(failing)
+    assert response.status_code == 200
+    assert data['error'] == "ValueError('secret')" and data['result'] is None
+    assert 'fail' in ''.join(data['stack'])
+
+    _, data = envelope(failing_repr)
+    assert data == {'error': "ValueError('secret')", 'result': None}
+
+    _, data = envelope(failing_silent)
+    assert data == {'error': errors.GENERIC_ERROR, 'result': None}
+
+    with pytest.raises(ValueError):
+        api(error_detail='full')(fail)
+    with pytest.raises(ValueError):
+        mount(error_detail='full')
+
+
+def test_stack_limiter(registry):
+    errors.stack_limiter.configure(per_second=2)
+    stacks = ['stack' in envelope(failing)[1] for _ in range(5)]
+    assert stacks == [True, True, False, False, False]
+
+    errors.stack_limiter.configure(sample=0)
+    assert 'stack' not in envelope(failing)[1]
+
+    errors.stack_limiter.configure(sample=1)
+    assert 'stack' in envelope(failing)[1]
+
+    with pytest.raises(ValueError):
+        errors.stack_limiter.configure(sample=2)
+
+
+def test_registered_errors(registry, monkeypatch):
+    register_error(Outage, 503, 'service unavailable')
+
+    def no_traceback(*args):
+        raise AssertionError('traceback formatted')
+    monkeypatch.setattr(errors.traceback, 'format_exception', no_traceback)
+
+    response, data = envelope(down)
+    assert response.status_code == 503
+    assert response['Content-Type'] == 'application/json'
+    assert data == {'error': 'service unavailable', 'result': None}
+
+    _, data = envelope(broken_stream)
+    assert data == {'result': [1], 'error': 'service unavailable'}
+
+    # the most derived registration wins
+    register_error(DatabaseOutage, 500)
+    response, data = envelope(down)
+    assert response.status_code == 500 and data['error'] == 'DatabaseOutage'
+
+    with pytest.raises(ValueError):
+        register_error(int, 500)
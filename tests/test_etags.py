@@ -0,0 +1,156 @@
+import json
+
+import pytest
+
+from django_urlman import api, get_wrapper
+from django_urlman.urlman import _MultiHandlers
+
+from . import settings, call
+
+calls = []
+versions = {'doc': 1}
+
+
+@api(etag=True)
+def tagged_doc(name):
+    calls.append(name)
+    return {'name': name}
+
+
+def doc_version(name):
+    return versions.get(name)
+
+
+@api(etag=doc_version)
+def versioned_doc(name):
+    calls.append(name)
+    return {'name': name, 'version': versions.get(name)}
+
+
+async def adoc_version(name):
+    return versions.get(name)
+
+
+@api(etag=adoc_version)
+async def aversioned_doc(name):
+    calls.append(name)
+    return name
+
+
+@api(etag=True, cache=True)
+def cached_doc(name):
+    calls.append(name)
+    return {'name': name}
+
+
+@api(etag=True)
+async def astream_doc(n: int):
+    for i in range(n):
+        yield i
+
+
+@api(etag=True)
+def tagged_failing(name):
+    raise ValueError(name)
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    calls.clear()
+    versions['doc'] = 1
+
+
+def test_body_etag():
+    wrp = get_wrapper(tagged_doc)
+    response = call(wrp, name='doc')
+    etag = response['ETag']
+    assert response.status_code == 200 and etag.startswith('"')
+
+    response = call(wrp, headers={'If-None-Match': etag}, name='doc')
+    assert response.status_code == 304 and response['ETag'] == etag
+    assert call(wrp, headers={'If-None-Match': 'W/' + etag}, name='doc').status_code == 304
+    assert call(wrp, headers={'If-None-Match': '*'}, name='doc').status_code == 304
+
+    # the body is computed anyway
+    assert calls == ['doc'] * 4
+
+    response = call(wrp, headers={'If-None-Match': etag}, name='other')
+    assert response.status_code == 200 and response['ETag'] != etag
+    assert json.loads(response.content)['result'] == {'name': 'other'}
+
+    # HEAD carries the etag of GET
+    response = call(wrp, 'head', name='doc')
+    assert response.status_code == 200 and response['ETag'] == etag
+    assert response.content == b''
+    assert call(wrp, 'head', headers={'If-None-Match': etag}, name='doc').status_code == 304
+
+    # not for errors and unsafe methods
+    assert not call(get_wrapper(tagged_failing), name='x').has_header('ETag')
+    assert not call(wrp, 'post', name='doc').has_header('ETag')
+
+
+def test_head():
+    wrp = get_wrapper(cached_doc)
+    etag = call(wrp, name='doc')['ETag']
+
+    # served from the cache of GET, with the same validators
+    response = call(wrp, 'head', name='doc')
+    assert response['ETag'] == etag and response.content == b''
+    assert call(wrp, 'head', headers={'If-None-Match': etag}, name='doc').status_code == 304
+    assert calls == ['doc']
+
+    # streams are not tagged, the body is left out
+    response = call(get_wrapper(astream_doc), 'head', n=3)
+    assert response.status_code == 200 and not response.has_header('ETag')
+    assert not response.streaming and response.content == b''
+
+
+def test_version_etag():
+    wrp = get_wrapper(versioned_doc)
+    response = call(wrp, name='doc')
+    etag = response['ETag']
+    assert calls == ['doc']
+
+    # the api is skipped when the version is not changed
+    assert call(wrp, headers={'If-None-Match': etag}, name='doc').status_code == 304
+    assert call(wrp, 'head', headers={'If-None-Match': etag}, name='doc').status_code == 304
+    assert calls == ['doc']
+
+    versions['doc'] = 2
+    response = call(wrp, headers={'If-None-Match': etag}, name='doc')
+    assert response.status_code == 200 and response['ETag'] != etag
+    assert calls == ['doc', 'doc']
+
+    # unversioned, tagged by the body
+    response = call(wrp, name='new')
+    assert call(wrp, headers={'If-None-Match': response['ETag']}, name='new').status_code == 304
+
+
+def test_async_version():
+    wrp = get_wrapper(aversioned_doc)
+    etag = call(wrp, name='doc')['ETag']
+    assert call(wrp, headers={'If-None-Match': etag}, name='doc').status_code == 304
+    assert calls == ['doc']
+
+
+def test_multi_handlers():
+    @api(etag=doc_version)
+    def read_doc(name):
+        calls.append(name)
+        return name
+
+    @api
+    def write_doc(name):
+        versions[name] += 1
+
+    handler = _MultiHandlers([(['GET'], get_wrapper(read_doc)),
+                              (['PUT'], get_wrapper(write_doc))])
+    etag = call(handler, name='doc')['ETag']
+    assert call(handler, 'head', headers={'If-None-Match': etag}, name='doc').status_code == 304
+
+    assert not call(handler, 'put', name='doc').has_header('ETag')
+    assert call(handler, headers={'If-None-Match': etag}, name='doc').status_code == 200
+    assert calls == ['doc', 'doc']
+
+    with pytest.raises(ValueError):
+        api(etag='v1')(doc_version)
@@ -0,0 +1,230 @@
+import asyncio
+import inspect
+import threading
+
+import pytest
+
+from django_urlman import api, lifecycle, APIResult
+from django_urlman.lifecycles import (get_lifecycle, release_after, PerRequest, Singleton,
+                                      PerThread, PerTask, Pool)
+
+from . import settings, call
+
+
+class Client:
+    ''' expensive to create '''
+    created = 0
+
+    def __init__(self):
+        type(self).created += 1
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@lifecycle('singleton')
+class Service:
+    instances = []
+
+    def __init__(self):
+        self.instances.append(self)
+
+    @api
+    def who(self):
+        return self.instances.index(self)
+
+    @api(lifecycle=('pool', 1))
+    async def pooled(self):
+        await asyncio.sleep(0)
+        return id(self)
+
+
+class Feed:
+    @api(lifecycle=('pool', 1))
+    def items(self, n: int):
+        for i in range(n):
+            yield i
+
+    @api(lifecycle=('pool', 1))
+    async def aitems(self, n: int):
+        for i in range(n):
+            yield i
+
+
+def request(wrp):
+    if wrp.cls is None:
+        wrp.cls = wrp.cls_resolver()
+    return APIResult(call(wrp)).result
+
+
+def test_api_lifecycle():
+    assert isinstance(get_lifecycle(Client), PerRequest)
+    assert get_lifecycle(Service) is get_lifecycle(Service)
+    assert isinstance(get_lifecycle(Service), Singleton)
+
+    assert [request(Service.who) for _ in range(3)] == [0, 0, 0]
+    assert Service.who.call() == 0
+    assert len(Service.instances) == 1
+
+    # api-level lifecycle
+    assert isinstance(Service.pooled.instances, Pool)
+    first = request(Service.pooled)
+    assert request(Service.pooled) == first
+    assert len(Service.instances) == 2
+
+
+def test_per_request():
+    instances = PerRequest(Client)
+    assert instances.acquire() is not instances.acquire()
+
+
+def test_singleton():
+    instances = Singleton(Client)
+    objs = []
+    threads = [threading.Thread(target=lambda: objs.append(instances.acquire()))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(obj is objs[0] for obj in objs)
+
+    instances.shutdown()
+    assert objs[0].closed
+    assert instances.acquire() is not objs[0]
+
+
+def test_per_thread():
+    instances = PerThread(Client)
+    obj = instances.acquire()
+    assert instances.acquire() is obj
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(instances.acquire()))
+    thread.start()
+    thread.join()
+    assert other[0] is not obj
+
+    instances.shutdown()
+    assert obj.closed and other[0].closed
+
+
+def test_per_task():
+    instances = PerTask(Client)
+
+    async def work():
+        obj = instances.acquire()
+        await asyncio.sleep(0)
+        assert instances.acquire() is obj
+        return obj
+
+    async def main():
+        return await asyncio.gather(work(), work())
+
+    first, second = asyncio.run(main())
+    assert first is not second
+    # torn down when the task is done
+    assert first.closed and second.closed
+
+    # outside of tasks
+    obj = instances.acquire()
+    assert instances.acquire() is obj
+
+
+def test_pool():
+    torn = []
+    instances = Pool(Client, torn.append, size=2, timeout=0.05)
+    first, second = instances.acquire(), instances.acquire()
+    assert first is not second
+
+    with pytest.raises(TimeoutError):
+        instances.acquire()
+
+    # waiting for an instance returned
+    got = []
+    thread = threading.Thread(target=lambda: got.append(instances.acquire()))
+    instances.timeout = None
+    thread.start()
+    instances.release(first)
+    thread.join()
+    assert got == [first]
+
+    instances.release(first)
+    instances.release(second)
+    instances.shutdown()
+    assert sorted(map(id, torn)) == sorted(map(id, (first, second)))
+
+    async def borrow():
+        obj = await instances.aacquire()
+        await asyncio.sleep(0.01)
+        instances.release(obj)
+        return obj
+
+    async def main():
+        return await asyncio.gather(*[borrow() for _ in range(5)])
+
+    instances.timeout = 1
+    created = Client.created
+    asyncio.run(main())
+    assert Client.created - created <= 2
+
+    with pytest.raises(ValueError):
+        lifecycle('unknown')
+
+
+def test_pool_cancelled():
+    instances = Pool(Client, size=1, timeout=1)
+    obj = instances.acquire()
+
+    async def main():
+        # the waiting thread gets the instance after its caller gave up
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(instances.aacquire(), 0.01)
+        instances.release(obj)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(main())
+    instances.timeout = 0.01
+    assert instances.acquire() is obj
+
+
+def test_stream_release():
+    import json
+
+    def borrowed(wrp):
+        ''' instance of the pool is in use? '''
+        instances = wrp.instances
+        instances.timeout = 0.01
+        try:
+            instances.release(instances.acquire())
+        except TimeoutError:
+            return True
+        return False
+
+    async def read(response):
+        return b''.join([chunk async for chunk in response.streaming_content])
+
+    for wrp in (Feed.items, Feed.aitems):
+        if wrp.cls is None:
+            wrp.cls = wrp.cls_resolver()
+        response = call(wrp, run=False, n=3)
+        # the stream runs on the instance until it is consumed
+        assert borrowed(wrp)
+        if response.is_async:
+            content = asyncio.run(read(response))
+        else:
+            content = b''.join(response.streaming_content)
+        assert json.loads(content)['result'] == [0, 1, 2]
+        assert not borrowed(wrp)
+
+    # HEAD closes the stream unconsumed
+    call(Feed.items, 'head', n=3)
+    assert not borrowed(Feed.items)
+
+    instances = Pool(Client, size=1, timeout=0.01)
+    obj = instances.acquire()
+    stream = release_after(instances, obj, iter([1, 2]))
+    assert inspect.isgenerator(stream)
+    stream.close()
+    assert instances.acquire() is obj
@@ -0,0 +1,157 @@
+import io
+import os
+import sys
+import warnings
+
+import pytest
+
+import django.urls
+from django.core.management import call_command
+from django.test import Client
+
+from django_urlman import urlman, manifest, mount, APIResult
+from django_urlman.management.commands.urlman_manifest import Command
+
+from . import settings
+
+VIEWS = '''
+from django_urlman import api
+
+@api
+def ping(n: int, who='me'):
+    return n
+'''
+
+OPTIONS = {'trailing_slash': True, 'force_lowercase': True, 'underscore_to_hyphen': True,
+           'serializer': 'auto', 'error_detail': 'stack',
+           'param_order': ['query', 'cookie', 'body', 'session'],
+           'apps': {'manifest_app': 'mapp/'}}
+
+
+def unload():
+    for name in [*sys.modules]:
+        if name.startswith('manifest_app'):
+            del sys.modules[name]
+    for wrp in urlman._urls:
+        if wrp.real_func.__module__.startswith('manifest_app'):
+            urlman._urls.remove(wrp)
+
+
+@pytest.fixture
+def app(tmp_path):
+    pkg = tmp_path / 'manifest_app'
+    pkg.mkdir()
+    (pkg / '__init__.py').write_text('')
+    (pkg / 'views.py').write_text(VIEWS)
+    (pkg / 'helpers.py').write_text('STEP = 1\n')
+    sys.path.insert(0, str(tmp_path))
+    # mounting resolves the site-url of all registered apis once
+    site_urls = [(wrp, wrp.site_url, wrp.anchor) for wrp in urlman._urls]
+    try:
+        yield pkg
+    finally:
+        unload()
+        for wrp, site_url, anchor in site_urls:
+            wrp.site_url, wrp.anchor = site_url, anchor
+        sys.path.remove(str(tmp_path))
+        urlman._manifests.clear()
+        urlman._lazy_views.clear()
+        settings.urlpatterns = []
+        django.urls.clear_url_caches()
+
+
+def test_manifest(app, tmp_path):
+    filename = str(tmp_path / 'routes.json')
+    apps = {'manifest_app': 'mapp/'}
+
+    with pytest.warns(UserWarning):
+        mount(apps, only_me=True, manifest=filename)
+    assert 'manifest_app.views' in sys.modules
+
+    call_command(Command(), stdout=open(os.devnull, 'w'))
+    routes = manifest.load(filename, OPTIONS)
+    route, = [x for x in routes if x['url_name'] == 'manifest_app.views.ping']
+    assert route['site_url'] == 'mapp/views/ping/n/(?P<n>[0-9]+)(?:/who/(?P<who>[^/]+))?/'
+    assert route['regex']
+    assert route['handlers'] == [{
+        'module': 'manifest_app.views', 'qualname': 'ping', 'methods': [],
+        'func_type': 'PLAIN',
+        'params': [
+            {'name': 'n', 'type': 'int', 'positional': True, 'default': False, 'auto': False},
+            {'name': 'who', 'type': 'str', 'positional': True, 'default': True, 'auto': False},
+        ]}]
+
+    # up-to-date manifest mounts without importing the app
+    unload()
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        mount(apps, only_me=True, manifest=filename)
+    django.urls.clear_url_caches()
+    assert 'manifest_app.views' not in sys.modules
+    assert django.urls.reverse('manifest_app.views.ping', kwargs={'n': 3}) == '/mapp/views/ping/n/3/'
+
+    assert APIResult(Client().get('/mapp/views/ping/n/3/who/you/')).result == 3
+    assert 'manifest_app.views' in sys.modules
+
+    # options changed
+    assert manifest.load(filename, {**OPTIONS, 'trailing_slash': False}) is None
+
+
+def test_manifest_no_apps(app, tmp_path):
+    filename = str(tmp_path / 'routes.json')
+    options = {**OPTIONS, 'apps': {}}
+
+    with pytest.warns(UserWarning):
+        mount(only_me=True, manifest=filename)
+    assert urlman.write_manifest() == [filename]
+    assert manifest.load(filename, options) is not None
+
+    os.remove(filename)
+    stdout = io.StringIO()
+    call_command(Command(), stdout=stdout)
+    assert stdout.getvalue() == f'route manifest written: {filename}\n'
+    assert manifest.load(filename, options) is not None
+
+
+def test_staleness(app, tmp_path):
+    filename = str(tmp_path / 'routes.json')
+    with pytest.warns(UserWarning):
+        mount({'manifest_app': 'mapp/'}, only_me=True, manifest=filename)
+    assert urlman.write_manifest() == [filename]
+    assert manifest.load(filename, OPTIONS) is not None
+
+    # touched only
+    views = app / 'views.py'
+    stat = os.stat(views)
+    os.utime(views, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert manifest.load(filename, OPTIONS) is not None
+
+    # new module
+    (app / 'more.py').write_text('')
+    assert manifest.load(filename, OPTIONS) is None
+    (app / 'more.py').unlink()
+    assert manifest.load(filename, OPTIONS) is not None
+
+    # modified
+    views.write_text(VIEWS.replace('ping', 'pong'))
+    assert manifest.load(filename, OPTIONS) is None
+
+    views.write_text(VIEWS)
+    assert manifest.load(filename, OPTIONS) is not None
+
+    # api added to a module without routes
+    helpers = app / 'helpers.py'
+    helpers.write_text(VIEWS.replace('ping', 'helper_ping'))
+    assert manifest.load(filename, OPTIONS) is None
+    helpers.write_text('STEP = 1\n')
+    assert manifest.load(filename, OPTIONS) is not None
+
+    # module_path() added to the package
+    (app / '__init__.py').write_text("from django_urlman import module_path\n")
+    assert manifest.load(filename, OPTIONS) is None
+
+    # missing or corrupted
+    assert manifest.load(str(tmp_path / 'none.json'), OPTIONS) is None
+    with open(filename, 'w') as fp:
+        fp.write('{')
+    assert manifest.load(filename, OPTIONS) is None
@@ -0,0 +1,104 @@
+import time
+import asyncio
+
+import pytest
+
+from django_urlman import api, get_wrapper, metrics, GET, PUT
+from django_urlman.urlman import _MultiHandlers
+
+from . import settings, call
+
+
+@api
+def timed_sleep(ms: int):
+    time.sleep(ms / 1000)
+    return ms
+
+
+@api
+async def atimed_sleep(ms: int):
+    await asyncio.sleep(ms / 1000)
+    return ms
+
+
+@api
+def timed_failing():
+    raise ValueError()
+
+
+@GET
+@api
+def timed_get():
+    return 1
+
+
+@PUT
+@api
+def timed_put():
+    return 2
+
+
+@pytest.fixture(autouse=True)
+def recorder():
+    timings = []
+    metrics.enable(lambda *args: timings.append(args))
+    try:
+        yield timings
+    finally:
+        metrics.disable()
+        metrics.reset()
+
+
+def test_phases(recorder):
+    wrp = get_wrapper(timed_sleep)
+    for ms in (1, 1, 1, 20):
+        call(wrp, ms=ms)
+
+    url_name, timings, status = recorder[-1]
+    assert url_name == wrp.url_name and status == 200
+    assert set(timings) == {'bind', 'call', 'serialize', 'total'}
+    assert timings['call'] >= 0.02
+    assert timings['total'] >= timings['bind'] + timings['call'] + timings['serialize']
+
+    hist = metrics.histogram(wrp.url_name, 'call')
+    assert hist.count == 4
+
+    p = metrics.percentiles(wrp.url_name, 'call')
+    assert 0.0008 < p[50] < 0.004 and p[50] <= p[90] <= p[99]
+    assert p[99] >= 0.0125
+    assert metrics.snapshot()[wrp.url_name]['total']['count'] == 4
+
+
+def test_async_and_errors(recorder):
+    call(get_wrapper(atimed_sleep), ms=1)
+    assert set(recorder[-1][1]) == {'bind', 'call', 'serialize', 'total'}
+
+    call(get_wrapper(timed_failing))
+    assert set(recorder[-1][1]) == {'bind', 'total'}
+
+
+def test_dispatch(recorder):
+    handler = _MultiHandlers([(['GET'], get_wrapper(timed_get)),
+                              (['PUT'], get_wrapper(timed_put))], 'timed.doc')
+    call(handler)
+    call(handler, 'delete')
+    assert [x[1].keys() for x in recorder if x[0] == 'timed.doc'] == [{'dispatch'}] * 2
+    assert recorder[-1][2] == 405
+    assert metrics.histogram('timed.doc', 'dispatch').count == 2
+
+
+def test_disabled(recorder):
+    metrics.disable()
+    call(get_wrapper(timed_sleep), ms=0)
+    assert not recorder and not metrics.snapshot()
+    assert metrics.percentiles('nothing') == {}
+
+
+def test_histogram():
+    hist = metrics.Histogram()
+    assert hist.percentile(50) is None
+    for _ in range(99):
+        hist.add(0.00001)
+    hist.add(100)  # beyond the last bucket
+    assert hist.percentile(50) <= metrics.BUCKETS[0]
+    assert hist.percentile(100) == 100
@@ -0,0 +1,164 @@
+''' conformance of json serializer backends '''
+
+import collections
+import dataclasses
+import datetime
+import decimal
+import enum
+import gc
+import json
+import uuid
+import weakref
+
+import pytest
+
+from django_urlman.serializers import _MyJSONEncoder, get_backends, get_dumps, json_dumps
+
+from . import settings  # pylint: disable=unused-import
+
+
+class Point:  # pylint: disable=too-few-public-methods
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self._hidden = 'secret'
+
+
+@dataclasses.dataclass
+class Item:
+    name: str
+    price: decimal.Decimal
+    _cost: int = 0
+
+
+Pair = collections.namedtuple('Pair', 'left right')
+
+
+class Slotted:  # pylint: disable=too-few-public-methods
+    __slots__ = ('x', 'y', '_z', 'unset')
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self._z = 0
+
+
+class SlottedChild(Slotted):  # pylint: disable=too-few-public-methods
+    __slots__ = 'w'
+
+    def __init__(self, x, y, w):
+        super().__init__(x, y)
+        self.w = w
+
+
+@dataclasses.dataclass(slots=True)
+class SlottedItem:
+    name: str
+    _cost: int = 0
+
+
+class Color(enum.Enum):
+    RED = 'red'
+
+
+FIXTURES = [
+    None, True, 0, -1, 2**63 - 1, 2**70, 1.5, 'plain', 'unicode: 你好', 'slash/quote"',
+    123.25, 'e 1e16 0.00001', 'lone surrogate \ud800', {'\udfff': 1},
+    [], {}, [1, [2, [3]]], (1, 2), {'a': {'b': None}}, {1: 'int key'},
+    datetime.datetime(2020, 1, 2, 3, 4, 5, 123456),
+    datetime.datetime(2020, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+    datetime.date(2020, 1, 2), datetime.time(3, 4, 5, 600),
+    datetime.timedelta(days=1, seconds=2),
+    decimal.Decimal('1.10'), uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    Point(1, 2), [Point(1, Point(2, 3))], Item('pen', decimal.Decimal('2.5')),
+    Pair(1, 'x'), Color.RED, Slotted(1, 2), SlottedChild(1, 2, 3), SlottedItem('pen'),
+    {'error': None, 'result': [Point(i, str(i)) for i in range(10)]},
+]
+
+
+# floats orjson writes in its own shortest form
+FLOAT_FIXTURES = [1e16, -1e-7, 1.5e300, 2.5e-05, 1e-4, [1e22, 'e 1e16 0.00001', {'x': 5e-324}]]
+
+
+@pytest.mark.parametrize('name', sorted(get_backends()))
+@pytest.mark.parametrize('obj', FIXTURES, ids=repr)
+def test_conformance(name, obj):
+    dumps = get_backends()[name]
+    assert dumps(obj) == json_dumps(obj)
+
+
+@pytest.mark.parametrize('name', sorted(get_backends()))
+@pytest.mark.parametrize('obj', FLOAT_FIXTURES, ids=repr)
+def test_float_format(name, obj):
+    dumps = get_backends()[name]
+    if name == 'orjson':
+        assert json.loads(dumps(obj)) == json.loads(json_dumps(obj))
+    else:
+        assert dumps(obj) == json_dumps(obj)
+
+
+@pytest.mark.parametrize('name', sorted(get_backends()))
+def test_encoder_options(name, monkeypatch):
+    dumps = get_backends()[name]
+
+    assert json.loads(dumps(Point(1, 2))) == {'x': 1, 'y': 2}
+
+    monkeypatch.setattr(_MyJSONEncoder, 'include_cls_id', True)
+    assert json.loads(dumps(Point(1, 2))) == {'x': 1, 'y': 2, '_cls_': 'Point'}
+
+    monkeypatch.setattr(_MyJSONEncoder, 'enable_all_fields', True)
+    assert json.loads(dumps(Point(1, 2))) == {
+        'x': 1, 'y': 2, '_hidden': 'secret', '_cls_': 'Point'}
+
+
+def test_get_dumps():
+    assert get_dumps('json') is json_dumps
+    assert get_dumps('auto') in get_backends().values()
+    assert get_dumps(repr) is repr
+
+    with pytest.raises(ValueError):
+        get_dumps('no-such-backend')
+
+
+def test_api_serializer():
+    from django.test import RequestFactory
+    from django_urlman import api
+
+    @api(serializer=lambda obj: b'custom')
+    def custom():
+        return 1
+
+    @api(serializer='json')
+    def stdlib():
+        return Point(1, 2)
+
+    req = RequestFactory().get('/')
+    assert custom(req).content == b'custom'
+    assert stdlib(req).content == b'{"error":null,"result":{"x":1,"y":2}}'
+    assert stdlib(req)['Content-Type'] == 'application/json'
+
+
+def test_field_plans(monkeypatch):
+    monkeypatch.setattr(_MyJSONEncoder, '_plans', weakref.WeakKeyDictionary())
+
+    assert json.loads(json_dumps([Slotted(1, 2), Slotted(3, 4)])) == [
+        {'x': 1, 'y': 2}, {'x': 3, 'y': 4}]
+    assert json.loads(json_dumps(SlottedChild(1, 2, 3))) == {'x': 1, 'y': 2, 'w': 3}
+    assert json.loads(json_dumps(SlottedItem('pen'))) == {'name': 'pen'}
+    assert json.loads(json_dumps(Item('pen', decimal.Decimal('1')))) == {
+        'name': 'pen', 'price': '1'}
+
+    # one plan per type
+    assert set(_MyJSONEncoder._plans) == {
+        Slotted, SlottedChild, SlottedItem, Item, decimal.Decimal}
+
+    # types created on the fly are freed with their plans
+    dynamic = type('Dynamic', (), {})
+    assert json.loads(json_dumps(dynamic())) == {}
+    assert dynamic in _MyJSONEncoder._plans
+    del dynamic
+    gc.collect()
+    assert len(_MyJSONEncoder._plans) == 5
+
+    with pytest.raises(TypeError):
+        json_dumps({1, 2})
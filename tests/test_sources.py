@@ -0,0 +1,149 @@
+import json
+from typing import Annotated
+
+import pytest
+
+from django.test import RequestFactory
+
+from django_urlman import api, get_wrapper, Query, Body, Header, Cookie, Session, Path
+
+from . import settings
+
+
+class ForbiddenSession(dict):
+    def __getitem__(self, key):
+        raise AssertionError('session loaded')
+
+
+@api
+def source_search(q: Annotated[str, Query], page: Annotated[int, Query] = 1):
+    return [q, page]
+
+
+@api
+def source_mixed(uid: Annotated[int, Path], token: Annotated[str, Header('X-Token')],
+                 user_agent: Header, theme: Annotated[str, Cookie] = 'light',
+                 cart: Annotated[list, Session] = None):
+    return [uid, token, user_agent, theme, cart]
+
+
+@api
+def source_save(name: Annotated[str, Body], size: Annotated[int, Body('n')] = 0):
+    return [name, size]
+
+
+@api(param_autos=('a',))
+def source_autos(a: Annotated[int, Path], b: Annotated[int, Query]):
+    return a + b
+
+
+def result(response):
+    return json.loads(response.content)['result']
+
+
+def test_query_only():
+    wrp = get_wrapper(source_search)
+    assert wrp.param_autos == ('q', 'page') and wrp.param_url() == ''
+
+    req = RequestFactory().post('/?q=django&page=2', data={'q': 'body'})
+    req.session = ForbiddenSession()
+    assert result(wrp(req)) == ['django', 2]
+    # neither the body nor the session is touched
+    assert '_post' not in req.__dict__ and '_body' not in req.__dict__
+
+    assert result(wrp(RequestFactory().get('/?q=x'))) == ['x', 1]
+
+    response = wrp(RequestFactory().get('/', {'page': 3}, HTTP_COOKIE='q=cookie'))
+    assert response.status_code == 400
+
+
+def test_sources():
+    wrp = get_wrapper(source_mixed)
+    assert wrp.param_url() == '/uid/(?P<uid>[0-9]+)'  # optional params: re_path()
+    assert 'uid' not in wrp.param_autos
+
+    req = RequestFactory().get('/', HTTP_X_TOKEN='secret', HTTP_USER_AGENT='tester',
+                               HTTP_COOKIE='theme=dark')
+    req.session = {'cart': [1, 2]}
+    assert result(wrp(req, uid=7)) == [7, 'secret', 'tester', 'dark', [1, 2]]
+
+    req = RequestFactory().get('/', HTTP_X_TOKEN='secret', HTTP_USER_AGENT='tester')
+    assert result(wrp(req, uid='7')) == [7, 'secret', 'tester', 'light', None]
+
+
+def test_body():
+    wrp = get_wrapper(source_save)
+    req = RequestFactory().post('/?name=query', data=json.dumps({'name': 'doc', 'n': 3}),
+                                content_type='application/json')
+    assert result(wrp(req)) == ['doc', 3]
+
+    req = RequestFactory().post('/', data={'name': 'form'})
+    assert result(wrp(req)) == ['form', 0]
+    assert wrp(RequestFactory().get('/?name=query')).status_code == 400
+
+
+def test_declared_path_wins():
+    wrp = get_wrapper(source_autos)
+    assert wrp.param_autos == ('b',)
+    assert result(wrp(RequestFactory().get('/?b=2&a=100'), a=1)) == 3
+    assert repr(Header('X-Token')) == "Header('X-Token')" and repr(Query) == 'Query'
+
+
+@api(param_autos=('a',))
+def order_default(a: int):
+    return a
+
+
+@api(param_autos=('a',), param_order=('session', 'query'))
+def order_session_first(a: int):
+    return a
+
+
+def precedence_request(session=None):
+    req = RequestFactory().post('/?a=1', data={'a': 3}, HTTP_COOKIE='a=2')
+    req.session = ForbiddenSession() if session is None else session
+    return req
+
+
+def test_precedence():
+    # the first hit wins, the body and the session are not touched
+    req = precedence_request()
+    assert result(get_wrapper(order_default)(req)) == 1
+    assert '_post' not in req.__dict__
+
+    req = RequestFactory().post('/', data={'a': 3}, HTTP_COOKIE='a=2')
+    assert result(get_wrapper(order_default)(req)) == 2
+
+    req = RequestFactory().post('/', data={'a': 3})
+    req.session = ForbiddenSession()
+    assert result(get_wrapper(order_default)(req)) == 3
+
+    assert result(get_wrapper(order_session_first)(precedence_request({'a': 4}))) == 4
+    assert result(get_wrapper(order_session_first)(precedence_request({}))) == 1
+
+
+def test_mount_precedence():
+    from django_urlman import mount
+    from django_urlman.urlman import _APIWrapper, _prepare_wrapper
+
+    def order_mounted(a: int):
+        return a
+
+    wrp = _APIWrapper(order_mounted, param_autos=('a',))
+    _prepare_wrapper(wrp, 'tests', {}, True, True, True, 'auto', 'stack', ['body', 'query'])
+    assert result(wrp(precedence_request())) == 3
+
+    # the api setting wins
+    wrp = get_wrapper(order_session_first)
+    saved = wrp.site_url, wrp.anchor
+    try:
+        _prepare_wrapper(wrp, 'tests', {}, True, True, True, 'auto', 'stack', ['body'])
+        assert result(wrp(precedence_request({'a': 4}))) == 4
+    finally:
+        wrp.site_url, wrp.anchor = saved
+
+    for order in ('query', ['query', 'query'], ['form'], []):
+        with pytest.raises(ValueError):
+            mount(param_order=order)
+        with pytest.raises(ValueError):
+            api(param_order=order)(order_mounted)
@@ -1,4 +1,9 @@
-from django_urlman.urlman import _geturl, _APIWrapper, mount, module_path, APIResult, get_wrapper, _dump_urls
+import datetime
+import json
+
+import pytest
+
+from django_urlman.urlman import _geturl, _ModuleIndex, _APIWrapper, mount, module_path, APIResult, get_wrapper, _dump_urls
 from django_urlman.decorators import api, url, HEAD, GET, POST, PUT, PATCH, DELETE, READ, WRITE
 from django_urlman.marker import mark
 
@@ -24,6 +29,11 @@ def test_geturl():
         module_maps = {'mymath.algo':'', 'mymath.algo.advanced':'super'}) == 'math/super/add1/'
     assert _geturl(prj, { 'mymath': 'math/'} , 'mymath', 'mymath.algo.advanced.internal','', 'add2', '', 
         module_maps = {'mymath.algo':'base', 'mymath.algo.advanced':'super'}) == 'math/super/internal/add2/'
+    # dotted prefix only
+    assert _geturl(prj, { 'mymath': 'math/'} , 'mymath', 'mymath.algorithm','', 'add', '',
+        module_maps = {'mymath.algo':'base'}) == 'math/algorithm/add/'
+    assert _geturl(prj, { 'mymath': 'math/'} , 'mymath', 'mymath.algo','', 'add', '',
+        module_maps = _ModuleIndex({'mymath':'x', 'mymath.algo':'base'})) == 'math/base/add/'
 
     assert _geturl(prj, {}, '', 'health', '','ping', '', app_url="check") == 'health/check/'
 
@@ -336,4 +346,556 @@ def test_site_url():
     # param url processing
     r = APIResult(client.get('/get-info/block-no/1/'))
     assert r.status_code == 200
-    assert r.result == 1
\ No newline at end of file
+    assert r.result == 1
+
+def test_json_body_parsed_once():
+    from unittest import mock
+    from django.test import RequestFactory
+    from django_urlman.urlman import get_json_body, json as urlman_json
+
+    @api(param_autos=('a', 'b', 'c'))
+    def add3(a: int, b: int, c: int):
+        return a + b + c
+
+    req = RequestFactory().post('/', {'a': 1, 'b': 2, 'c': 3},
+                                content_type='application/json')
+
+    with mock.patch.object(urlman_json, 'loads', wraps=urlman_json.loads) as loads:
+        response = add3(req)
+        assert loads.call_count == 1
+
+        assert get_json_body(req) == {'a': 1, 'b': 2, 'c': 3}
+        assert loads.call_count == 1
+
+    assert APIResult(response).result == 6
+
+
+def test_binding_plan():
+    from django.test import RequestFactory
+
+    @api(param_autos=('c',))
+    def mixed(a: int, /, b=2, *, c: int, d=True):
+        return [a, b, c, d]
+
+    pos_steps, kw_steps = mixed.compile()
+    assert len(pos_steps) == 2
+    assert [name for name, _ in kw_steps] == ['c', 'd']
+
+    factory = RequestFactory()
+    r = APIResult(mixed(factory.get('/?c=3'), a='1', d='false'))
+    assert r.result == [1, 2, 3, False]
+
+    response = mixed(factory.get('/'), a='1')
+    assert response.status_code == 400
+
+
+def test_var_params():
+    from django.test import RequestFactory
+
+    @api
+    def var_path(a: int, *args, **extra):
+        return [a, args, extra]
+
+    @api(param_autos=('q',))
+    def var_autos(q, b=1, **extra):
+        return [q, b, extra]
+
+    assert 'extra' not in dict(var_path.compile()[1])
+
+    # the unmatched view arguments are passed to **extra
+    factory = RequestFactory()
+    assert APIResult(var_path(factory.get('/'), a=1, day='mon')).result == [
+        1, [], {'day': 'mon'}]
+    assert APIResult(var_autos(factory.get('/?q=x'), b='2', day='mon')).result == [
+        'x', 2, {'day': 'mon'}]
+
+
+def test_param_url_converters():
+    import datetime
+    import decimal
+
+    class Decimal:  # pylint: disable=too-few-public-methods
+        ''' unrelated class sharing the name of decimal.Decimal '''
+        def __init__(self, value):
+            self.value = value
+
+    @api
+    def on(day: datetime.date, amount: decimal.Decimal): pass
+    assert on.param_url() == '/day/<date:day>/amount/<decimal:amount>'
+
+    @api
+    def price(amount: Decimal):
+        return amount.value
+    assert price.param_url() == '/amount/<amount>'
+
+    from django.test import RequestFactory
+    assert APIResult(price(RequestFactory().get('/'), amount='1.5')).result == '1.5'
+
+
+def test_stream_result():
+    import json
+    from django.test import RequestFactory
+
+    @api
+    def count(n: int):
+        return (i for i in range(n))
+
+    @api
+    def broken(n: int):
+        for i in range(n):
+            yield i
+        raise ValueError('disk full')
+
+    req = RequestFactory().get('/')
+
+    response = count(req, n=250)
+    assert response.streaming
+    r = APIResult(response)
+    assert r.error is None
+    assert r.result == list(range(250))
+
+    assert APIResult(count(req, n=0)).result == []
+
+    content = json.loads(b''.join(broken(req, n=3).streaming_content))
+    assert content['result'] == [0, 1, 2]
+    assert content['error'] == "ValueError('disk full')"
+    assert content['stack']
+
+
+class AsyncMonitor:
+    @api
+    async def status(self, n: int):
+        return n
+
+    @api
+    @classmethod
+    async def settings(cls):
+        return 'async settings'
+
+
+def test_async_api():
+    import asyncio
+    from asgiref.sync import iscoroutinefunction
+    from django.test import RequestFactory
+    from django_urlman.urlman import _MultiHandlers
+
+    @api
+    async def add(a: int, b: int):
+        await asyncio.sleep(0)
+        return a + b
+
+    @api
+    async def stream(n: int):
+        for i in range(n):
+            yield i
+
+    class Echo:
+        async def __call__(self, what):
+            return what
+
+    echo = api(Echo())
+
+    for wrp in (add, echo, AsyncMonitor().status, AsyncMonitor.settings):
+        assert wrp.is_async
+        assert iscoroutinefunction(wrp)
+
+    # async generator is streamed by sync handler
+    assert not stream.is_async
+
+    AsyncMonitor().status.cls = AsyncMonitor
+    AsyncMonitor.settings.cls = AsyncMonitor
+
+    req = RequestFactory().get('/')
+    assert APIResult(asyncio.run(add(req, a=1, b=2))).result == 3
+    assert APIResult(asyncio.run(echo(req, what='hi'))).result == 'hi'
+    assert APIResult(asyncio.run(AsyncMonitor().status(req, n=5))).result == 5
+    assert APIResult(asyncio.run(AsyncMonitor.settings(req))).result == 'async settings'
+
+    async def read_stream():
+        response = stream(req, n=150)
+        return b''.join([chunk async for chunk in response.streaming_content])
+    assert json.loads(asyncio.run(read_stream()))['result'] == list(range(150))
+
+    @GET
+    @api
+    def sync_get():
+        return 'sync'
+
+    @POST
+    @api
+    async def async_post():
+        return 'async'
+
+    handler = _MultiHandlers([(sync_get.methods, sync_get), (async_post.methods, async_post)])
+    assert iscoroutinefunction(handler)
+    factory = RequestFactory()
+    assert APIResult(asyncio.run(handler(factory.get('/')))).result == 'sync'
+    assert APIResult(asyncio.run(handler(factory.post('/')))).result == 'async'
+    assert asyncio.run(handler(factory.put('/'))).status_code == 405
+
+
+def test_async_db_session():
+    import asyncio
+    from typing import Annotated
+    import django
+    from django.conf import settings as django_settings
+    from django.core.management import call_command
+    from django.test import RequestFactory, override_settings
+    from django_urlman import Session
+
+    @api(param_autos=('cart',))
+    async def session_cart(cart: list):
+        return cart
+
+    @api
+    async def session_theme(theme: Annotated[str, Session] = 'light'):
+        return theme
+
+    @api(param_autos=('cart',))
+    async def session_query_cart(cart: str):
+        return cart
+
+    assert 'django.contrib.sessions' in django_settings.INSTALLED_APPS
+    django.setup()
+    call_command('migrate', 'sessions', verbosity=0)
+
+    with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db'):
+        from django.contrib.sessions.backends.db import SessionStore
+        store = SessionStore()
+        store['cart'] = [1, 2]
+        store['theme'] = 'dark'
+        store.save()
+
+        def request(query=''):
+            req = RequestFactory().get('/' + query)
+            req.session = SessionStore(store.session_key)
+            return req
+
+        # the session is loaded in the event loop without sync database access
+        assert APIResult(asyncio.run(session_cart(request()))).result == [1, 2]
+        assert APIResult(asyncio.run(session_theme(request()))).result == 'dark'
+
+        # the query hits first, the session is not loaded
+        req = request('?cart=q')
+        assert APIResult(asyncio.run(session_query_cart(req))).result == 'q'
+        assert not hasattr(req.session, '_session_cache')
+
+
+def test_method_dispatch():
+    from django.test import RequestFactory
+    from django_urlman.urlman import _MultiHandlers
+
+    calls = []
+
+    @GET
+    @api
+    def item():
+        calls.append('GET')
+        return 'item'
+
+    @PUT
+    @api
+    def item_put():
+        calls.append('PUT')
+
+    factory = RequestFactory()
+
+    # single handler
+    assert APIResult(item(factory.get('/'))).result == 'item'
+
+    response = item(factory.head('/'))
+    assert response.status_code == 200
+    assert response.content == b''
+    assert calls == ['GET', 'GET']
+
+    response = item(factory.options('/'))
+    assert response.status_code == 200
+    assert response['Allow'] == 'GET, HEAD, OPTIONS'
+    assert calls == ['GET', 'GET']
+
+    response = item(factory.post('/'))
+    assert response.status_code == 405
+    assert response['Allow'] == 'GET, HEAD, OPTIONS'
+
+    # multiple handlers
+    handler = _MultiHandlers([(item.methods, item), (item_put.methods, item_put)])
+    calls.clear()
+
+    assert handler(factory.head('/')).status_code == 200
+    assert handler(factory.put('/')).status_code == 200
+    assert calls == ['GET', 'PUT']
+
+    response = handler(factory.options('/'))
+    assert response.status_code == 200
+    assert response['Allow'] == 'GET, HEAD, OPTIONS, PUT'
+
+    response = handler(factory.delete('/'))
+    assert response.status_code == 405
+    assert response['Allow'] == 'GET, HEAD, OPTIONS, PUT'
+    assert calls == ['GET', 'PUT']
+
+
+@pytest.mark.parametrize('dispatch', ['trie', 'regex'])
+def test_group_dispatch(dispatch):
+    import django.urls
+    from django.test import Client
+    from django_urlman.dispatch import TrieResolver, RegexResolver
+
+    module_path(__name__, '')
+    try:
+        mount(only_me=True, dispatch=dispatch)
+        django.urls.clear_url_caches()
+
+        resolver = {'trie': TrieResolver, 'regex': RegexResolver}[dispatch]
+        assert all(isinstance(x, resolver) for x in settings.urlpatterns)
+
+        client = Client()
+        assert APIResult(client.get('/hello/')).result == 1
+        assert APIResult(client.get('/hello/a/2/')).result == 2
+        assert APIResult(client.get('/monitor/settings/')).result == Monitor.MAX_CONNECTIONS
+        assert APIResult(client.get('/get-info/block-no/3/')).result == 3
+        assert client.get('/no/such/url/').status_code == 404
+        assert client.get('/hello-x/').status_code == 404
+
+        assert django.urls.reverse(hello.url_name) == '/hello/'
+        assert django.urls.reverse(hello.url_name, kwargs={'a': 5}) == '/hello/a/5/'
+        assert django.urls.resolve('/hello/a/5/').kwargs == {'a': '5'}
+    finally:
+        mount(only_me=True)
+        django.urls.clear_url_caches()
+
+
+LAZY_MODULE = '''
+from django_urlman import api
+
+@api
+def ping(n: int):
+    return n
+
+@api
+async def aping(n: int = 1):
+    return n
+'''
+
+
+def test_lazy_mount(tmp_path):
+    import sys
+    import threading
+    import django.urls
+    from django.test import Client
+    from django_urlman import urlman, dump_routes, load_all
+
+    def unload():
+        sys.modules.pop('lazy_api', None)
+        for wrp in urlman._urls:
+            if wrp.real_func.__module__ == 'lazy_api':
+                urlman._urls.remove(wrp)
+
+    (tmp_path / 'lazy_api.py').write_text(LAZY_MODULE)
+    sys.path.insert(0, str(tmp_path))
+    try:
+        import lazy_api  # pylint: disable=import-error,unused-import
+        mount(only_me=True)
+        routes = [x for x in dump_routes() if x['handlers'][0]['module'] == 'lazy_api']
+        assert {x['site_url'] for x in routes} == {
+            'lazy_api/ping/n/<int:n>/', 'lazy_api/aping(?:/n/(?P<n>[0-9]+))?/'}
+        assert {x['handlers'][0]['qualname'] for x in routes if x['is_async']} == {'aping'}
+
+        # fresh process, the routes are mounted without importing the module
+        unload()
+        mount(only_me=True, lazy=True, routes=routes)
+        django.urls.clear_url_caches()
+        assert 'lazy_api' not in sys.modules
+
+        client = Client()
+        assert APIResult(client.get('/lazy_api/ping/n/3/')).result == 3
+        assert 'lazy_api' in sys.modules
+        assert APIResult(client.get('/lazy_api/aping/n/2/')).result == 2
+        assert APIResult(client.get('/lazy_api/aping/')).result == 1
+        load_all()
+
+        # concurrent first requests share the same handler
+        unload()
+        view = urlman._LazyView(routes[0], urlman._lazy_views[-1]._prepare)
+        handlers = []
+        threads = [threading.Thread(target=lambda: handlers.append(view.load()))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(handlers) == 8 and all(x is handlers[0] for x in handlers)
+        assert len([x for x in urlman._urls if x.real_func.__module__ == 'lazy_api']) == 2
+
+        with pytest.raises(ValueError):
+            mount(lazy=True)
+    finally:
+        unload()
+        sys.path.remove(str(tmp_path))
+        urlman._lazy_views.clear()
+        mount(only_me=True)
+        django.urls.clear_url_caches()
+
+
+class Sensor:
+    ''' same-named apis as Monitor '''
+
+    @api(name='sensor.status')
+    def status(self):
+        return 'sensor'
+
+    @api(name='sensor.settings')
+    @classmethod
+    def settings(cls):
+        return 0
+
+
+def test_get_wrapper():
+    from django_urlman import urlman
+
+    for cls in (Monitor, Sensor):
+        for name in ('status', 'settings', 'ping'):
+            wrp = cls.__dict__.get(name)
+            if wrp is None:
+                continue
+            assert get_wrapper(wrp) is wrp
+            assert get_wrapper(wrp.real_func) is wrp
+            assert get_wrapper(wrp.func) is wrp  # classmethod/staticmethod object
+
+    # callable object
+    class Greeter:
+        def __call__(self, who):
+            return 'hello ' + who
+    greeter = Greeter()
+    wrp = api(greeter)
+    assert get_wrapper(greeter) is wrp
+
+    # re-registration wins, removing falls back to the previous one
+    def twice():
+        pass
+    first, second = api(twice), api(twice)
+    key = (__name__, twice.__qualname__)
+    assert urlman._urls.get(*key) is second
+    urlman._urls.remove(second)
+    assert urlman._urls.get(*key) is first
+    urlman._urls.remove(first)
+    urlman._urls.remove(wrp)
+    assert urlman._urls.get(*key) is None
+
+    def unknown():
+        pass
+    with pytest.raises(ValueError):
+        get_wrapper(unknown)
+
+    assert urlman._urls.by_name('sensor.status') == [Sensor.status]
+    mount(only_me=True)
+    assert Sensor.status.site_url == 'sensor/status/'
+    assert urlman._urls.by_site_url('sensor/status/') == [Sensor.status]
+    assert urlman._urls.by_site_url('monitor/status/') == [Monitor.status]
+
+
+@api(name='reverse.path')
+def reverse_path(day: datetime.date, flag: bool, who, ratio: float):
+    return who
+
+
+@api(name='reverse.regex')
+def reverse_regex(day: datetime.date, who, /, n: int = 1, ratio=0.5, flag=False):
+    return who
+
+
+def test_reverse_api():
+    import django.urls
+    from django_urlman import reverse_api
+
+    module_path(__name__, '')
+    mount(only_me=True)
+    django.urls.clear_url_caches()
+
+    day = datetime.date(2024, 1, 2)
+    cases = [
+        (hello, {}), (hello, {'a': 5}), (hello, {'a': 'x'}), (hello, {'b': 1}),
+        (get_info, {}), (get_info, {'block_no': 3}), (get_info, {'block_no': 'x'}),
+        (reverse_path, {'day': day, 'flag': True, 'who': 'a b~@', 'ratio': 1.5}),
+        (reverse_path, {'day': day, 'flag': False, 'who': 'a/b', 'ratio': 1.5}),
+        (reverse_path, {'day': day, 'who': 'a', 'ratio': 1.5}),
+        (reverse_regex, {'day': '2024-01-02', 'who': 'x%y'}),
+        (reverse_regex, {'day': '2024-01-02', 'who': 'x', 'n': 7, 'flag': 'true'}),
+        (reverse_regex, {'day': '2024-01-02', 'who': 'x', 'ratio': 2.5}),
+        (reverse_regex, {'day': '2024-01-02', 'who': 'x', 'n': 'seven'}),
+    ]
+
+    def expected(func, params):
+        try:
+            return django.urls.reverse(func.url_name, kwargs=params)
+        except django.urls.NoReverseMatch:
+            return None
+
+    def actual(func, params):
+        try:
+            return reverse_api(func, **params)
+        except django.urls.NoReverseMatch:
+            return None
+
+    try:
+        for prefix in ('/', '/base path/'):
+            django.urls.set_script_prefix(prefix)
+            for func, params in cases:
+                assert actual(func, params) == expected(func, params), (func.url_name, params)
+                assert actual(func.real_func, params) == expected(func, params)
+    finally:
+        django.urls.set_script_prefix('/')
+
+    assert reverse_api(reverse_path, day=day, flag=True, who='me', ratio=1.5) == \
+        '/reverse-path/day/2024-01-02/flag/true/who/me/ratio/1.5/'
+    assert reverse_api(reverse_regex, day='2024-01-02', who='me', n=7) == \
+        '/reverse-regex/2024-01-02/me/n/7/'
+    # same-named methods share the url name, the api itself is not ambiguous
+    assert reverse_api(Monitor.settings) == '/monitor/settings/'
+    assert reverse_api(AsyncMonitor.settings) == '/asyncmonitor/settings/'
+
+
+def test_reverse_api_include():
+    import sys
+    import types
+    import django.urls
+    from django_urlman import reverse_api
+
+    included = types.ModuleType('tests.included_urls')
+    included.__package__ = 'tests'
+    included.urlpatterns = []
+    sys.modules[included.__name__] = included
+    saved = settings.urlpatterns
+
+    module_path(__name__, '')
+    try:
+        mount(urlconf=included.__name__, only_me=True)
+        for pattern, url in (
+                (django.urls.path('api/', django.urls.include(included.__name__)),
+                 '/api/hello/a/5/'),
+                (django.urls.re_path(r'^v1/', django.urls.include(included)), '/v1/hello/a/5/')):
+            settings.urlpatterns = [pattern]
+            django.urls.clear_url_caches()
+
+            assert django.urls.reverse(hello.url_name, kwargs={'a': 5}) == url
+            assert reverse_api(hello, a=5) == url
+            assert reverse_api(reverse_regex, day='2024-01-02', who='me', n=7) == \
+                django.urls.reverse(reverse_regex.url_name,
+                                    kwargs={'day': '2024-01-02', 'who': 'me', 'n': 7})
+
+        # prefix with parameters is not supported
+        settings.urlpatterns = [
+            django.urls.path('<int:tenant>/', django.urls.include(included.__name__))]
+        django.urls.clear_url_caches()
+        with pytest.raises(django.urls.NoReverseMatch):
+            reverse_api(hello, a=5)
+
+        settings.urlpatterns = []
+        django.urls.clear_url_caches()
+        with pytest.raises(django.urls.NoReverseMatch):
+            reverse_api(hello, a=5)
+    finally:
+        del sys.modules[included.__name__]
+        settings.urlpatterns = saved
+        mount(only_me=True)
+        django.urls.clear_url_caches()